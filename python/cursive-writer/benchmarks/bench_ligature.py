@@ -0,0 +1,88 @@
+from bench_spliner import DATA_DIR
+from bench_spliner import EXAMPLE_LETTERS
+
+from cursive_writer.ligature.ligature import align_letter_1
+from cursive_writer.ligature.ligature import align_letter_2
+from cursive_writer.ligature.ligature import find_lower_tangent
+from cursive_writer.ligature.word_builder import align_letter_pair
+from cursive_writer.ligature.word_builder import build_word
+from cursive_writer.ligature.word_builder import compute_thick_ligature
+from cursive_writer.ligature.word_builder import load_letter_dict
+from cursive_writer.spliner.spliner import compute_aligned_glyph
+from cursive_writer.utils.geometric_utils import find_align_stride
+from cursive_writer.utils.utils import load_spline
+
+
+def load_example_pair(name_l, name_r):
+    """Load two of the example letters, and the stride to align them"""
+    spline_sequence_l = load_spline(DATA_DIR / name_l[0] / name_l)
+    spline_sequence_r = load_spline(DATA_DIR / name_r[0] / name_r)
+    x_stride = find_align_stride((*spline_sequence_l, *spline_sequence_r))
+    return spline_sequence_l, spline_sequence_r, x_stride
+
+
+class TimeAlignLetters:
+    """The two align strategies, on the pairs used in the ligature examples"""
+
+    def setup(self):
+        i_l, m, o_l, v = EXAMPLE_LETTERS
+        # align_letter_1 on mo, align_letter_2 on iv
+        self.pair_1 = load_example_pair(m, o_l)
+        self.pair_2 = load_example_pair(i_l, v)
+
+        # the aligned samples of the last glyph of m and the first of o
+        spline_sequence_l, spline_sequence_r, x_stride = self.pair_1
+        _, self.l_x_as, self.l_y_as, _ = compute_aligned_glyph(
+            spline_sequence_l[-1], x_stride
+        )
+        _, r_x_as, self.r_y_as, self.r_yp_as = compute_aligned_glyph(
+            spline_sequence_r[0], x_stride
+        )
+        # shift the right glyph so that the curves are close
+        self.r_x_as = r_x_as + self.l_x_as[-1] - r_x_as[0]
+
+    def time_find_lower_tangent(self):
+        find_lower_tangent(
+            self.l_x_as, self.l_y_as, self.r_x_as, self.r_y_as, self.r_yp_as
+        )
+
+    def time_align_letter_1(self):
+        align_letter_1(*self.pair_1)
+
+    def time_align_letter_2(self):
+        align_letter_2(*self.pair_2)
+
+
+class TimeBuildWord:
+    """Assemble a word from the cached thick letters and ligatures"""
+
+    def setup(self):
+        self.thickness = 10
+        self.word = "vivvmmiimv"
+        self.letters_info = load_letter_dict(self.thickness, DATA_DIR)
+        x_stride = 1
+
+        self.ligature_info = {}
+        self.thick_con_info = {}
+        for i in range(len(self.word) - 1):
+            pair = self.word[i : i + 2]
+            if pair in self.ligature_info:
+                continue
+            f_let = self.letters_info[pair[0]]
+            s_let = self.letters_info[pair[1]]
+            self.ligature_info[pair] = align_letter_pair(f_let, s_let, x_stride)
+            self.thick_con_info[pair] = compute_thick_ligature(
+                self.ligature_info[pair], self.thickness
+            )
+
+        # fill the thick samples cached in the letters
+        self.time_build_word()
+
+    def time_build_word(self):
+        build_word(
+            self.word,
+            self.letters_info,
+            self.ligature_info,
+            self.thick_con_info,
+            self.thickness,
+        )
@@ -0,0 +1,94 @@
+import math
+
+from pathlib import Path
+
+from cursive_writer.spliner.spliner import compute_long_thick_spline
+from cursive_writer.spliner.spliner import compute_thick_spline
+from cursive_writer.spliner.spliner import fit_cubic
+from cursive_writer.spliner.spliner import translate_points_to_origin
+from cursive_writer.utils.geometric_utils import bisect_poly
+from cursive_writer.utils.geometric_utils import rotate_coeff
+from cursive_writer.utils.geometric_utils import rotate_derive_coeff
+from cursive_writer.utils.geometric_utils import sample_parametric_aligned
+from cursive_writer.utils.oriented_point import OrientedPoint
+from cursive_writer.utils.utils import load_spline
+
+# the letters used in examples/ligature_examples.py
+DATA_DIR = Path(__file__).resolve().parent.parent / "src" / "cursive_writer" / "data"
+EXAMPLE_LETTERS = ["i2_l_dot_000.txt", "m2_000.txt", "o3_l_001.txt", "v2_002.txt"]
+
+
+def load_example_letters():
+    """Load the splines of the example letters"""
+    return [load_spline(DATA_DIR / name[0] / name) for name in EXAMPLE_LETTERS]
+
+
+class TimeThickSpline:
+    """Thick samples of single segments and of whole letters"""
+
+    def setup(self):
+        self.thickness = 10
+        self.all_splines = load_example_letters()
+        self.segments = [
+            (glyph[i], glyph[i + 1])
+            for spline_sequence in self.all_splines
+            for glyph in spline_sequence
+            for i in range(len(glyph) - 1)
+        ]
+
+    def time_compute_thick_spline(self):
+        for p0, p1 in self.segments:
+            compute_thick_spline(p0, p1, self.thickness)
+
+    def time_compute_long_thick_spline(self):
+        for spline_sequence in self.all_splines:
+            compute_long_thick_spline(spline_sequence, self.thickness)
+
+
+class TimeSampleAligned:
+    """Aligned sampling of a rotated cubic, and the scalar root finder"""
+
+    def setup(self):
+        p0 = OrientedPoint(10, 20, 30)
+        p1 = OrientedPoint(150, 60, -20)
+        self.x_stride = 1
+        rot_p0, rot_p1, dir_01 = translate_points_to_origin(p0, p1)
+        coeff = fit_cubic(rot_p0, rot_p1)
+        self.x_rot_coeff, self.y_rot_coeff = rotate_coeff(coeff, dir_01)
+        self.x_rot_d_coeff, self.y_rot_d_coeff = rotate_derive_coeff(coeff, dir_01)
+        self.x_min = 0
+        self.x_max = p1.x - p0.x
+        self.x_offset = math.ceil(p0.x / self.x_stride) * self.x_stride - p0.x
+        self.x_high = max(p1.x - p0.x, abs(p1.y - p0.y)) * 2
+
+    def sample(self, root_finder):
+        sample_parametric_aligned(
+            self.x_rot_coeff,
+            self.y_rot_coeff,
+            self.x_rot_d_coeff,
+            self.y_rot_d_coeff,
+            self.x_min,
+            self.x_max,
+            self.x_stride,
+            self.x_offset,
+            x_low=0,
+            x_high=self.x_high,
+            root_finder=root_finder,
+        )
+
+    def time_sample_parametric_aligned(self):
+        self.sample("newton")
+
+    def time_sample_parametric_aligned_bisect(self):
+        self.sample("bisect")
+
+    def time_bisect_poly(self):
+        # the t where x(t) is a third of the segment
+        bisect_poly(
+            self.x_rot_coeff,
+            self.x_rot_d_coeff,
+            self.x_max / 3,
+            tolerance=1e-9,
+            x_low=0,
+            x_high=self.x_high,
+        )
@@ -0,0 +1,289 @@
+import argparse
+import importlib
+import inspect
+import json
+import logging
+import numpy as np  # type: ignore
+import platform
+import subprocess
+import sys
+
+from pathlib import Path
+from timeit import default_timer as timer
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from cursive_writer.utils.setup import setup_logger
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Setup CLI interface"""
+    parser = argparse.ArgumentParser(
+        description="Time the hot paths and compare them with a stored baseline"
+    )
+
+    parser.add_argument(
+        "-b",
+        "--bench_filter",
+        type=str,
+        default="",
+        help="Only run the benchmarks whose name contains this string",
+    )
+
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=5, help="How many times to time each one"
+    )
+
+    parser.add_argument(
+        "-mt",
+        "--min_time",
+        type=float,
+        default=0.1,
+        help="Minimum duration in seconds of each timing, calls are batched to reach it",
+    )
+
+    parser.add_argument(
+        "-th",
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Flag a regression if a benchmark is slower than the baseline by this ratio",
+    )
+
+    parser.add_argument(
+        "-s",
+        "--save_baseline",
+        action="store_true",
+        help="Save the results as the new baseline for this machine",
+    )
+
+    parser.add_argument(
+        "-m",
+        "--machine",
+        type=str,
+        default="",
+        help="Name of the baseline to compare with, default to the host name",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--path_output",
+        type=str,
+        default="",
+        help="Also save the results in this JSON file",
+    )
+
+    parser.add_argument(
+        "-llt",
+        "--log_level_type",
+        type=str,
+        default="m",
+        help="Message format for the debugging logger",
+        choices=["anlm", "nlm", "lm", "nm", "m"],
+    )
+
+    # last line to parse the args
+    args = parser.parse_args()
+    return args
+
+
+def setup_env() -> argparse.Namespace:
+    args = parse_arguments()
+
+    setup_logger("INFO", args.log_level_type)
+
+    # build command string to repeat this run
+    # FIXME if an option is a flag this does not work, sorry
+    recap = "python3 run_benchmarks.py"
+    for a, v in args._get_kwargs():
+        recap += f" --{a} {v}"
+
+    logmain = logging.getLogger(f"c.{__name__}.setup_env")
+    logmain.info(recap)
+
+    return args
+
+
+def find_benchmarks(bench_dir: Path, bench_filter: str) -> List[Tuple[str, type]]:
+    """Find the classes in the bench_*.py modules in bench_dir
+
+    Like in asv, each class can have a setup method, called once before timing,
+    and the methods named time_* are the benchmarks
+    """
+    if str(bench_dir) not in sys.path:
+        sys.path.insert(0, str(bench_dir))
+
+    all_classes = []
+    for pf_module in sorted(bench_dir.glob("bench_*.py")):
+        module = importlib.import_module(pf_module.stem)
+        for class_name, bench_class in inspect.getmembers(module, inspect.isclass):
+            if bench_class.__module__ != module.__name__:
+                continue
+            full_name = f"{pf_module.stem}.{class_name}"
+            methods = [m for m in dir(bench_class) if m.startswith("time_")]
+            if any(bench_filter in f"{full_name}.{m}" for m in methods):
+                all_classes.append((full_name, bench_class))
+
+    return all_classes
+
+
+def time_function(func: Callable, repeat: int, min_time: float) -> Dict:
+    """Time func, calling it enough times that each timing lasts min_time
+
+    Returns the best and the median time of a single call, in seconds
+    """
+    # find how many calls are needed to last min_time
+    number = 1
+    while True:
+        start = timer()
+        for _ in range(number):
+            func()
+        duration = timer() - start
+        if duration >= min_time:
+            break
+        # aim a bit above min_time, to avoid creeping up to it
+        number = max(number * 2, int(number * min_time * 1.2 / max(duration, 1e-9)))
+
+    all_times = []
+    for _ in range(repeat):
+        start = timer()
+        for _ in range(number):
+            func()
+        all_times.append((timer() - start) / number)
+
+    return {
+        "min": min(all_times),
+        "median": float(np.median(all_times)),
+        "number": number,
+    }
+
+
+def run_all(
+    all_classes: List[Tuple[str, type]], bench_filter: str, repeat: int, min_time: float
+) -> Dict[str, Dict]:
+    """Setup each class and time its benchmarks"""
+    logg = logging.getLogger(f"c.{__name__}.run_all")
+
+    results = {}
+    for full_name, bench_class in all_classes:
+        bench = bench_class()
+        if hasattr(bench, "setup"):
+            bench.setup()
+
+        for method_name in sorted(dir(bench_class)):
+            if not method_name.startswith("time_"):
+                continue
+            name = f"{full_name}.{method_name}"
+            if bench_filter not in name:
+                continue
+            results[name] = time_function(getattr(bench, method_name), repeat, min_time)
+            logg.debug(f"{name}: {results[name]}")
+
+    return results
+
+
+def get_commit() -> str:
+    """The current git commit, if available"""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+    except OSError:
+        return ""
+    return out.stdout.strip()
+
+
+def fmt_time(seconds: float) -> str:
+    """Format a duration with a sensible unit"""
+    if seconds >= 1:
+        return f"{seconds:8.3f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.3f} ms"
+    return f"{seconds * 1e6:8.3f} us"
+
+
+def compare_results(
+    results: Dict[str, Dict], baseline: Optional[Dict], threshold: float
+) -> List[str]:
+    """Log the results next to the baseline, return the names that regressed"""
+    logg = logging.getLogger(f"c.{__name__}.compare_results")
+
+    regressions = []
+    for name, res in results.items():
+        line = f"{name:<70} {fmt_time(res['min'])}"
+        if baseline is None or name not in baseline["results"]:
+            logg.info(f"{line}   (no baseline)")
+            continue
+
+        base_min = baseline["results"][name]["min"]
+        ratio = res["min"] / base_min
+        line += f"   baseline {fmt_time(base_min)}   x{ratio:.2f}"
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            logg.warn(f"{line}   REGRESSION")
+        elif ratio < 1 / (1 + threshold):
+            logg.info(f"{line}   faster")
+        else:
+            logg.info(line)
+
+    return regressions
+
+
+def run_benchmarks(args: argparse.Namespace) -> int:
+    """Run the benchmarks, compare them with the baseline, maybe save them
+
+    Returns the exit code: 1 if some benchmark regressed
+    """
+    logg = logging.getLogger(f"c.{__name__}.run_benchmarks")
+    logg.debug("Starting run_benchmarks")
+
+    bench_dir = Path(__file__).resolve().parent
+    baseline_dir = bench_dir / "baselines"
+    machine = args.machine if args.machine != "" else platform.node()
+    pf_baseline = baseline_dir / f"{machine}.json"
+
+    all_classes = find_benchmarks(bench_dir, args.bench_filter)
+    results = run_all(all_classes, args.bench_filter, args.repeat, args.min_time)
+
+    run_info = {
+        "machine": machine,
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "results": results,
+    }
+
+    baseline = None
+    if pf_baseline.exists():
+        baseline = json.loads(pf_baseline.read_text())
+        logg.info(f"Baseline from commit {baseline['commit']} on {machine}")
+    else:
+        logg.info(f"No baseline for {machine} in {baseline_dir}")
+
+    regressions = compare_results(results, baseline, args.threshold)
+
+    if args.path_output != "":
+        Path(args.path_output).write_text(json.dumps(run_info, indent=2))
+
+    if args.save_baseline:
+        # keep the baseline of the benchmarks that were not run
+        if baseline is not None:
+            for name, res in baseline["results"].items():
+                results.setdefault(name, res)
+        if not baseline_dir.exists():
+            baseline_dir.mkdir(parents=True)
+        pf_baseline.write_text(json.dumps(run_info, indent=2))
+        logg.info(f"Saved the baseline in {pf_baseline}")
+
+    if len(regressions) > 0:
+        logg.warn(f"{len(regressions)} benchmarks regressed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    args = setup_env()
+    sys.exit(run_benchmarks(args))
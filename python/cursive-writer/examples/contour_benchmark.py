@@ -0,0 +1,201 @@
+import argparse
+import logging
+import numpy as np
+
+from random import seed as rseed
+from timeit import default_timer as timer
+
+from cursive_writer.spliner.spliner import build_contour
+from cursive_writer.spliner.spliner import build_contour_flat
+from cursive_writer.spliner.spliner import classify_contour_batch
+from cursive_writer.spliner.spliner import sample_nat_segment_batch
+from cursive_writer.spliner.spliner import split_batch
+from cursive_writer.utils.oriented_point import OrientedPoint
+from cursive_writer.utils.setup import setup_logger
+
+
+def parse_arguments():
+    """Setup CLI interface"""
+    parser = argparse.ArgumentParser(description="")
+
+    parser.add_argument(
+        "-n", "--num_seg", type=int, default=2000, help="segments in a batch"
+    )
+
+    parser.add_argument(
+        "-r", "--num_rep", type=int, default=5, help="repetitions of each timing"
+    )
+
+    parser.add_argument(
+        "-t", "--thickness", type=float, default=10, help="thickness of the spline"
+    )
+
+    parser.add_argument(
+        "-s", "--rand_seed", type=int, default=-1, help="random seed to use"
+    )
+
+    # last line to parse the args
+    args = parser.parse_args()
+    return args
+
+
+def setup_env():
+    setup_logger()
+
+    args = parse_arguments()
+
+    # setup seed value
+    if args.rand_seed == -1:
+        myseed = 1
+        myseed = int(timer() * 1e9 % 2 ** 32)
+    else:
+        myseed = args.rand_seed
+    rseed(myseed)
+    np.random.seed(myseed)
+
+    # build command string to repeat this run
+    # FIXME if an option is a flag this does not work, sorry
+    recap = f"python3 contour_benchmark.py"
+    for a, v in args._get_kwargs():
+        if a == "rand_seed":
+            recap += f" --rand_seed {myseed}"
+        else:
+            recap += f" --{a} {v}"
+
+    logmain = logging.getLogger(f"c.{__name__}.setup_env")
+    logmain.info(recap)
+
+    return args
+
+
+def random_contour_inputs(num_seg, thickness, max_len):
+    """Corners, side lines and sampled splines of random thick segments
+
+    The segments are rotated to the x axis like in compute_thick_spline_batch,
+    short segments with sharp turns have overlapping sides
+    """
+    seg_len = np.random.uniform(1, max_len, num_seg)
+    ori_0 = np.radians(np.random.uniform(-89, 89, num_seg) + 90)
+    ori_1 = np.radians(np.random.uniform(-89, 89, num_seg) + 90)
+    y1 = np.random.uniform(-max_len / 3, max_len / 3, num_seg)
+    x0t, y0t = np.cos(ori_0) * thickness, np.sin(ori_0) * thickness
+    x1t, y1t = seg_len + np.cos(ori_1) * thickness, y1 + np.sin(ori_1) * thickness
+    x0b, y0b = -x0t, -y0t
+    x1b, y1b = 2 * seg_len - x1t, 2 * y1 - y1t
+
+    a_l = (y0b - y0t) / (x0b - x0t)
+    coeff_l = np.stack((a_l, y0t - a_l * x0t), axis=1)
+    a_r = (y1b - y1t) / (x1b - x1t)
+    coeff_r = np.stack((a_r, y1t - a_r * x1t), axis=1)
+
+    # keep only the segments that build_contour can handle
+    case_id, _, _ = classify_contour_batch(x0t, x0b, x1t, x1b, a_l, a_r)
+    good = case_id >= 0
+    x0t, x0b, x1t, x1b = x0t[good], x0b[good], x1t[good], x1b[good]
+    y0t, y0b, y1t, y1b = y0t[good], y0b[good], y1t[good], y1b[good]
+    coeff_l, coeff_r = coeff_l[good], coeff_r[good]
+
+    # random gentle cubics from corner to corner
+    num_good = x0t.shape[0]
+    coeff_t = np.zeros((num_good, 4))
+    coeff_b = np.zeros((num_good, 4))
+    coeff_t[:, 2] = (y1t - y0t) / (x1t - x0t)
+    coeff_t[:, 3] = y0t - coeff_t[:, 2] * x0t
+    coeff_b[:, 2] = (y1b - y0b) / (x1b - x0b)
+    coeff_b[:, 3] = y0b - coeff_b[:, 2] * x0b
+    x_sample_t, y_segment_t, counts_t = sample_nat_segment_batch(x0t, x1t, coeff_t)
+    x_sample_b, y_segment_b, counts_b = sample_nat_segment_batch(x0b, x1b, coeff_b)
+
+    corners = (x0t, x0b, x1t, x1b, y0t, y0b, y1t, y1b)
+    sides = (x_sample_t, y_segment_t, counts_t, x_sample_b, y_segment_b, counts_b)
+    return corners, coeff_l, coeff_r, sides
+
+
+def time_best(func, num_rep):
+    """Best time of num_rep calls of func, and the last result"""
+    best = float("inf")
+    for _ in range(num_rep):
+        start = timer()
+        res = func()
+        best = min(best, timer() - start)
+    return best, res
+
+
+def bench_contour(num_seg, thickness, max_len, num_rep):
+    """Time the scalar and flat contour builders on the same segments"""
+    logg = logging.getLogger(f"c.{__name__}.bench_contour")
+
+    corners, coeff_l, coeff_r, sides = random_contour_inputs(
+        num_seg, thickness, max_len
+    )
+    x0t, x0b, x1t, x1b, y0t, y0b, y1t, y1b = corners
+    x_sample_t, y_segment_t, counts_t, x_sample_b, y_segment_b, counts_b = sides
+    num_good = x0t.shape[0]
+
+    all_x_st = split_batch(x_sample_t, counts_t)
+    all_y_st = split_batch(y_segment_t, counts_t)
+    all_x_sb = split_batch(x_sample_b, counts_b)
+    all_y_sb = split_batch(y_segment_b, counts_b)
+
+    def scalar_contour(i):
+        return build_contour(
+            OrientedPoint(x0t[i], y0t[i], 0),
+            OrientedPoint(x0b[i], y0b[i], 0),
+            OrientedPoint(x1t[i], y1t[i], 0),
+            OrientedPoint(x1b[i], y1b[i], 0),
+            coeff_l[i],
+            coeff_r[i],
+            all_x_st[i],
+            all_y_st[i],
+            all_x_sb[i],
+            all_y_sb[i],
+            None,
+        )
+
+    # build_contour fails when a side has no samples, compare only the others
+    scalar_ok = []
+    for i in range(num_good):
+        try:
+            scalar_contour(i)
+            scalar_ok.append(i)
+        except ValueError:
+            pass
+    logg.info(f"build_contour failed on {num_good - len(scalar_ok)} segments")
+
+    def run_scalar():
+        return [scalar_contour(i) for i in scalar_ok]
+
+    def run_flat():
+        return build_contour_flat(x0t, x0b, x1t, x1b, coeff_l, coeff_r, *sides)
+
+    time_scalar, res_scalar = time_best(run_scalar, num_rep)
+    time_flat, res_flat = time_best(run_flat, num_rep)
+
+    # the two versions must agree
+    x_sample, contour_t, contour_b, counts_x = res_flat
+    flat_x_sample = split_batch(x_sample, counts_x)
+    same_scalar = all(
+        np.array_equal(flat_x_sample[i], xs)
+        for i, (_, _, xs) in zip(scalar_ok, res_scalar)
+    )
+
+    logg.info(f"{num_good} segments of max length {max_len}")
+    logg.info(f"scalar: {time_scalar * 1000:8.2f} ms")
+    logg.info(f"flat:   {time_flat * 1000:8.2f} ms")
+    logg.info(f"flat is {time_scalar / time_flat:.1f}x faster than scalar")
+    logg.info(f"same as scalar: {same_scalar}")
+
+
+def run_contour_benchmark(args):
+    """"""
+    logg = logging.getLogger(f"c.{__name__}.run_contour_benchmark")
+    logg.debug(f"Starting run_contour_benchmark")
+
+    # short segments overlap often, long ones are mostly regular
+    for max_len in [20, 100, 400]:
+        bench_contour(args.num_seg, args.thickness, max_len, args.num_rep)
+
+
+if __name__ == "__main__":
+    args = setup_env()
+    run_contour_benchmark(args)
@@ -0,0 +1,112 @@
+import argparse
+import logging
+
+from pathlib import Path
+from timeit import default_timer as timer
+
+from typing import Iterator
+
+from cursive_writer.utils.setup import setup_logger
+from cursive_writer.utils.utils import convert_spline
+from cursive_writer.utils.utils import find_spline_file
+from cursive_writer.utils.utils import SPLINE_BIN_SUFFIX
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Setup CLI interface"""
+    parser = argparse.ArgumentParser(
+        description="Convert the splines to the binary format, loaded faster"
+    )
+
+    parser.add_argument(
+        "-i",
+        "--path_input",
+        type=str,
+        default="",
+        help="Spline file or folder to convert, default to the data folder",
+    )
+
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Convert also the splines that have an up to date binary version",
+    )
+
+    parser.add_argument(
+        "-llt",
+        "--log_level_type",
+        type=str,
+        default="m",
+        help="Message format for the debugging logger",
+        choices=["anlm", "nlm", "lm", "nm", "m"],
+    )
+
+    # last line to parse the args
+    args = parser.parse_args()
+    return args
+
+
+def setup_env() -> argparse.Namespace:
+    args = parse_arguments()
+
+    setup_logger("INFO", args.log_level_type)
+
+    recap = "python3 convert_splines.py"
+    for a, v in args._get_kwargs():
+        recap += f" --{a} {v}"
+
+    logmain = logging.getLogger(f"c.{__name__}.setup_env")
+    logmain.info(recap)
+
+    return args
+
+
+def is_spline_file(pf_spline: Path) -> bool:
+    """A spline file lists the glyph files, a glyph file has the points"""
+    with pf_spline.open() as fs:
+        first_line = fs.readline().rstrip()
+    fields = first_line.split("\t")
+    return len(fields) == 3 and fields[0].endswith(".txt")
+
+
+def iterate_spline_files(path_input: Path) -> Iterator[Path]:
+    """Find the spline files in path_input, or path_input itself"""
+    if path_input.is_file():
+        yield path_input
+        return
+
+    for pf_spline in sorted(path_input.rglob("*.txt")):
+        if is_spline_file(pf_spline):
+            yield pf_spline
+
+
+def run_convert_splines(args: argparse.Namespace) -> None:
+    """Convert the splines that do not have an up to date binary version"""
+    logg = logging.getLogger(f"c.{__name__}.run_convert_splines")
+    logg.debug("Starting run_convert_splines")
+
+    if args.path_input == "":
+        path_input = Path(__file__).resolve().parent / "data"
+    else:
+        path_input = Path(args.path_input)
+
+    convert_start = timer()
+    num_converted = 0
+    num_skipped = 0
+    for pf_spline in iterate_spline_files(path_input):
+        if not args.force and find_spline_file(pf_spline).suffix == SPLINE_BIN_SUFFIX:
+            num_skipped += 1
+            continue
+        pf_spline_bin = convert_spline(pf_spline)
+        logg.debug(f"Converted {pf_spline_bin}")
+        num_converted += 1
+    convert_end = timer()
+
+    logg.info(f"Converted {num_converted} splines, {num_skipped} were up to date")
+    logg.info(f"Done in {convert_end - convert_start:.2f}s")
+
+
+if __name__ == "__main__":
+    args = setup_env()
+    run_convert_splines(args)
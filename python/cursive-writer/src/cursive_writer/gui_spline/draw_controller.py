@@ -17,6 +17,10 @@ class Controller:
 
         ### MODEL ###
         self.model = Model(thickness=thickness)
+        # compute the segments off the Tk thread
+        self.model.start_segment_worker()
+        # how often to check for computed segments, in ms
+        self.segment_poll_interval = 20
 
         # register callbacks on the model observables
         self.model.pf_input_image.add_callback(self.updated_pf_input_image)
@@ -172,8 +176,16 @@ class Controller:
         logg = logging.getLogger(f"c.{__class__.__name__}.run")
         logg.info(f"{fmt_cn('Running')} controller\n")
 
+        self.root.after(self.segment_poll_interval, self.poll_segment_worker)
         self.root.mainloop()
 
+        self.model.stop_segment_worker()
+
+    def poll_segment_worker(self):
+        """Show the segments computed in the background, then poll again"""
+        self.model.collect_segments()
+        self.root.after(self.segment_poll_interval, self.poll_segment_worker)
+
     ###### INPUT ACTIONS ######
 
     def key_released(self, event):
@@ -234,7 +246,6 @@ class Controller:
         elif the_num == 2:
             logg.debug(f"Wheel click")
             click_type = "wheel_click"
-            return
         elif the_num == 3:
             logg.debug(f"Right click")
             click_type = "right_click"
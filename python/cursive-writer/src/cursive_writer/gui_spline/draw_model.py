@@ -1,6 +1,7 @@
 import logging
 import math
 
+from pathlib import Path
 from string import ascii_lowercase
 
 from cursive_writer.gui_spline.image_cropper import ImageCropper
@@ -12,9 +13,10 @@ from cursive_writer.utils.geometric_utils import dist2D
 from cursive_writer.utils.geometric_utils import line_curve_point
 from cursive_writer.utils.geometric_utils import translate_point_dir
 from cursive_writer.utils.oriented_point import OrientedPoint
+from cursive_writer.utils.segment_worker import SegmentWorker
+from cursive_writer.utils.spatial_grid import SpatialGrid
 from cursive_writer.utils.spline_point import SplinePoint
 from cursive_writer.utils.spline_segment_holder import SplineSegmentHolder
-from cursive_writer.utils.utils import enumerate_double_list
 from cursive_writer.utils.utils import find_free_index
 from cursive_writer.utils.utils import iterate_double_list
 from cursive_writer.utils.utils import load_glyph
@@ -96,8 +98,20 @@ class Model:
         # id of the spline header hovered
         self.hovered_header_SP = -1
 
+        # where each spid is in the path, {spid: (glyph_idx, point_idx), ... }
+        self.spid_indexes = {}
+        # the pairs of spid that form a segment in the path
+        self.path_pairs = set()
+        # the points in the path, in abs coord, to find the ones in a region
+        self.point_grid = SpatialGrid()
+        # keep the indexes updated when the points or the path change
+        self.all_SP.add_callback(self.update_point_grid)
+        self.path_SP.add_callback(self.update_path_index)
+
         self.spline_segment_holder = SplineSegmentHolder()
         self.spline_thick_holder = SplineSegmentHolder(thickness=self.thickness)
+        # compute the segments in the background, if set with start_segment_worker
+        self.segment_worker = None
         # list of lists with segment points
         self.visible_segment_SP = Observable()
         # TODO what structure does this have
@@ -139,7 +153,8 @@ class Model:
         self.pf_input_image.set(pf_input_image)
 
         # create the new image cropper
-        self._image_cropper = ImageCropper(self.pf_input_image.get())
+        tile_cache_dir = Path(__file__).resolve().parent.parent / "tile_cache"
+        self._image_cropper = ImageCropper(self.pf_input_image.get(), tile_cache_dir)
         # NOTE if a new image is loaded, noone redraws it but a configure event
 
         # sadly can't be done before the first configure event
@@ -212,6 +227,12 @@ class Model:
         elif click_type == "scroll_down":
             self.zoom_image("out", self.start_view_x, self.start_view_y)
 
+        # handle wheel click: select the spline point under the mouse
+        elif click_type == "wheel_click":
+            spid = self.find_nearest_spid(self.start_view_x, self.start_view_y)
+            if spid is not None:
+                self.sp_frame_btn1_pressed(spid)
+
         # very weird things
         else:
             logg.warn(f"{fmt_cn('Unrecognized', 'alert')} click_type {click_type}")
@@ -548,7 +569,9 @@ class Model:
         self.path_SP.set(path)
 
         # update the segment holder
-        self.spline_segment_holder.update_data(self.all_SP.get(), path)
+        self.spline_segment_holder.update_data(
+            self.all_SP.get(), path, self.segment_worker
+        )
         # update the visible segments
         self.compute_visible_segment_points()
 
@@ -618,7 +641,9 @@ class Model:
         self.selected_indexes = [new_glyph_idx, new_point_idx]
 
         # update the segment holder
-        self.spline_segment_holder.update_data(self.all_SP.get(), path)
+        self.spline_segment_holder.update_data(
+            self.all_SP.get(), path, self.segment_worker
+        )
         # update the visible segments
         self.compute_visible_segment_points()
 
@@ -678,7 +703,9 @@ class Model:
         # update the visible spline points
         self.compute_visible_spline_points()
         # update the segment holder
-        self.spline_segment_holder.update_data(self.all_SP.get(), self.path_SP.get())
+        self.spline_segment_holder.update_data(
+            self.all_SP.get(), self.path_SP.get(), self.segment_worker
+        )
         # update the visible segments
         self.compute_visible_segment_points()
         # update the thick spline
@@ -1118,6 +1145,23 @@ class Model:
             # create a new point
             return OrientedPoint(view_x, view_y, point.ori_deg)
 
+    def rescale_points_array(self, x, y, direction):
+        """Rescale arrays of coordinates in the specified direction
+            * view2abs
+            * abs2view
+
+        Same as rescale_point, on all the points at once: returns new arrays x, y
+        """
+        zoom = self._image_cropper.zoom
+        mov_x = self._image_cropper._mov_x
+        mov_y = self._image_cropper._mov_y
+
+        if direction == "view2abs":
+            return (x + mov_x) / zoom, (y + mov_y) / zoom
+
+        elif direction == "abs2view":
+            return x * zoom - mov_x, y * zoom - mov_y
+
     ### SPLINE ###
 
     def add_spline_point(self):
@@ -1175,7 +1219,7 @@ class Model:
         self.path_SP.set(path)
 
         # update the segment holder
-        self.spline_segment_holder.update_data(all_SP, path)
+        self.spline_segment_holder.update_data(all_SP, path, self.segment_worker)
         # update the visible segments
         self.compute_visible_segment_points()
 
@@ -1208,10 +1252,11 @@ class Model:
         visible_SP = {}
         selected_spid_SP = self.selected_spid_SP.get()
 
-        # for hid, glyph in enumerate(self.path_SP.get()):
-        #     for spid in glyph:
-        for hid, _, spid in enumerate_double_list(self.path_SP.get()):
+        # only look at the points near the region, in path order
+        near_spids = self.point_grid.query(region)
+        for spid in sorted(near_spids, key=self.spid_indexes.get):
             curr_sp = all_SP[spid]
+            hid = self.spid_indexes[spid][0]
 
             # check that the point is in the region cropped
             if region[0] < curr_sp.x < region[2] and region[1] < curr_sp.y < region[3]:
@@ -1230,10 +1275,38 @@ class Model:
 
     def find_spid_in_path_SP(self, spid):
         """Find the indexes of the given spid in the path"""
-        for i, j, sp in enumerate_double_list(self.path_SP.get()):
-            if sp == spid:
-                return [i, j]
-        return [0, -1]
+        return list(self.spid_indexes.get(spid, [0, -1]))
+
+    def update_path_index(self, path):
+        """Map each spid to its position in the path, and save the segments"""
+        self.spid_indexes = {}
+        self.path_pairs = set()
+        for glyph_idx, glyph in enumerate(path):
+            for point_idx, spid in enumerate(glyph):
+                self.spid_indexes[spid] = (glyph_idx, point_idx)
+            self.path_pairs.update(zip(glyph[:-1], glyph[1:]))
+
+        # the points removed from the path are removed from the grid
+        self.update_point_grid(self.all_SP.get())
+
+    def update_point_grid(self, all_SP):
+        """Move the points in the grid to their current position"""
+        for spid in list(self.point_grid.boxes):
+            if spid not in self.spid_indexes:
+                self.point_grid.remove(spid)
+
+        # only the points that moved are actually changed in the grid
+        for spid in self.spid_indexes:
+            if spid in all_SP:
+                sp = all_SP[spid]
+                self.point_grid.insert_point(spid, sp.x, sp.y)
+
+    def find_nearest_spid(self, view_x, view_y, max_view_dist=10):
+        """Find the spline point closest to the view position, if any is near"""
+        view_op = OrientedPoint(view_x, view_y, 0)
+        abs_op = self.rescale_point(view_op, "view2abs")
+        max_abs_dist = max_view_dist / self._image_cropper.zoom
+        return self.point_grid.nearest(abs_op.x, abs_op.y, max_abs_dist)
 
     def compute_visible_segment_points(self):
         """Transform the segment points in view coord and send the visible one"""
@@ -1243,60 +1316,67 @@ class Model:
         # logg.setLevel("TRACE")
         logg.log(5, f"Start {fmt_cn('compute_visible_segment_points')}")
 
-        full_path = list(iterate_double_list(self.path_SP.get()))
-
-        if len(full_path) == 0 or len(full_path) == 1:
+        if len(self.path_pairs) == 0:
             self.visible_segment_SP.set([])
             return
 
         # region showed in the view, in abs image coordinate
         region = self._image_cropper.region
-        all_SP = self.all_SP.get()
 
-        # list of lists, each containing
+        # the segments are sampled with a level of detail fit for this zoom
+        zoom = self._image_cropper.zoom
+
+        # list of segments, each a tuple of arrays (view_x, view_y)
         visible_points = []
 
-        path = self.path_SP.get()
+        # the segments in the path with the bounding box in view: the ones still
+        # computed in the background are not in the grid yet
+        segment_grid = self.spline_segment_holder.segment_grid
+        visible_pairs = segment_grid.query(region) & self.path_pairs
 
-        for glyph in path:
-            if len(glyph) <= 1:
-                logg.log(5, f"Skip this glyph")
-                continue
+        for pair in visible_pairs:
+            logg.log(5, f"Processing pair: {pair}")
 
-            spid0 = glyph[0]
-            for spid1 in glyph[1:]:
-                pair = (spid0, spid1)
-                logg.log(5, f"Processing pair: {pair}")
-
-                abs_p0 = all_SP[spid0]
-                abs_p1 = all_SP[spid1]
-                # check that at least one of the end of the segment is in view
-                if (
-                    region[0] < abs_p0.x < region[2]
-                    and region[1] < abs_p0.y < region[3]
-                ) or (
-                    region[0] < abs_p1.x < region[2]
-                    and region[1] < abs_p1.y < region[3]
-                ):
-                    # extract the points to draw the segment
-                    seg_pts = self.spline_segment_holder.segments[pair]
-
-                    # points of this segment visible
-                    svp = []
-
-                    for x, y in seg_pts:
-                        # create a OrientedPoint to rescale to view
-                        abs_op = OrientedPoint(x, y, 0)
-                        view_op = self.rescale_point(abs_op, "abs2view")
-                        svp.append(view_op)
-
-                    visible_points.append(svp)
-
-                # get ready for next iteration
-                spid0 = spid1
+            # extract the points to draw the segment
+            abs_x, abs_y = self.spline_segment_holder.get_segment_lod(pair, zoom)
+
+            # rescale all the points of this segment to view
+            svp = self.rescale_points_array(abs_x, abs_y, "abs2view")
+            visible_points.append(svp)
 
         self.visible_segment_SP.set(visible_points)
 
+    def start_segment_worker(self, max_workers=None):
+        """Compute the changed segments in a pool of background processes
+
+        Call collect_segments periodically on the GUI thread to show them
+        """
+        logg = logging.getLogger(f"c.{__class__.__name__}.start_segment_worker")
+        logg.info(f"Start {fmt_cn('start_segment_worker')}")
+
+        self.segment_worker = SegmentWorker(max_workers)
+
+    def stop_segment_worker(self):
+        """Stop the background workers, go back to computing segments here"""
+        if self.segment_worker is not None:
+            self.segment_worker.shutdown()
+            self.segment_worker = None
+
+    def collect_segments(self):
+        """Save the segments computed in the background and publish them"""
+        if self.segment_worker is None:
+            return
+
+        self.segment_worker.collect()
+
+        if self.spline_segment_holder.updated:
+            self.spline_segment_holder.updated = False
+            self.compute_visible_segment_points()
+
+        if self.spline_thick_holder.updated:
+            self.spline_thick_holder.updated = False
+            self.publish_thick_segments()
+
     def update_thick_segments(self):
         """TODO: what is update_thick_segments doing?"""
         logg = logging.getLogger(f"c.{__class__.__name__}.update_thick_segments")
@@ -1331,7 +1411,17 @@ class Model:
 
         # TODO fix compute_thick_spline
         # TODO when drawing FM lines, call this
-        self.spline_thick_holder.update_data(all_fm, path)
+        self.spline_thick_holder.update_data(all_fm, path, self.segment_worker)
+
+        self.publish_thick_segments()
+
+    def publish_thick_segments(self):
+        """Send the points of the thick segments computed so far"""
+        logg = logging.getLogger(f"c.{__class__.__name__}.publish_thick_segments")
+        # logg.setLevel("TRACE")
+        logg.log(5, f"Start {fmt_cn('publish_thick_segments')}")
+
+        path = self.path_SP.get()
 
         # in the dict self.spline_thick_holder.segments[pair] = [(x0, y0), (x1, y1), ...]
 
@@ -1346,7 +1436,8 @@ class Model:
             spid0 = glyph[0]
             for spid1 in glyph[1:]:
                 pair = (spid0, spid1)
-                segment_points = self.spline_thick_holder.segments[pair]
+                # the segment might still be computed in the background
+                segment_points = self.spline_thick_holder.segments.get(pair, [])
 
                 for fm_op in segment_points:
                     all_fm_x.append(fm_op[0])
@@ -1509,7 +1600,9 @@ class Model:
         # update the visible spline points
         self.compute_visible_spline_points()
         # update the segment holder
-        self.spline_segment_holder.update_data(self.all_SP.get(), self.path_SP.get())
+        self.spline_segment_holder.update_data(
+            self.all_SP.get(), self.path_SP.get(), self.segment_worker
+        )
         # update the visible segments
         self.compute_visible_segment_points()
         # update the thick spline
@@ -1,4 +1,5 @@
 import logging
+import numpy as np  # type: ignore
 import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog
@@ -661,15 +662,17 @@ class FrameImage(ttk.Frame):
         tag = "segment"
         self.image_canvas.delete(tag)
 
-        for segment in data:
-            seq = []
-            for point in segment:
-                seq.append(point.x + self.widget_shift_x)
-                seq.append(point.y + self.widget_shift_y)
+        for view_x, view_y in data:
+            # interleave the coordinates x0, y0, x1, y1, ...
+            seq = np.empty(2 * len(view_x))
+            seq[0::2] = view_x + self.widget_shift_x
+            seq[1::2] = view_y + self.widget_shift_y
 
             # need at least two points to plot a line
             if len(seq) >= 4:
-                self.image_canvas.create_line(*seq, tags=tag, fill="lime green")
+                self.image_canvas.create_line(
+                    *seq.tolist(), tags=tag, fill="lime green"
+                )
 
     def update_thick_segment_points(self, data):
         """TODO: what are you changing when updating thick_segment_points?"""
@@ -4,6 +4,7 @@ import math
 from PIL import Image  # type: ignore
 from PIL import ImageTk  # type: ignore
 
+from cursive_writer.gui_spline.tile_pyramid import TilePyramid
 from cursive_writer.utils.color_utils import fmt_cn
 
 
@@ -19,7 +20,12 @@ class ImageCropper:
             to keep it centered when the zoomed image is smaller than the widget
     """
 
-    def __init__(self, photo_name_full):
+    def __init__(self, photo_name_full, tile_cache_dir=None):
+        """Crop regions from the image in photo_name_full
+
+        The image is split in a tile pyramid, the tiles rendered are saved in
+        tile_cache_dir if it is set
+        """
         logg = logging.getLogger(f"c.{__class__.__name__}.init")
         #  logg.setLevel("TRACE")
         logg.info(f"Start {fmt_cn('init')}")
@@ -27,10 +33,14 @@ class ImageCropper:
         # load the image
         self._photo_name_full = photo_name_full
         if self._photo_name_full.exists():
-            self._image = Image.open(self._photo_name_full)
+            self._pyramid = TilePyramid.from_file(
+                self._photo_name_full, cache_dir=tile_cache_dir
+            )
+            self._image = self._pyramid._image
             self._image_wid, self._image_hei = self._image.size
         else:
             self.create_blank_image()
+            self._pyramid = TilePyramid(self._image)
 
         # setup parameters for resizing
         self.upscaling_mode = Image.NEAREST
@@ -197,8 +207,8 @@ class ImageCropper:
         else:
             resampling_mode = self.downscaling_mode
 
-        # apply resize
-        image_res = self._image.resize(resized_dim, resampling_mode, region)
+        # apply resize, composing only the tiles visible at the closest level
+        image_res = self._pyramid.render(region, resized_dim, resampling_mode)
         # convert the photo for tkinter
         image_res = ImageTk.PhotoImage(image_res)
         # save it as attribute of the object, not garbage collected
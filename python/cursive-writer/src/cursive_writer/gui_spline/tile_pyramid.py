@@ -0,0 +1,246 @@
+import hashlib
+import logging
+import math
+import os
+
+from collections import OrderedDict
+from pathlib import Path
+from PIL import Image  # type: ignore
+
+from typing import Dict, Optional, Sequence, Tuple
+
+from cursive_writer.utils.color_utils import fmt_cn
+
+
+class TilePyramid:
+    def __init__(
+        self,
+        image: Image.Image,
+        tile_size: int = 256,
+        cache_dir: Optional[Path] = None,
+        cache_key: str = "",
+        max_tiles: int = 256,
+        max_cache_size: int = 256 * 2 ** 20,
+    ) -> None:
+        """Mip pyramid of an image, split in square tiles
+
+        Level 0 is the image, level l is scaled down by 2**l, the last level fits
+        in a single tile. A tile of level l is built from the four tiles of
+        level l-1 that it covers (level 1 directly from the image), so only the
+        tiles needed are ever computed.
+
+        Level 0 is served by cropping the image. The other rendered tiles are
+        kept in a LRU of max_tiles tiles, and if cache_dir is set saved in
+        cache_dir/cache_key, to be loaded next time. When the tiles of all the
+        images in cache_dir exceed max_cache_size bytes, the least recently used
+        are removed.
+        """
+        logg = logging.getLogger(f"c.{__class__.__name__}.init")
+        # logg.setLevel("TRACE")
+        logg.info(f"Start {fmt_cn('init')}")
+
+        self._image = image
+        self.image_wid, self.image_hei = image.size
+        self.tile_size = tile_size
+
+        # how many levels are needed to fit the image in a tile
+        max_side = max(self.image_wid, self.image_hei)
+        self.num_levels = max(1, math.ceil(math.log2(max_side / tile_size)) + 1)
+
+        self.cache_dir = cache_dir
+        self.max_cache_size = max_cache_size
+        # tiles written since the last eviction
+        self.num_saved = 0
+        self.tile_dir = None
+        if cache_dir is not None:
+            self.tile_dir = Path(cache_dir) / cache_key
+            if not self.tile_dir.exists():
+                self.tile_dir.mkdir(parents=True)
+
+        # LRU of the rendered tiles { (level, tx, ty) : Image }
+        self.max_tiles = max_tiles
+        self.tiles: Dict[Tuple[int, int, int], Image.Image] = OrderedDict()
+
+    @classmethod
+    def from_file(
+        cls, pf_image: Path, cache_dir: Optional[Path] = None, **kwargs
+    ) -> "TilePyramid":
+        """Open the image and use its path, size and mtime as cache key"""
+        image = Image.open(pf_image)
+        stat = pf_image.stat()
+        tile_size = kwargs.get("tile_size", 256)
+        key_str = f"{pf_image.resolve()}:{stat.st_size}:{stat.st_mtime}:{tile_size}"
+        cache_key = hashlib.sha1(key_str.encode()).hexdigest()[:16]
+        return cls(image, cache_dir=cache_dir, cache_key=cache_key, **kwargs)
+
+    def level_size(self, level: int) -> Tuple[int, int]:
+        """Size of the image at the level"""
+        scale = 2 ** level
+        return math.ceil(self.image_wid / scale), math.ceil(self.image_hei / scale)
+
+    def find_level(self, zoom: float) -> int:
+        """The coarsest level with at least as many pixels as the view needs"""
+        if zoom >= 1:
+            return 0
+        level = math.floor(math.log2(1 / zoom))
+        return min(level, self.num_levels - 1)
+
+    def get_tile(self, level: int, tx: int, ty: int) -> Image.Image:
+        """Get a tile, from memory, from disk, or render it"""
+        # cropping the image is cheaper than any cache
+        if level == 0:
+            return self.render_tile(level, tx, ty)
+
+        key = (level, tx, ty)
+        if key in self.tiles:
+            self.tiles.move_to_end(key)
+            return self.tiles[key]
+
+        tile = None
+        pf_tile = None
+        if self.tile_dir is not None:
+            pf_tile = self.tile_dir / f"{level}_{tx}_{ty}.png"
+            if pf_tile.exists():
+                tile = Image.open(pf_tile)
+                tile.load()
+                # mark the tile as recently used
+                os.utime(pf_tile)
+
+        if tile is None:
+            tile = self.render_tile(level, tx, ty)
+            if pf_tile is not None:
+                # write to a temp file, an interrupted save leaves no bad tile
+                pf_temp = pf_tile.with_suffix(".tmp")
+                tile.save(pf_temp, format="PNG", compress_level=1)
+                os.replace(pf_temp, pf_tile)
+                self.num_saved += 1
+
+        self.tiles[key] = tile
+        if len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+        return tile
+
+    def render_tile(self, level: int, tx: int, ty: int) -> Image.Image:
+        """Render a tile, cropping the image or scaling down the finer level"""
+        ts = self.tile_size
+        level_wid, level_hei = self.level_size(level)
+        box = (
+            tx * ts,
+            ty * ts,
+            min((tx + 1) * ts, level_wid),
+            min((ty + 1) * ts, level_hei),
+        )
+
+        if level == 0:
+            return self._image.crop(box)
+
+        # paste the four tiles of the finer level, then halve them
+        fine_wid, fine_hei = self.level_size(level - 1)
+        fine_box = (
+            box[0] * 2,
+            box[1] * 2,
+            min(box[2] * 2, fine_wid),
+            min(box[3] * 2, fine_hei),
+        )
+        if level == 1:
+            # cropping is cheap, do not fill the LRU with the level 0 tiles
+            mosaic = self._image.crop(fine_box)
+        else:
+            mosaic = self.compose(level - 1, fine_box)
+        tile_dim = (box[2] - box[0], box[3] - box[1])
+        return mosaic.resize(tile_dim, Image.BOX)
+
+    def compose(self, level: int, box: Sequence[int]) -> Image.Image:
+        """Paste the tiles of the level covering box (left, top, right, bottom)
+
+        The box is in the coordinates of the level, and must be aligned to the
+        tiles on the left/top side
+        """
+        ts = self.tile_size
+        left, top, right, bottom = box
+        mosaic = Image.new(self._image.mode, (right - left, bottom - top))
+        for ty in range(top // ts, math.ceil(bottom / ts)):
+            for tx in range(left // ts, math.ceil(right / ts)):
+                tile = self.get_tile(level, tx, ty)
+                mosaic.paste(tile, (tx * ts - left, ty * ts - top))
+        return mosaic
+
+    def render(
+        self,
+        region: Sequence[float],
+        resized_dim: Tuple[int, int],
+        resampling_mode: int,
+    ) -> Image.Image:
+        """Same as image.resize(resized_dim, resampling_mode, region)
+
+        Uses the tiles of the coarsest level that has enough detail, then
+        resizes only the composed tiles to the requested dimension
+        """
+        left, top, right, bottom = region
+        zoom = min(resized_dim[0] / (right - left), resized_dim[1] / (bottom - top))
+        level = self.find_level(zoom)
+        if level == 0:
+            return self._image.resize(resized_dim, resampling_mode, region)
+        scale = 2 ** level
+
+        # the region in level coordinates, and the tiles that contain it
+        ts = self.tile_size
+        level_wid, level_hei = self.level_size(level)
+        l_left = left / scale
+        l_top = top / scale
+        l_right = min(right / scale, level_wid)
+        l_bottom = min(bottom / scale, level_hei)
+        tile_box = (
+            math.floor(l_left / ts) * ts,
+            math.floor(l_top / ts) * ts,
+            min(math.ceil(l_right), level_wid),
+            min(math.ceil(l_bottom), level_hei),
+        )
+        mosaic = self.compose(level, tile_box)
+
+        # the region inside the mosaic
+        mosaic_region = (
+            l_left - tile_box[0],
+            l_top - tile_box[1],
+            l_right - tile_box[0],
+            l_bottom - tile_box[1],
+        )
+        resized = mosaic.resize(resized_dim, resampling_mode, mosaic_region)
+
+        if self.num_saved > 0:
+            self.evict()
+        return resized
+
+    def evict(self) -> None:
+        """Remove the least recently used tiles until the cache fits in max_cache_size
+
+        All the images that share cache_dir count, so the tiles of the images
+        that are not used any more are eventually removed
+        """
+        logg = logging.getLogger(f"c.{__class__.__name__}.evict")
+
+        self.num_saved = 0
+        if self.cache_dir is None:
+            return
+
+        entries = []
+        tot_size = 0
+        for pf_tile in Path(self.cache_dir).glob("*/*.png"):
+            try:
+                stat = pf_tile.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, pf_tile))
+            tot_size += stat.st_size
+
+        # oldest first
+        entries.sort(key=lambda e: e[0])
+        for _, size, pf_tile in entries:
+            if tot_size <= self.max_cache_size:
+                break
+            logg.debug(f"Evicting {pf_tile}")
+            try:
+                pf_tile.unlink()
+            except FileNotFoundError:
+                pass
+            tot_size -= size
@@ -0,0 +1,259 @@
+import argparse
+import logging
+import multiprocessing as mp
+import numpy as np  # type: ignore
+
+from itertools import islice
+from pathlib import Path
+from PIL import Image  # type: ignore
+from timeit import default_timer as timer
+
+from typing import Optional, Tuple
+from cursive_writer.utils.type_utils import ThickSpline
+
+from cursive_writer.ligature.ligature_store import LigatureStore
+from cursive_writer.ligature.word_builder import load_letter_dict
+from cursive_writer.ligature.word_builder import precompute_ligature_info
+from cursive_writer.ligature.word_generator import iterate_words
+from cursive_writer.ligature.word_renderer import WordRenderer
+from cursive_writer.utils.rasterizer import rasterize_thick_contour
+from cursive_writer.utils.sample_cache import ThickSampleCache
+from cursive_writer.utils.setup import setup_logger
+
+# the renderer used by the worker processes, inherited when they are forked
+worker_renderer: Optional[WordRenderer] = None
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Setup CLI interface"""
+    parser = argparse.ArgumentParser(description="Render all the words in a file")
+
+    parser.add_argument(
+        "-w",
+        "--word_file",
+        type=str,
+        default="3of6game_filt.txt",
+        help="Word list to render, in the data/wordlist folder or a full path",
+    )
+
+    parser.add_argument(
+        "-o", "--out_dir", type=str, default="rendered", help="Output folder"
+    )
+
+    parser.add_argument(
+        "-f",
+        "--out_format",
+        type=str,
+        default="png",
+        choices=["png", "npz"],
+        help="Save an image or the thick samples of each word",
+    )
+
+    parser.add_argument(
+        "-t", "--thickness", type=int, default=10, help="Thickness of the pen"
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes, default to the number of CPUs",
+    )
+
+    parser.add_argument(
+        "-n",
+        "--max_words",
+        type=int,
+        default=0,
+        help="Render only the first max_words words, 0 to render all of them",
+    )
+
+    parser.add_argument(
+        "-llt",
+        "--log_level_type",
+        type=str,
+        default="m",
+        help="Message format for the debugging logger",
+        choices=["anlm", "nlm", "lm", "nm", "m"],
+    )
+
+    # last line to parse the args
+    args = parser.parse_args()
+    return args
+
+
+def setup_env() -> argparse.Namespace:
+    args = parse_arguments()
+
+    setup_logger("INFO", args.log_level_type)
+
+    recap = "python3 bulk_renderer.py"
+    for a, v in args._get_kwargs():
+        recap += f" --{a} {v}"
+
+    logmain = logging.getLogger(f"c.{__name__}.setup_env")
+    logmain.info(recap)
+
+    return args
+
+
+def save_thick_spline_npz(pf_out: Path, thick_spline: ThickSpline) -> None:
+    """Save the samples of a thick spline in a npz file
+
+    x and y hold all the samples, seg_len the number of points in each segment
+    and gly_len the number of segments in each glyph
+    """
+    all_x = [segment[0] for thick_glyph in thick_spline for segment in thick_glyph]
+    all_y = [segment[1] for thick_glyph in thick_spline for segment in thick_glyph]
+    np.savez_compressed(
+        pf_out,
+        x=np.hstack(all_x),
+        y=np.hstack(all_y),
+        seg_len=np.array([len(seg_x) for seg_x in all_x]),
+        gly_len=np.array([len(thick_glyph) for thick_glyph in thick_spline]),
+    )
+
+
+def init_worker(renderer: WordRenderer) -> None:
+    """Set the renderer in a worker that was not forked"""
+    global worker_renderer
+    worker_renderer = renderer
+
+
+def render_word_job(job: Tuple) -> Tuple[int, str, str, float]:
+    """Render a word and save it in out_dir, in a worker process"""
+    logg = logging.getLogger(f"c.{__name__}.render_word_job")
+
+    i_word, word, out_dir, out_format, thickness = job
+    render_start = timer()
+
+    word = worker_renderer.filter_word(word)
+    if len(word) == 0:
+        return i_word, word, "", 0
+
+    try:
+        contour = out_format == "png"
+        word_thick_spline = worker_renderer.render(word, thickness, contour)
+    except Exception as e:
+        logg.warn(f"Unable to render {word}: {e!r}")
+        return i_word, word, "", 0
+
+    pf_out = out_dir / f"{i_word:07d}.{out_format}"
+    if out_format == "png":
+        image = rasterize_thick_contour(word_thick_spline)
+        Image.fromarray(image).save(pf_out)
+    else:
+        save_thick_spline_npz(pf_out, word_thick_spline)
+
+    render_end = timer()
+    return i_word, word, pf_out.name, render_end - render_start
+
+
+def warm_renderer(
+    renderer: WordRenderer, thickness: int, max_workers: int, contour: bool = False
+) -> None:
+    """Compute all the ligatures and thick samples before sharing the renderer
+
+    If contour is set, compute the outlines used for the images instead
+    """
+    logg = logging.getLogger(f"c.{__name__}.warm_renderer")
+
+    warm_start = timer()
+
+    letters_info = renderer.letters_info
+    renderer.ligature_info = precompute_ligature_info(
+        letters_info,
+        renderer.x_stride,
+        renderer.data_dir,
+        renderer.ligature_store,
+        max_workers,
+    )
+
+    for letter in letters_info.values():
+        for which in ["alone", "high", "low"]:
+            if contour:
+                letter.get_thick_contour(which, thickness)
+            else:
+                letter.get_thick_samples(which, thickness)
+    for pair in renderer.ligature_info:
+        renderer.get_thick_con(pair, thickness, contour)
+
+    warm_end = timer()
+    logg.info(f"Warmed the renderer in {warm_end - warm_start:.2f}s")
+
+
+def run_bulk_renderer(args: argparse.Namespace) -> None:
+    """Render all the words in a file with a pool of processes
+
+    The letters and ligatures are computed once here, then shared with the
+    workers by forking. Each worker saves the words it renders, and the index of
+    the words is written as the results arrive. The workers never save the
+    ligature store, that would overwrite the one written here
+    """
+    logg = logging.getLogger(f"c.{__name__}.run_bulk_renderer")
+    logg.debug("Starting run_bulk_renderer")
+
+    main_dir = Path(__file__).resolve().parent
+    data_dir = main_dir.parent / "data"
+    ligature_dir = main_dir.parent / "connections"
+    if not ligature_dir.exists():
+        ligature_dir.mkdir(parents=True)
+    ligature_store = LigatureStore(ligature_dir / "ligature_store.bin")
+    sample_cache = ThickSampleCache(main_dir.parent / "thick_samples")
+
+    word_file = Path(args.word_file)
+    if not word_file.exists():
+        word_file = data_dir / "wordlist" / args.word_file
+
+    out_dir = Path(args.out_dir)
+    if not out_dir.exists():
+        out_dir.mkdir(parents=True)
+
+    thickness = args.thickness if args.thickness > 0 else 1
+    max_workers = args.jobs if args.jobs is not None else mp.cpu_count()
+
+    letters_info = load_letter_dict(thickness, data_dir, sample_cache)
+    renderer = WordRenderer(letters_info, ligature_store, data_dir)
+    warm_renderer(renderer, thickness, max_workers, args.out_format == "png")
+    # a pair missed by the warm up is computed again in each worker that needs it
+    renderer.save_ligatures = False
+
+    # the forked workers see the warm renderer, the others get a copy
+    global worker_renderer
+    worker_renderer = renderer
+    if "fork" in mp.get_all_start_methods():
+        pool = mp.get_context("fork").Pool(max_workers)
+    else:
+        pool = mp.Pool(max_workers, initializer=init_worker, initargs=(renderer,))
+
+    all_words = iterate_words(word_file)
+    if args.max_words > 0:
+        all_words = islice(all_words, args.max_words)
+    jobs = (
+        (i_word, word, out_dir, args.out_format, thickness)
+        for i_word, word in enumerate(all_words)
+    )
+
+    render_start = timer()
+    num_done = 0
+    with pool, (out_dir / "index.tsv").open("w") as f_index:
+        for i_word, word, pf_name, _ in pool.imap_unordered(
+            render_word_job, jobs, chunksize=16
+        ):
+            if pf_name == "":
+                continue
+            f_index.write(f"{i_word}\t{word}\t{pf_name}\n")
+            num_done += 1
+            if num_done % 1000 == 0:
+                elapsed = timer() - render_start
+                logg.info(f"Rendered {num_done} words, {num_done / elapsed:.1f}/s")
+
+    render_end = timer()
+    elapsed = render_end - render_start
+    logg.info(f"Rendered {num_done} words in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    args = setup_env()
+    run_bulk_renderer(args)
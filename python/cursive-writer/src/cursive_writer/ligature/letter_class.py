@@ -1,11 +1,14 @@
 import logging
 
 from pathlib import Path
-from typing import cast, Optional, Dict
+from typing import cast, Optional, Dict, Tuple
 from cursive_writer.utils.type_utils import Spline, ThickSpline
 
-from cursive_writer.utils.utils import load_spline
-from cursive_writer.utils.utils import compute_hash_spline
+from cursive_writer.utils.oriented_point_array import SplineArray
+from cursive_writer.utils.utils import load_spline_hashed
+from cursive_writer.utils.utils import compute_fingerprint_spline
+from cursive_writer.utils.sample_cache import ThickSampleCache
+from cursive_writer.spliner.spliner import compute_long_thick_contour
 from cursive_writer.spliner.spliner import compute_long_thick_spline
 
 
@@ -19,6 +22,7 @@ class Letter:
         pf_spline_high: Optional[Path] = None,
         pf_spline_low: Optional[Path] = None,
         thickness: int = 10,
+        sample_cache: Optional[ThickSampleCache] = None,
     ):
         """TODO: what is __init__ doing?
 
@@ -37,6 +41,13 @@ class Letter:
 
         TODO: find better names for type: now it is both the letter type (alone, high,
         low) and the letter extreme type (high_up, low_up...)
+
+        If sample_cache is set, the thick samples are saved on disk and reloaded
+        from there while the spline files do not change
+
+        The splines are loaded as SplineArray, from the binary version if it is
+        up to date, and the OrientedPoint are only created when the spline is
+        requested: with the samples and the ligatures cached they never are
         """
         logg = logging.getLogger(f"c.{__name__}.__init__")
         # logg.debug(f"Start __init__ {letter}")
@@ -49,18 +60,22 @@ class Letter:
         self.right_type = right_type
         self.left_type = left_type
         self.thickness = thickness
+        self.sample_cache = sample_cache
 
         self.pf_spline: Dict[str, Optional[Path]] = {}
         self.pf_spline["alone"] = pf_spline_alone
         self.pf_spline["high"] = pf_spline_high
         self.pf_spline["low"] = pf_spline_low
 
+        self.spline_arr: Dict[str, SplineArray] = {}
         self.spline_seq: Dict[str, Spline] = {}
         self.spline_thick_samples: Dict[str, ThickSpline] = {}
         self.spline_loaded_thickness: Dict[str, int] = {}
+        self.spline_thick_contours: Dict[Tuple[str, int], ThickSpline] = {}
         self.gly_num: Dict[str, int] = {}
         self.point_num: Dict[str, int] = {}
         self.hash_sha1: Dict[str, str] = {}
+        self.fingerprint: Dict[str, str] = {}
 
         # load available alternate splines
         if self.pf_spline["alone"] is not None:
@@ -75,18 +90,43 @@ class Letter:
         logg = logging.getLogger(f"c.{__name__}.load_spline_info")
         # logg.debug(f"Start load_spline_info {which}")
 
-        # load the spline
-        self.spline_seq[which] = load_spline(cast(Path, self.pf_spline[which]))
+        # load the spline, the points are created in get_spline_seq
+        pf_spline = cast(Path, self.pf_spline[which])
+        self.fingerprint[which] = compute_fingerprint_spline(pf_spline)
+        spline_arr, hash_sha1 = load_spline_hashed(pf_spline)
+        self.spline_arr[which] = spline_arr
+        self.spline_seq.pop(which, None)
 
         # count the number of points and glyphs
-        self.gly_num[which] = len(self.spline_seq[which])
-        self.point_num[which] = sum(map(len, self.spline_seq[which]))
+        self.gly_num[which] = spline_arr.num_glyphs
+        self.point_num[which] = len(spline_arr)
 
         # check that there is a left glyph, a main spline and a right one
         if self.gly_num[which] <= 2:
             logg.warn(f"Not enough glyphs in the spline '{which}'")
 
-        self.hash_sha1[which] = compute_hash_spline(cast(Path, self.pf_spline[which]))
+        self.hash_sha1[which] = hash_sha1
+
+    def reload_spline_info(self, which: str) -> bool:
+        """Reload the spline if its files changed, and drop the thick versions
+
+        Returns True if the spline was reloaded
+        """
+        logg = logging.getLogger(f"c.{__name__}.reload_spline_info")
+
+        # the files are only hashed, the points are parsed if they changed
+        fingerprint = compute_fingerprint_spline(cast(Path, self.pf_spline[which]))
+        if fingerprint == self.fingerprint[which]:
+            return False
+
+        logg.info(f"The spline '{which}' of '{self.letter}' changed, reloading it")
+        self.load_spline_info(which)
+        self.spline_thick_samples.pop(which, None)
+        self.spline_loaded_thickness.pop(which, None)
+        for key in [key for key in self.spline_thick_contours if key[0] == which]:
+            del self.spline_thick_contours[key]
+
+        return True
 
     def get_pf(self, which: str) -> Path:
         """TODO: what is get_pf doing?"""
@@ -100,6 +140,8 @@ class Letter:
         # logg = logging.getLogger(f"c.{__name__}.get_spline_seq")
         # logg.debug(f"Start get_spline_seq")
         valid_which = self.get_valid_type(which)
+        if valid_which not in self.spline_seq:
+            self.spline_seq[valid_which] = self.spline_arr[valid_which].to_points()
         return self.spline_seq[valid_which]
 
     def get_thick_samples(self, which: str, thickness: int = -1) -> ThickSpline:
@@ -114,8 +156,8 @@ class Letter:
         # compute the thick version when needed
         if valid_which not in self.spline_thick_samples:
             logg.debug(f"Loading thick spline: {valid_which}, thickness {thickness}")
-            self.spline_thick_samples[valid_which] = compute_long_thick_spline(
-                self.spline_seq[valid_which], thickness
+            self.spline_thick_samples[valid_which] = self.compute_thick_samples(
+                valid_which, thickness
             )
             # save the thickness of the loaded letter
             self.spline_loaded_thickness[valid_which] = thickness
@@ -123,14 +165,51 @@ class Letter:
         # reload the info if the thickness changed
         if self.spline_loaded_thickness[valid_which] != thickness:
             logg.debug(f"Reloading thick spline: {valid_which}, thickness {thickness}")
-            self.spline_thick_samples[valid_which] = compute_long_thick_spline(
-                self.spline_seq[valid_which], thickness
+            self.spline_thick_samples[valid_which] = self.compute_thick_samples(
+                valid_which, thickness
             )
             # save the thickness of the loaded letter
             self.spline_loaded_thickness[valid_which] = thickness
 
         return self.spline_thick_samples[valid_which]
 
+    def compute_thick_samples(self, valid_which: str, thickness: int) -> ThickSpline:
+        """Compute the thick samples, or load them from the sample_cache if set"""
+        # logg = logging.getLogger(f"c.{__name__}.compute_thick_samples")
+        # logg.debug(f"Start compute_thick_samples")
+
+        if self.sample_cache is None:
+            return compute_long_thick_spline(
+                self.get_spline_seq(valid_which), thickness
+            )
+
+        hash_sha1 = self.hash_sha1[valid_which]
+        thick_samples = self.sample_cache.load(hash_sha1, thickness)
+
+        if thick_samples is None:
+            thick_samples = compute_long_thick_spline(
+                self.get_spline_seq(valid_which), thickness
+            )
+            self.sample_cache.save(hash_sha1, thickness, thick_samples)
+
+        return thick_samples
+
+    def get_thick_contour(self, which: str, thickness: int = -1) -> ThickSpline:
+        """Get the outlines of the thick segments, computed the first time
+
+        The outlines are cheap to compute, so they are only kept in memory
+        """
+        valid_which = self.get_valid_type(which)
+        if thickness == -1:
+            thickness = self.thickness
+
+        key = (valid_which, thickness)
+        if key not in self.spline_thick_contours:
+            self.spline_thick_contours[key] = compute_long_thick_contour(
+                self.get_spline_seq(valid_which), thickness
+            )
+        return self.spline_thick_contours[key]
+
     def get_hash(self, which: str) -> str:
         """TODO: what is get_hash doing?"""
         # logg = logging.getLogger(f"c.{__name__}.get_hash")
@@ -90,7 +90,143 @@ def find_lower_tangent(l_x_as, l_y_as, r_x_as, r_y_as, r_yp_as):
     return l_xid, r_xid, l_tang_y_as, tangent_time
 
 
-def find_best_shift(l_x_as, l_y_as, l_yp_as, r_x_orig_as, r_y_as, r_yp_as, x_stride):
+def find_lower_tangent_batch(
+    l_x_as, l_y_as, r_x_as, r_y_as, r_yp_as, max_size=2 ** 22
+):
+    """Finds a line tangent to both curves, for many shifts of the right curve at once
+
+    Same as find_lower_tangent, but r_x_as is a (S, M) matrix with one row for each
+    shift of the right curve. The tangents for all the shifts and all the right
+    points are sampled on the left curve together, in chunks of shifts so that at
+    most max_size values are in memory.
+
+    Returns:
+    l_xid: (S,) index, in l_x_as, of the contact point, -1 if not found
+    r_xid: (S,) index, in each row of r_x_as, of the contact point, -1 if not found
+    """
+    # logg = logging.getLogger(f"c.{__name__}.find_lower_tangent_batch")
+    # logg.debug(f"Start find_lower_tangent_batch")
+
+    num_shift, num_r = r_x_as.shape
+
+    # compute the second derivative
+    r_ypp = r_yp_as[1:] - r_yp_as[:-1]
+    mean_r_ypp = np.mean(r_ypp)
+
+    # the order in which the right points are tested
+    if mean_r_ypp >= 0:
+        range_xid = np.arange(num_r)
+    else:
+        range_xid = np.arange(num_r)[::-1]
+
+    # slope of the tangents, computed exactly like OrientedPoint does
+    tang_a = np.array([OrientedPoint(0, 0, slope2deg(yp)).ori_slo for yp in r_yp_as])
+    # (S, M) intercept of the tangents
+    tang_b = r_y_as - tang_a * r_x_as
+
+    # the same matrix used by poly_model
+    x_matrix_t = np.array([l_x_as ** i for i in range(2)])
+
+    l_xid = np.full(num_shift, -1)
+    r_xid = np.full(num_shift, -1)
+
+    chunk_size = max(1, max_size // (num_r * l_x_as.shape[0]))
+    for c_start in range(0, num_shift, chunk_size):
+        c_end = min(c_start + chunk_size, num_shift)
+
+        # (C, M, 2) coefficients of the tangents
+        tang_coeff = np.empty((c_end - c_start, num_r, 2))
+        tang_coeff[:, :, 0] = tang_b[c_start:c_end]
+        tang_coeff[:, :, 1] = tang_a
+        # (C, M, N) sample the tangents on the *left* segment sample
+        l_tang_y_as = np.matmul(tang_coeff, x_matrix_t)
+
+        # the tangents that have no point of the left segment lower than them
+        no_lower = np.logical_not(np.any(l_y_as < l_tang_y_as, axis=2))
+        no_lower = no_lower[:, range_xid]
+
+        # the first tangent in the order is the one found by the loop
+        found = np.any(no_lower, axis=1)
+        first_xid = range_xid[np.argmax(no_lower, axis=1)]
+
+        # find distance from left segment to the tangent found
+        c_id = np.arange(c_end - c_start)
+        dist_left_tangent = l_y_as - l_tang_y_as[c_id, first_xid]
+        argmin_dist_left_tangent = np.argmin(dist_left_tangent, axis=1)
+
+        l_xid[c_start:c_end] = np.where(found, argmin_dist_left_tangent, -1)
+        r_xid[c_start:c_end] = np.where(found, first_xid, -1)
+
+    return l_xid, r_xid
+
+
+def search_shift_batch(
+    l_x_as, l_y_as, r_x_orig_as, r_y_as, r_yp_as, shift_range, coarse_step=1
+):
+    """Finds the index of the best shift in shift_range to align two curves
+
+    All the shifts are evaluated at once with find_lower_tangent_batch.
+
+    If coarse_step is larger than 1, only one shift every coarse_step is checked
+    first, then all the shifts around the best coarse one: this is faster but the
+    result can differ from the full search.
+
+    Returns:
+    best_id: index in shift_range of the best shift, -1 if none is valid
+    best_l_xid: index, in l_x_as, of the contact point
+    best_r_xid: index, in r_x_as, of the contact point
+    """
+    # logg = logging.getLogger(f"c.{__name__}.search_shift_batch")
+    # logg.debug(f"Start search_shift_batch")
+
+    num_shift = shift_range.shape[0]
+
+    def eval_shift(shift_id):
+        """Distance between the contact points for the shift_id, inf if invalid"""
+        r_x_as = r_x_orig_as + shift_range[shift_id][:, None]
+        l_xid, r_xid = find_lower_tangent_batch(l_x_as, l_y_as, r_x_as, r_y_as, r_yp_as)
+        found = l_xid != -1
+        l_x_touch = l_x_as[l_xid]
+        r_x_touch = r_x_as[np.arange(shift_id.shape[0]), r_xid]
+        dist_x_touch = r_x_touch - l_x_touch
+        # discard the tangents not found and the ones that go the wrong way
+        valid = found & (r_x_touch >= l_x_touch)
+        dist_x_touch = np.where(valid, dist_x_touch, np.inf)
+        return dist_x_touch, l_xid, r_xid
+
+    if coarse_step > 1:
+        coarse_id = np.arange(0, num_shift, coarse_step)
+        dist_x_touch, _, _ = eval_shift(coarse_id)
+        best_coarse = coarse_id[np.argmin(dist_x_touch)]
+        # refine around the best coarse shift
+        shift_id = np.arange(
+            max(0, best_coarse - coarse_step + 1),
+            min(num_shift, best_coarse + coarse_step),
+        )
+    else:
+        shift_id = np.arange(num_shift)
+
+    dist_x_touch, l_xid, r_xid = eval_shift(shift_id)
+
+    # argmin returns the *first* occurrence of the min value, like the loop
+    best_sub = np.argmin(dist_x_touch)
+    if np.isinf(dist_x_touch[best_sub]):
+        return -1, -1, -1
+
+    return shift_id[best_sub], l_xid[best_sub], r_xid[best_sub]
+
+
+def find_best_shift(
+    l_x_as,
+    l_y_as,
+    l_yp_as,
+    r_x_orig_as,
+    r_y_as,
+    r_yp_as,
+    x_stride,
+    batch=True,
+    coarse_step=1,
+):
     """Finds the best shift to align two curves
 
     l_x_as: x aligned sample of left curve
@@ -100,6 +236,8 @@ def find_best_shift(l_x_as, l_y_as, l_yp_as, r_x_orig_as, r_y_as, r_yp_as, x_str
     r_y_as: y values of right curve
     r_yp_as: first derivative values of right curve
     x_stride: stride of the alignement
+    batch: evaluate all the shifts at once, the result is the same as the loop
+    coarse_step: when using batch, check one shift every coarse_step before refining
 
     Returns:
     best_shift: the best shift to apply to the right curve
@@ -134,57 +272,84 @@ def find_best_shift(l_x_as, l_y_as, l_yp_as, r_x_orig_as, r_y_as, r_yp_as, x_str
     best_r_x_as = None
     best_l_tang_y_as = None
 
-    tangent_times = []
+    if batch:
+        tangent_start = timer()
+        best_id, l_xid, r_xid = search_shift_batch(
+            l_x_as, l_y_as, r_x_orig_as, r_y_as, r_yp_as, shift_range, coarse_step
+        )
+        tangent_end = timer()
+        logg.debug(f"Batch tangent time: {tangent_end - tangent_start:.6f}")
+
+        if best_id != -1:
+            best_shift = shift_range[best_id]
+            best_r_x_as = r_x_orig_as + best_shift
+
+            # sample the best tangent like find_lower_tangent does
+            tang_op = OrientedPoint(
+                best_r_x_as[r_xid], r_y_as[r_xid], slope2deg(r_yp_as[r_xid])
+            )
+            tang_coeff = tang_op.to_ab_line()
+            best_l_tang_y_as = poly_model(l_x_as, tang_coeff, flip_coeff=True)
+
+            # extend the points of contact
+            l_x_touch = l_x_as[l_xid]
+            r_x_touch = best_r_x_as[r_xid]
+            dist_x_touch = r_x_touch - l_x_touch
+            best_l_x_ext = l_x_touch - dist_x_touch / 2
+            best_r_x_ext = r_x_touch + dist_x_touch / 2
 
-    for shift in shift_range:
-        r_x_as = r_x_orig_as + shift
-        # logg.debug(f"\nNew shift r_x_as[0]: {r_x_as[0]} r_x_as[-1]: {r_x_as[-1]}")
+    else:
+        tangent_times = []
 
-        # ax.plot(r_x_as, r_y_as, color="y", ls="-", marker="")
-        # ax.plot(r_x_as, r_y_as, color="y", ls="", marker=".")
+        for shift in shift_range:
+            r_x_as = r_x_orig_as + shift
+            # logg.debug(f"\nNew shift r_x_as[0]: {r_x_as[0]} r_x_as[-1]: {r_x_as[-1]}")
 
-        # find the indexes where the tangent touches the curves
-        l_xid, r_xid, l_tang_y_as, tangent_time = find_lower_tangent(
-            l_x_as, l_y_as, r_x_as, r_y_as, r_yp_as
-        )
+            # ax.plot(r_x_as, r_y_as, color="y", ls="-", marker="")
+            # ax.plot(r_x_as, r_y_as, color="y", ls="", marker=".")
 
-        tangent_times.append(tangent_time)
+            # find the indexes where the tangent touches the curves
+            l_xid, r_xid, l_tang_y_as, tangent_time = find_lower_tangent(
+                l_x_as, l_y_as, r_x_as, r_y_as, r_yp_as
+            )
 
-        if l_xid == -1:
-            # logg.debug(f"Tangent not found")
-            continue
+            tangent_times.append(tangent_time)
 
-        # find where the tangent touches the segments
-        l_x_touch = l_x_as[l_xid]
-        r_x_touch = r_x_as[r_xid]
+            if l_xid == -1:
+                # logg.debug(f"Tangent not found")
+                continue
 
-        if r_x_touch < l_x_touch:
-            # logg.debug(f"Tangent goes the wrong way")
-            continue
+            # find where the tangent touches the segments
+            l_x_touch = l_x_as[l_xid]
+            r_x_touch = r_x_as[r_xid]
 
-        # compute how far are the two contacts
-        dist_x_touch = r_x_touch - l_x_touch
+            if r_x_touch < l_x_touch:
+                # logg.debug(f"Tangent goes the wrong way")
+                continue
+
+            # compute how far are the two contacts
+            dist_x_touch = r_x_touch - l_x_touch
+
+            # if this shift does not improve the distance, go to the next
+            if dist_x_touch >= best_dist_x_touch:
+                continue
+
+            # save info about the current shift
+            best_dist_x_touch = dist_x_touch
+            best_shift = shift
+            best_r_x_as = r_x_as
+            best_l_tang_y_as = l_tang_y_as
+
+            # extend the points of contact
+            best_l_x_ext = l_x_touch - dist_x_touch / 2
+            best_r_x_ext = r_x_touch + dist_x_touch / 2
+            # recap = f"l_x_touch: {l_x_touch:.4f} r_x_touch {r_x_touch:.4f}"
+            # recap += f" dist_x_touch: {dist_x_touch:.4f}"
+            # recap += f" best_l_x_ext: {best_l_x_ext:.4f} best_r_x_ext {best_r_x_ext:.4f}"
+            # logg.debug(recap)
 
-        # if this shift does not improve the distance, go to the next
-        if dist_x_touch >= best_dist_x_touch:
-            continue
-
-        # save info about the current shift
-        best_dist_x_touch = dist_x_touch
-        best_shift = shift
-        best_r_x_as = r_x_as
-        best_l_tang_y_as = l_tang_y_as
-
-        # extend the points of contact
-        best_l_x_ext = l_x_touch - dist_x_touch / 2
-        best_r_x_ext = r_x_touch + dist_x_touch / 2
-        # recap = f"l_x_touch: {l_x_touch:.4f} r_x_touch {r_x_touch:.4f}"
-        # recap += f" dist_x_touch: {dist_x_touch:.4f}"
-        # recap += f" best_l_x_ext: {best_l_x_ext:.4f} best_r_x_ext {best_r_x_ext:.4f}"
-        # logg.debug(recap)
-
-    tangent_time_mean = sum(tangent_times) / len(tangent_times)
-    logg.debug(f"Mean tangent time: {tangent_time_mean:.6f}")
+        tangent_time_mean = sum(tangent_times) / len(tangent_times)
+        logg.debug(f"Mean tangent time: {tangent_time_mean:.6f}")
 
     # extract the best value as current (r_x_as = r_x_orig_as + best_shift)
     r_x_as = best_r_x_as
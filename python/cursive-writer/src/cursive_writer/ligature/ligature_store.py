@@ -0,0 +1,195 @@
+import json
+import logging
+import numpy as np  # type: ignore
+import os
+
+from pathlib import Path
+
+from typing import Dict, List, Optional, Tuple
+from cursive_writer.utils.type_utils import Glyph, Spline
+
+from cursive_writer.ligature.ligature_info import LigatureInfo
+from cursive_writer.utils.oriented_point import OrientedPoint
+
+# change this when the layout of the file changes
+STORE_MAGIC = b"CWLIGDB1"
+
+
+class LigatureStore:
+    def __init__(self, pf_store: Path) -> None:
+        """Single file database of LigatureInfo, indexed by letter pair
+
+        The file is laid out as:
+            - 8 bytes: STORE_MAGIC
+            - 8 bytes: length of the index, little endian uint64
+            - the index, in json, padded with spaces to a multiple of 8 bytes
+            - the points of all the ligatures, (N, 3) float64 of x, y, ori_deg
+
+        The index maps each pair to the names, types, hashes and shift of the
+        ligature, and to the position and length of its glyphs in the points
+        array. The points are opened with mmap, so a lookup only reads the
+        rows of that pair.
+
+        New ligatures are kept in memory by add and written by save.
+        """
+        logg = logging.getLogger(f"c.{__name__}.__init__")
+        # logg.debug(f"Start __init__")
+
+        self.pf_store = pf_store
+
+        self.index: Dict[str, Dict] = {}
+        self.points = np.empty((0, 3))
+        # LigatureInfo added but not saved yet
+        self.pending: Dict[str, LigatureInfo] = {}
+
+        if self.pf_store.exists():
+            try:
+                self.load()
+            except (OSError, ValueError) as e:
+                logg.warn(f"Unable to load {self.pf_store}: {e}")
+                self.index = {}
+                self.points = np.empty((0, 3))
+
+    def load(self) -> None:
+        """Read the index and map the points of the store file"""
+        logg = logging.getLogger(f"c.{__name__}.load")
+
+        with self.pf_store.open("rb") as f_st:
+            magic = f_st.read(len(STORE_MAGIC))
+            if magic != STORE_MAGIC:
+                raise ValueError(f"Unknown file format {magic!r}")
+            index_len = int.from_bytes(f_st.read(8), "little")
+            index_str = f_st.read(index_len).decode()
+
+        header = json.loads(index_str)
+        self.index = header["index"]
+        num_points = header["num_points"]
+
+        if num_points > 0:
+            self.points = np.memmap(
+                self.pf_store,
+                dtype="<f8",
+                mode="r",
+                offset=len(STORE_MAGIC) + 8 + index_len,
+                shape=(num_points, 3),
+            )
+        else:
+            self.points = np.empty((0, 3))
+
+        logg.debug(f"Loaded {len(self.index)} ligatures from {self.pf_store}")
+
+    def __contains__(self, pair: str) -> bool:
+        return pair in self.pending or pair in self.index
+
+    def __len__(self) -> int:
+        return len(self.index.keys() | self.pending.keys())
+
+    def get(self, pair: str) -> Optional[LigatureInfo]:
+        """Build the LigatureInfo of the pair, None if it is not in the store"""
+        if pair in self.pending:
+            return self.pending[pair]
+        if pair not in self.index:
+            return None
+
+        entry = self.index[pair]
+        start = entry["start"]
+        all_len = [entry["f_len"], entry["s_len"], *entry["con_len"]]
+        all_glyph: List[Glyph] = []
+        for gly_len in all_len:
+            rows = self.points[start : start + gly_len]
+            all_glyph.append([OrientedPoint(x, y, o) for x, y, o in rows.tolist()])
+            start += gly_len
+
+        return LigatureInfo(
+            f_pf_name=entry["f_pf_name"],
+            s_pf_name=entry["s_pf_name"],
+            f_let_type=entry["f_let_type"],
+            s_let_type=entry["s_let_type"],
+            spline_seq_con=all_glyph[2:],
+            f_gly_chop=all_glyph[0],
+            s_gly_chop=all_glyph[1],
+            shift=entry["shift"],
+            f_hash_sha1=entry["f_hash_sha1"],
+            s_hash_sha1=entry["s_hash_sha1"],
+        )
+
+    def add(self, pair: str, ligature_info: LigatureInfo) -> None:
+        """Add the LigatureInfo of the pair, it is written on the next save"""
+        self.pending[pair] = ligature_info
+
+    def save(self) -> None:
+        """Write the store file with all the ligatures, old and new"""
+        logg = logging.getLogger(f"c.{__name__}.save")
+
+        if len(self.pending) == 0:
+            return
+
+        index: Dict[str, Dict] = {}
+        all_points: List[np.ndarray] = []
+        num_points = 0
+
+        # the ligatures already in the file
+        for pair, entry in self.index.items():
+            if pair in self.pending:
+                continue
+            start = entry["start"]
+            entry_len = entry["f_len"] + entry["s_len"] + sum(entry["con_len"])
+            all_points.append(np.array(self.points[start : start + entry_len]))
+            index[pair] = {**entry, "start": num_points}
+            num_points += entry_len
+
+        # the new ones
+        for pair, ligature_info in self.pending.items():
+            entry, points = self.pack_ligature_info(ligature_info)
+            all_points.append(points)
+            index[pair] = {**entry, "start": num_points}
+            num_points += points.shape[0]
+
+        header = {"index": index, "num_points": num_points}
+        index_bytes = json.dumps(header).encode()
+        # pad the index so that the points are aligned
+        index_bytes += b" " * (-len(index_bytes) % 8)
+
+        if num_points > 0:
+            points = np.vstack(all_points).astype("<f8")
+        else:
+            points = np.empty((0, 3), dtype="<f8")
+
+        # write to a temp file and rename, the old mapping stays valid
+        pf_store_tmp = self.pf_store.with_suffix(f".{os.getpid()}.tmp")
+        with pf_store_tmp.open("wb") as f_st:
+            f_st.write(STORE_MAGIC)
+            f_st.write(len(index_bytes).to_bytes(8, "little"))
+            f_st.write(index_bytes)
+            f_st.write(points.tobytes())
+        os.replace(pf_store_tmp, self.pf_store)
+        logg.debug(f"Saved {len(index)} ligatures in {self.pf_store}")
+
+        self.pending = {}
+        self.load()
+
+    def pack_ligature_info(
+        self, ligature_info: LigatureInfo
+    ) -> Tuple[Dict, np.ndarray]:
+        """Build the index entry and the points of a LigatureInfo"""
+        all_glyph: Spline = [ligature_info.f_gly_chop, ligature_info.s_gly_chop]
+        all_glyph.extend(ligature_info.spline_seq_con)
+
+        points = np.array(
+            [[op.x, op.y, op.ori_deg] for glyph in all_glyph for op in glyph],
+            dtype="<f8",
+        ).reshape(-1, 3)
+
+        entry = {
+            "f_pf_name": ligature_info.f_pf_name,
+            "s_pf_name": ligature_info.s_pf_name,
+            "f_let_type": ligature_info.f_let_type,
+            "s_let_type": ligature_info.s_let_type,
+            "shift": float(ligature_info.shift),
+            "f_hash_sha1": ligature_info.f_hash_sha1,
+            "s_hash_sha1": ligature_info.s_hash_sha1,
+            "f_len": len(ligature_info.f_gly_chop),
+            "s_len": len(ligature_info.s_gly_chop),
+            "con_len": [len(glyph) for glyph in ligature_info.spline_seq_con],
+        }
+        return entry, points
@@ -1,26 +1,28 @@
 import argparse
 import logging
-import jsons  # type: ignore
 import matplotlib.pyplot as plt  # type: ignore
 
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from copy import deepcopy
+from pathlib import Path
+from timeit import default_timer as timer
 
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 from cursive_writer.utils.type_utils import ThickSpline
 
 from cursive_writer.ligature.letter_class import Letter
 from cursive_writer.ligature.ligature import align_letter_1
 from cursive_writer.ligature.ligature import align_letter_2
 from cursive_writer.ligature.ligature_info import LigatureInfo
+from cursive_writer.ligature.ligature_store import LigatureStore
 from cursive_writer.ligature.word_generator import generate_word
+from cursive_writer.spliner.spliner import compute_long_thick_contour
 from cursive_writer.spliner.spliner import compute_long_thick_spline
 from cursive_writer.utils.geometric_utils import find_thick_spline_bbox
 from cursive_writer.utils.geometric_utils import translate_spline_sequence
 from cursive_writer.utils.geometric_utils import translate_thick_spline
-from cursive_writer.utils.oriented_point import OrientedPoint
+from cursive_writer.utils.sample_cache import ThickSampleCache
 from cursive_writer.utils.setup import setup_logger
-from cursive_writer.utils.utils import serializer_oriented_point
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -39,6 +41,13 @@ def parse_arguments() -> argparse.Namespace:
         "-t", "--thickness", type=int, default=10, help="Thickness of the pen"
     )
 
+    parser.add_argument(
+        "-nc",
+        "--no_sample_cache",
+        action="store_true",
+        help="Do not use the on disk cache of thick samples",
+    )
+
     parser.add_argument(
         "-col",
         "--colors",
@@ -56,6 +65,18 @@ def parse_arguments() -> argparse.Namespace:
         choices=["anlm", "nlm", "lm", "nm", "m"],
     )
 
+    subparsers = parser.add_subparsers(dest="command")
+    parser_precompute = subparsers.add_parser(
+        "precompute", help="Precompute the ligatures for all the pairs of letters"
+    )
+    parser_precompute.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes, default to the number of CPUs",
+    )
+
     # last line to parse the args
     args = parser.parse_args()
     return args
@@ -78,7 +99,9 @@ def setup_env() -> argparse.Namespace:
     return args
 
 
-def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
+def load_letter_dict(
+    thickness: int, data_dir: Path, sample_cache: Optional[ThickSampleCache] = None
+) -> Dict[str, Letter]:
     """TODO: what is load_letter_dict doing?"""
     logg = logging.getLogger(f"c.{__name__}.load_letter_dict")
     logg.debug("Start load_letter_dict")
@@ -92,6 +115,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "a1_l_003.txt",
         pf_spline_high=data_dir / let / "a1_h_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "b"
     letters_info[let] = Letter(
@@ -101,6 +125,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "b0_l_000.txt",
         pf_spline_high=data_dir / let / "b0_h_001.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "c"
     letters_info[let] = Letter(
@@ -110,6 +135,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "c0_l_001.txt",
         pf_spline_high=data_dir / let / "c0_h_004.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "d"
     letters_info[let] = Letter(
@@ -119,6 +145,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "d0_l_000.txt",
         pf_spline_high=data_dir / let / "d0_h_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "e"
     letters_info[let] = Letter(
@@ -128,6 +155,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "e1_l_001.txt",
         pf_spline_high=data_dir / let / "e0_h_005.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "f"
     letters_info[let] = Letter(
@@ -137,6 +165,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "f0_l_003.txt",
         pf_spline_high=data_dir / let / "f0_h_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "g"
     letters_info[let] = Letter(
@@ -146,6 +175,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "g0_l_000.txt",
         pf_spline_high=data_dir / let / "g0_h_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "h"
     letters_info[let] = Letter(
@@ -155,6 +185,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "h1_l_000.txt",
         pf_spline_high=data_dir / let / "h1_h_004.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "i"
     letters_info[let] = Letter(
@@ -164,6 +195,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "i2_l_dot_000.txt",
         pf_spline_high=data_dir / let / "i2_h_dot_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "j"
     letters_info[let] = Letter(
@@ -173,6 +205,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "j0_l_dot_000.txt",
         pf_spline_high=data_dir / let / "j0_h_dot_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "k"
     letters_info[let] = Letter(
@@ -182,6 +215,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "k0_l_001.txt",
         pf_spline_high=data_dir / let / "k0_h_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "l"
     letters_info[let] = Letter(
@@ -191,6 +225,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "l0_l_000.txt",
         pf_spline_high=data_dir / let / "l0_h_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "m"
     letters_info[let] = Letter(
@@ -199,6 +234,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         right_type="low_up",
         pf_spline_alone=data_dir / let / "m2_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "n"
     letters_info[let] = Letter(
@@ -207,6 +243,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         right_type="low_up",
         pf_spline_alone=data_dir / let / "n2_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "o"
     letters_info[let] = Letter(
@@ -216,6 +253,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "o3_l_001.txt",
         pf_spline_high=data_dir / let / "o3_h_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "p"
     letters_info[let] = Letter(
@@ -225,6 +263,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "p1_l_000.txt",
         pf_spline_high=data_dir / let / "p1_h_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "q"
     letters_info[let] = Letter(
@@ -234,6 +273,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "q1_l_000.txt",
         pf_spline_high=data_dir / let / "q1_h_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "r"
     letters_info[let] = Letter(
@@ -243,6 +283,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "r0_l_006.txt",
         pf_spline_high=data_dir / let / "r0_h_001.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "s"
     letters_info[let] = Letter(
@@ -252,6 +293,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "s2_l_000.txt",
         pf_spline_high=data_dir / let / "s2_h_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "t"
     letters_info[let] = Letter(
@@ -261,6 +303,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "t0_l_000.txt",
         pf_spline_high=data_dir / let / "t0_h_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "u"
     letters_info[let] = Letter(
@@ -270,6 +313,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "u2_l_000.txt",
         pf_spline_high=data_dir / let / "u2_h_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "v"
     letters_info[let] = Letter(
@@ -278,6 +322,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         right_type="high_up",
         pf_spline_alone=data_dir / let / "v3_000.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "w"
     letters_info[let] = Letter(
@@ -286,6 +331,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         right_type="high_up",
         pf_spline_alone=data_dir / let / "w0_006.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "x"
     letters_info[let] = Letter(
@@ -294,6 +340,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         right_type="low_up",
         pf_spline_low=data_dir / let / "x0_l_007.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "y"
     letters_info[let] = Letter(
@@ -303,6 +350,7 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "y0_l_004.txt",
         pf_spline_high=data_dir / let / "y0_h_010.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     let = "z"
     letters_info[let] = Letter(
@@ -313,34 +361,28 @@ def load_letter_dict(thickness: int, data_dir: Path) -> Dict[str, Letter]:
         pf_spline_low=data_dir / let / "z0_l_002.txt",
         pf_spline_high=data_dir / let / "z0_h_002.txt",
         thickness=thickness,
+        sample_cache=sample_cache,
     )
     return letters_info
 
 
-def compute_letter_alignement(
-    f_let: Letter, s_let: Letter, x_stride: float, data_dir: Path, ligature_dir: Path
-) -> LigatureInfo:
-    """TODO: what is compute_letter_alignement doing?"""
-    logg = logging.getLogger(f"c.{__name__}.compute_letter_alignement")
-    logg.debug(f"Start compute_letter_alignement {f_let.letter} {s_let.letter}")
-
-    # pick the correct align strategy
+def pick_ligature_types(f_let: Letter, s_let: Letter) -> Tuple[str, str, str]:
+    """Pick the align strategy and the versions of the letters to join
 
+    Returns:
+    strategy: the align function to use
+    f_let_type: the version of the first letter
+    s_let_type: the version of the second letter
+    """
     # something like im or iv
     if f_let.right_type == "low_up" and s_let.left_type == "high_down":
         strategy = "align_letter_2"
 
         # the right side at the moment does not change, so get any one
         f_let_type = "alone"
-        f_spline_seq = f_let.get_spline_seq(f_let_type)
-        f_pf_name = f_let.get_pf(f_let_type).name
-        f_hash_sha1 = f_let.get_hash(f_let_type)
 
         # we request the high because this *is* a high letter
         s_let_type = "high"
-        s_spline_seq = s_let.get_spline_seq(s_let_type)
-        s_pf_name = s_let.get_pf(s_let_type).name
-        s_hash_sha1 = s_let.get_hash(s_let_type)
 
     # all other cases use align_letter_1
     else:
@@ -350,9 +392,6 @@ def compute_letter_alignement(
 
         # the right side at the moment does not change, so get any one
         f_let_type = "alone"
-        f_spline_seq = f_let.get_spline_seq(f_let_type)
-        f_pf_name = f_let.get_pf(f_let_type).name
-        f_hash_sha1 = f_let.get_hash(f_let_type)
 
         # look at the right of the first letter
         if f_let.right_type == "high_up":
@@ -362,35 +401,63 @@ def compute_letter_alignement(
             # use low version of the second letter
             s_let_type = "low"
 
-        # get relevant informations
-        s_spline_seq = s_let.get_spline_seq(s_let_type)
-        s_pf_name = s_let.get_pf(s_let_type).name
-        s_hash_sha1 = s_let.get_hash(s_let_type)
+    return strategy, f_let_type, s_let_type
+
+
+def load_letter_alignement(
+    f_let: Letter, s_let: Letter, ligature_store: LigatureStore
+) -> Optional[LigatureInfo]:
+    """Load the saved LigatureInfo for the pair, if it is still valid
+
+    The ligature is valid if it was built with the same versions of the letters,
+    and the spline files have the same hash
+    """
+    logg = logging.getLogger(f"c.{__name__}.load_letter_alignement")
+    # logg.debug(f"Start load_letter_alignement")
+
+    _, f_let_type, s_let_type = pick_ligature_types(f_let, s_let)
+    f_pf_name = f_let.get_pf(f_let_type).name
+    f_hash_sha1 = f_let.get_hash(f_let_type)
+    s_pf_name = s_let.get_pf(s_let_type).name
+    s_hash_sha1 = s_let.get_hash(s_let_type)
 
     # load, if available, the ligature for this
-    ligature_pf = ligature_dir / f"{f_let.letter}{s_let.letter}.txt"
-    if ligature_pf.exists():
-        # load the saved LigatureInfo
-        ci_load = jsons.loads(ligature_pf.read_text(), LigatureInfo)
-
-        # decide if the ligature loaded is the same
-        # logg.debug(f"ci_load: {ci_load!r}")
-        logg.debug(f"ci_load: {ci_load}")
-        if f_pf_name != ci_load.f_pf_name or s_pf_name != ci_load.s_pf_name:
-            logg.debug("The names in the loaded info are different than the current")
-            equals = False
-        elif f_let_type != ci_load.f_let_type or s_let_type != ci_load.s_let_type:
-            logg.debug("The letter types in the loaded info are different")
-            equals = False
-        elif f_hash_sha1 != ci_load.f_hash_sha1 or s_hash_sha1 != ci_load.s_hash_sha1:
-            logg.debug("The hash_sha1 in the loaded info are different")
-            equals = False
-        else:
-            logg.debug("The ligature is valid!")
-            equals = True
+    ci_load = ligature_store.get(f"{f_let.letter}{s_let.letter}")
+    if ci_load is None:
+        return None
+
+    # decide if the ligature loaded is the same
+    # logg.debug(f"ci_load: {ci_load!r}")
+    logg.debug(f"ci_load: {ci_load}")
+    if f_pf_name != ci_load.f_pf_name or s_pf_name != ci_load.s_pf_name:
+        logg.debug("The names in the loaded info are different than the current")
+        return None
+    elif f_let_type != ci_load.f_let_type or s_let_type != ci_load.s_let_type:
+        logg.debug("The letter types in the loaded info are different")
+        return None
+    elif f_hash_sha1 != ci_load.f_hash_sha1 or s_hash_sha1 != ci_load.s_hash_sha1:
+        logg.debug("The hash_sha1 in the loaded info are different")
+        return None
+
+    logg.debug("The ligature is valid!")
+    return ci_load
+
+
+def align_letter_pair(f_let: Letter, s_let: Letter, x_stride: float) -> LigatureInfo:
+    """Compute the LigatureInfo to join the two letters"""
+    logg = logging.getLogger(f"c.{__name__}.align_letter_pair")
+    logg.debug(f"Start align_letter_pair {f_let.letter} {s_let.letter}")
+
+    # pick the correct align strategy
+    strategy, f_let_type, s_let_type = pick_ligature_types(f_let, s_let)
 
-        if equals:
-            return ci_load
+    # get relevant informations
+    f_spline_seq = f_let.get_spline_seq(f_let_type)
+    f_pf_name = f_let.get_pf(f_let_type).name
+    f_hash_sha1 = f_let.get_hash(f_let_type)
+    s_spline_seq = s_let.get_spline_seq(s_let_type)
+    s_pf_name = s_let.get_pf(s_let_type).name
+    s_hash_sha1 = s_let.get_hash(s_let_type)
 
     if strategy == "align_letter_2":
         # load and compute
@@ -424,23 +491,103 @@ def compute_letter_alignement(
     # logg.debug(f"con_info: {con_info!r}")
     logg.debug(f"con_info: {con_info}")
 
-    # save the LigatureInfo
-    jsons.set_serializer(serializer_oriented_point, OrientedPoint)
-    ligature_info_encoded = jsons.dumps(con_info, indent=4)
-    logg.debug(f"\nligature_info_encoded: {ligature_info_encoded}")
+    return con_info
 
-    with ligature_pf.open("w") as f_li:
-        f_li.write(ligature_info_encoded)
+
+def compute_letter_alignement(
+    f_let: Letter,
+    s_let: Letter,
+    x_stride: float,
+    data_dir: Path,
+    ligature_store: LigatureStore,
+) -> LigatureInfo:
+    """TODO: what is compute_letter_alignement doing?"""
+    logg = logging.getLogger(f"c.{__name__}.compute_letter_alignement")
+    logg.debug(f"Start compute_letter_alignement {f_let.letter} {s_let.letter}")
+
+    # load, if available, the ligature for this
+    ci_load = load_letter_alignement(f_let, s_let, ligature_store)
+    if ci_load is not None:
+        return ci_load
+
+    con_info = align_letter_pair(f_let, s_let, x_stride)
+
+    # keep the LigatureInfo, the caller saves the store
+    ligature_store.add(f"{f_let.letter}{s_let.letter}", con_info)
 
     return con_info
 
 
+def precompute_ligature_info(
+    letters_info: Dict[str, Letter],
+    x_stride: float,
+    data_dir: Path,
+    ligature_store: LigatureStore,
+    max_workers: Optional[int] = None,
+    save_every: int = 16,
+) -> Dict[str, LigatureInfo]:
+    """Compute the ligatures for all the pairs of letters, in a pool of processes
+
+    The pairs that already have a valid ligature saved are skipped. The workers
+    only compute the ligatures, they are added to the store here and saved every
+    save_every pairs, so an interrupted run resumes where it stopped
+    """
+    logg = logging.getLogger(f"c.{__name__}.precompute_ligature_info")
+    logg.debug("Start precompute_ligature_info")
+
+    ligature_info: Dict[str, LigatureInfo] = {}
+    todo_pairs = []
+    for f_letter in letters_info:
+        for s_letter in letters_info:
+            pair = f"{f_letter}{s_letter}"
+            ci_load = load_letter_alignement(
+                letters_info[f_letter], letters_info[s_letter], ligature_store
+            )
+            if ci_load is None:
+                todo_pairs.append(pair)
+            else:
+                ligature_info[pair] = ci_load
+
+    num_todo = len(todo_pairs)
+    logg.info(f"Valid ligatures: {len(ligature_info)}, to compute: {num_todo}")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        future_to_pair = {}
+        for pair in todo_pairs:
+            future = executor.submit(
+                align_letter_pair,
+                letters_info[pair[0]],
+                letters_info[pair[1]],
+                x_stride,
+            )
+            future_to_pair[future] = pair
+
+        try:
+            for i_done, future in enumerate(as_completed(future_to_pair)):
+                pair = future_to_pair[future]
+                try:
+                    ligature_info[pair] = future.result()
+                except Exception as e:
+                    logg.warn(f"Unable to compute the ligature {pair}: {e}")
+                    continue
+                logg.info(f"Computed ligature {pair} ({i_done + 1}/{num_todo})")
+
+                ligature_store.add(pair, ligature_info[pair])
+                if (i_done + 1) % save_every == 0:
+                    ligature_store.save()
+
+        finally:
+            ligature_store.save()
+
+    return ligature_info
+
+
 def fill_ligature_info(
     input_str: str,
     letters_info: Dict[str, Letter],
     x_stride: float,
     data_dir: Path,
-    ligature_dir: Path,
+    ligature_store: LigatureStore,
     thickness: int,
 ) -> Tuple[Dict[str, LigatureInfo], Dict[str, ThickSpline]]:
     """TODO: what is fill_ligature_info doing?"""
@@ -461,35 +608,56 @@ def fill_ligature_info(
             f_let = letters_info[pair[0]]
             s_let = letters_info[pair[1]]
             ligature_info[pair] = compute_letter_alignement(
-                f_let, s_let, x_stride, data_dir, ligature_dir
+                f_let, s_let, x_stride, data_dir, ligature_store
             )
         else:
             logg.debug("Pair already computed")
 
-        # link all the spline info
-        full_spline_con = [ligature_info[pair].f_gly_chop]
-        full_spline_con.extend(ligature_info[pair].spline_seq_con)
-        # shift the second glyph
-        s_gly_chop = deepcopy(ligature_info[pair].s_gly_chop)
-        shift = ligature_info[pair].shift
-        translate_spline_sequence([s_gly_chop], shift, 0)
-        full_spline_con.append(s_gly_chop)
-
         # precompute the full thick ligature information
-        full_thick_con = compute_long_thick_spline(full_spline_con, thickness)
-        thick_con_info[pair] = full_thick_con
+        thick_con_info[pair] = compute_thick_ligature(ligature_info[pair], thickness)
+
+    # write the new ligatures once
+    ligature_store.save()
 
     return ligature_info, thick_con_info
 
 
+def compute_thick_ligature(
+    con_info: LigatureInfo, thickness: int, contour: bool = False
+) -> ThickSpline:
+    """Compute the thick samples of the chopped glyphs and the connection
+
+    If contour is set, compute the outlines of the segments instead
+    """
+    # logg = logging.getLogger(f"c.{__name__}.compute_thick_ligature")
+    # logg.debug(f"Start compute_thick_ligature")
+
+    # link all the spline info
+    full_spline_con = [con_info.f_gly_chop]
+    full_spline_con.extend(con_info.spline_seq_con)
+    # shift the second glyph
+    s_gly_chop = deepcopy(con_info.s_gly_chop)
+    translate_spline_sequence([s_gly_chop], con_info.shift, 0)
+    full_spline_con.append(s_gly_chop)
+
+    if contour:
+        return compute_long_thick_contour(full_spline_con, thickness)
+    return compute_long_thick_spline(full_spline_con, thickness)
+
+
 def build_word(
     input_str: str,
     letters_info: Dict[str, Letter],
     ligature_info: Dict[str, LigatureInfo],
     thick_con_info: Dict[str, ThickSpline],
     thickness: int,
+    contour: bool = False,
 ) -> ThickSpline:
-    """TODO: what is build_word doing?"""
+    """TODO: what is build_word doing?
+
+    If contour is set, the word is built with the outlines of the letters, and
+    thick_con_info must have the outlines of the ligatures
+    """
     logg = logging.getLogger(f"c.{__name__}.build_word")
     logg.debug(f"Start build_word {input_str}")
 
@@ -502,10 +670,14 @@ def build_word(
     # the first letter of the word
     first_letter = input_str[0]
 
+    # use the samples or the outlines of the letters
+    if contour:
+        get_thick = Letter.get_thick_contour
+    else:
+        get_thick = Letter.get_thick_samples
+
     # save the first thick letter
-    word_thick_spline.extend(
-        letters_info[first_letter].get_thick_samples("alone", thickness)
-    )
+    word_thick_spline.extend(get_thick(letters_info[first_letter], "alone", thickness))
 
     for i in range(len(input_str) - 1):
         # get the current pair
@@ -529,9 +701,7 @@ def build_word(
 
         # add the second letter
         # extract the thick spline of the correct type of the second letter to use
-        s_thick_spline = s_let.get_thick_samples(
-            ligature_info[pair].s_let_type, thickness
-        )
+        s_thick_spline = get_thick(s_let, ligature_info[pair].s_let_type, thickness)
         # translate it
         s_tra_thick_spline = translate_thick_spline(s_thick_spline, acc_shift, 0)
         # add it to the list of glyphs, without the first glyph
@@ -592,10 +762,16 @@ def run_word_builder(args: argparse.Namespace) -> None:
     logg.debug(f"ligature_dir {ligature_dir}")
     if not ligature_dir.exists():
         ligature_dir.mkdir(parents=True)
+    ligature_store = LigatureStore(ligature_dir / "ligature_store.bin")
 
     thickness = args.thickness if args.thickness > 0 else 1
 
-    letters_info = load_letter_dict(thickness, data_dir)
+    if args.no_sample_cache:
+        sample_cache = None
+    else:
+        sample_cache = ThickSampleCache(main_dir.parent / "thick_samples")
+
+    letters_info = load_letter_dict(thickness, data_dir, sample_cache)
     logg.debug("letters_info:")
     for letter in letters_info:
         logg.debug(f"{letters_info[letter]}")
@@ -660,7 +836,7 @@ def run_word_builder(args: argparse.Namespace) -> None:
 
         # the information on how to link the letters
         ligature_info, thick_con_info = fill_ligature_info(
-            input_str, letters_info, x_stride, data_dir, ligature_dir, thickness
+            input_str, letters_info, x_stride, data_dir, ligature_store, thickness
         )
 
         # build the word
@@ -688,6 +864,39 @@ def run_word_builder(args: argparse.Namespace) -> None:
             new_input_str = input(recap)
 
 
+def run_precompute(args: argparse.Namespace) -> None:
+    """Precompute the ligatures for all the pairs of letters"""
+    logg = logging.getLogger(f"c.{__name__}.run_precompute")
+    logg.debug("Starting run_precompute")
+
+    main_dir = Path(__file__).resolve().parent
+    data_dir = main_dir.parent / "data"
+    logg.debug(f"data_dir: {data_dir}")
+    ligature_dir = main_dir.parent / "connections"
+    logg.debug(f"ligature_dir {ligature_dir}")
+    if not ligature_dir.exists():
+        ligature_dir.mkdir(parents=True)
+    ligature_store = LigatureStore(ligature_dir / "ligature_store.bin")
+
+    thickness = args.thickness if args.thickness > 0 else 1
+    letters_info = load_letter_dict(thickness, data_dir)
+
+    # the sampling precision when shifting
+    x_stride: float = 1
+
+    precompute_start = timer()
+    ligature_info = precompute_ligature_info(
+        letters_info, x_stride, data_dir, ligature_store, args.jobs
+    )
+    precompute_end = timer()
+    recap = f"Ligatures available: {len(ligature_info)}"
+    recap += f" in {precompute_end - precompute_start:.2f}s"
+    logg.info(recap)
+
+
 if __name__ == "__main__":
     args = setup_env()
-    run_word_builder(args)
+    if args.command == "precompute":
+        run_precompute(args)
+    else:
+        run_word_builder(args)
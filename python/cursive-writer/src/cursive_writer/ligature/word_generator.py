@@ -6,7 +6,7 @@ from random import randint
 
 from cursive_writer.utils.setup import setup_logger
 
-from typing import Iterable, List
+from typing import Iterable, Iterator, List
 from pathlib import Path
 
 
@@ -15,6 +15,13 @@ def load_words(word_file: Path) -> List[str]:
     return valid_words
 
 
+def iterate_words(word_file: Path) -> Iterator[str]:
+    """Yield the words in the file one at a time, without loading all of it"""
+    with word_file.open() as f_words:
+        for line in f_words:
+            yield from line.split()
+
+
 def generate_word(let_available: Iterable[str], word_file: Path) -> str:
     """TODO: what is generate_word doing?"""
     logg = logging.getLogger(f"c.{__name__}.generate_word")
@@ -0,0 +1,425 @@
+import argparse
+import base64
+import io
+import json
+import logging
+import numpy as np  # type: ignore
+import sys
+
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from PIL import Image  # type: ignore
+from timeit import default_timer as timer
+from urllib.parse import parse_qs, urlparse
+
+from typing import Dict, IO, List, Set, Tuple
+from cursive_writer.utils.type_utils import ThickSpline
+
+from cursive_writer.ligature.letter_class import Letter
+from cursive_writer.ligature.ligature_info import LigatureInfo
+from cursive_writer.ligature.ligature_store import LigatureStore
+from cursive_writer.ligature.word_builder import build_word
+from cursive_writer.ligature.word_builder import compute_letter_alignement
+from cursive_writer.ligature.word_builder import compute_thick_ligature
+from cursive_writer.ligature.word_builder import load_letter_dict
+from cursive_writer.utils.rasterizer import rasterize_thick_contour
+from cursive_writer.utils.sample_cache import ThickSampleCache
+from cursive_writer.utils.setup import setup_logger
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Setup CLI interface"""
+    parser = argparse.ArgumentParser(
+        description="Render words on request, keeping letters and ligatures in memory"
+    )
+
+    parser.add_argument(
+        "-t", "--thickness", type=int, default=10, help="Default thickness of the pen"
+    )
+
+    parser.add_argument(
+        "-p",
+        "--port",
+        type=int,
+        default=0,
+        help="Serve on http://localhost:PORT, if 0 read JSON lines from stdin",
+    )
+
+    parser.add_argument(
+        "-mw",
+        "--max_words",
+        type=int,
+        default=256,
+        help="How many built words to keep in memory",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        help="Reload the letters whose spline files changed before each request",
+    )
+
+    parser.add_argument(
+        "-llt",
+        "--log_level_type",
+        type=str,
+        default="m",
+        help="Message format for the debugging logger",
+        choices=["anlm", "nlm", "lm", "nm", "m"],
+    )
+
+    # last line to parse the args
+    args = parser.parse_args()
+    return args
+
+
+def setup_env() -> argparse.Namespace:
+    args = parse_arguments()
+
+    # the rendered words go to stdout, keep the log quiet
+    setup_logger("INFO", args.log_level_type)
+
+    recap = "python3 word_renderer.py"
+    for a, v in args._get_kwargs():
+        recap += f" --{a} {v}"
+
+    logmain = logging.getLogger(f"c.{__name__}.setup_env")
+    logmain.info(recap)
+
+    return args
+
+
+class WordRenderer:
+    def __init__(
+        self,
+        letters_info: Dict[str, Letter],
+        ligature_store: LigatureStore,
+        data_dir: Path,
+        x_stride: float = 1,
+        max_words: int = 0,
+        save_ligatures: bool = True,
+    ) -> None:
+        """Render words, keeping all the letter and ligature info in memory
+
+        The LigatureInfo and the thick ligatures, for each thickness, are computed
+        the first time a pair is requested and then reused. The thick samples and
+        outlines of the letters are cached in the Letter. The last max_words built
+        words are kept as well.
+
+        Everything depends on the spline files of the letters: after a file is
+        edited, refresh reloads it and drops only the pairs and the words that
+        used it, so they are rebuilt on the next request.
+
+        The new ligatures are saved in ligature_store after each word, unless
+        save_ligatures is False: the store rewrites the whole file, so only one
+        process must save it.
+        """
+        # logg = logging.getLogger(f"c.{__name__}.__init__")
+        # logg.debug(f"Start __init__")
+
+        self.letters_info = letters_info
+        self.ligature_store = ligature_store
+        self.data_dir = data_dir
+        self.x_stride = x_stride
+        self.max_words = max_words
+        self.save_ligatures = save_ligatures
+
+        self.ligature_info: Dict[str, LigatureInfo] = {}
+        self.thick_con_info: Dict[Tuple[str, int, bool], ThickSpline] = {}
+
+        # the built words, and the splines each one depends on
+        self.words: OrderedDict[Tuple[str, int, bool], ThickSpline] = OrderedDict()
+        self.word_deps: Dict[Tuple[str, int, bool], Set[Tuple[str, str]]] = {}
+
+    def filter_word(self, word: str) -> str:
+        """Remove the letters that are not available"""
+        return "".join(ch for ch in word if ch in self.letters_info)
+
+    def get_ligature_info(self, pair: str) -> LigatureInfo:
+        """Get the LigatureInfo of the pair, compute it if needed"""
+        if pair not in self.ligature_info:
+            self.ligature_info[pair] = compute_letter_alignement(
+                self.letters_info[pair[0]],
+                self.letters_info[pair[1]],
+                self.x_stride,
+                self.data_dir,
+                self.ligature_store,
+            )
+        return self.ligature_info[pair]
+
+    def get_thick_con(
+        self, pair: str, thickness: int, contour: bool = False
+    ) -> ThickSpline:
+        """Get the thick ligature of the pair, compute it if needed"""
+        key = (pair, thickness, contour)
+        if key not in self.thick_con_info:
+            con_info = self.get_ligature_info(pair)
+            thick_con = compute_thick_ligature(con_info, thickness, contour)
+            self.thick_con_info[key] = thick_con
+        return self.thick_con_info[key]
+
+    def render(self, word: str, thickness: int, contour: bool = False) -> ThickSpline:
+        """Build the thick spline of the word
+
+        If contour is set, build the outlines of the segments instead of the
+        samples inside them, to draw them with rasterize_thick_contour
+        """
+        # logg = logging.getLogger(f"c.{__name__}.render")
+        # logg.debug(f"Start render {word}")
+
+        word = self.filter_word(word)
+        if len(word) == 0:
+            raise ValueError("No known letters in the word")
+
+        key = (word, thickness, contour)
+        if key in self.words:
+            self.words.move_to_end(key)
+            return self.words[key]
+
+        ligature_info: Dict[str, LigatureInfo] = {}
+        thick_con_info: Dict[str, ThickSpline] = {}
+        for i in range(len(word) - 1):
+            pair = word[i : i + 2]
+            ligature_info[pair] = self.get_ligature_info(pair)
+            thick_con_info[pair] = self.get_thick_con(pair, thickness, contour)
+
+        # write the new ligatures once per word
+        if self.save_ligatures:
+            self.ligature_store.save()
+
+        word_thick_spline = build_word(
+            word, self.letters_info, ligature_info, thick_con_info, thickness, contour
+        )
+
+        if self.max_words > 0:
+            self.words[key] = word_thick_spline
+            self.word_deps[key] = self.get_word_deps(word)
+            if len(self.words) > self.max_words:
+                old_key, _ = self.words.popitem(last=False)
+                del self.word_deps[old_key]
+
+        return word_thick_spline
+
+    def get_pair_deps(self, pair: str) -> Set[Tuple[str, str]]:
+        """The splines used by the ligature of the pair, as (letter, type)"""
+        con_info = self.ligature_info[pair]
+        f_let = self.letters_info[pair[0]]
+        s_let = self.letters_info[pair[1]]
+        return {
+            (pair[0], f_let.get_valid_type(con_info.f_let_type)),
+            (pair[1], s_let.get_valid_type(con_info.s_let_type)),
+        }
+
+    def get_word_deps(self, word: str) -> Set[Tuple[str, str]]:
+        """The splines used to build the word, as (letter, type)
+
+        The first letter is used alone, the others with the type picked by the
+        ligature, so the word depends exactly on the splines of its pairs
+        """
+        first_let = self.letters_info[word[0]]
+        word_deps = {(word[0], first_let.get_valid_type("alone"))}
+        for i in range(len(word) - 1):
+            word_deps |= self.get_pair_deps(word[i : i + 2])
+        return word_deps
+
+    def refresh(self) -> Set[Tuple[str, str]]:
+        """Reload the splines whose files changed, drop what depended on them
+
+        Returns the changed splines, as (letter, type)
+        """
+        changed: Set[Tuple[str, str]] = set()
+        for letter, let_info in self.letters_info.items():
+            for which, pf_spline in let_info.pf_spline.items():
+                if pf_spline is None:
+                    continue
+                if let_info.reload_spline_info(which):
+                    changed.add((letter, which))
+
+        if len(changed) > 0:
+            self.invalidate(changed)
+        return changed
+
+    def invalidate(self, changed: Set[Tuple[str, str]]) -> None:
+        """Drop the ligatures and the words that use the changed splines
+
+        The changed splines must already be reloaded in the Letter
+        """
+        logg = logging.getLogger(f"c.{__name__}.invalidate")
+
+        old_pairs: List[str] = [
+            pair
+            for pair in self.ligature_info
+            if not self.get_pair_deps(pair).isdisjoint(changed)
+        ]
+        for pair in old_pairs:
+            del self.ligature_info[pair]
+        for key in [key for key in self.thick_con_info if key[0] in old_pairs]:
+            del self.thick_con_info[key]
+
+        old_words = [
+            key for key, deps in self.word_deps.items() if not deps.isdisjoint(changed)
+        ]
+        for key in old_words:
+            del self.words[key]
+            del self.word_deps[key]
+
+        logg.info(f"Dropped {len(old_pairs)} ligatures and {len(old_words)} words")
+
+
+def encode_png(image: np.ndarray) -> bytes:
+    """Encode the image as PNG"""
+    png_buffer = io.BytesIO()
+    Image.fromarray(image).save(png_buffer, format="PNG")
+    return png_buffer.getvalue()
+
+
+def handle_request(renderer: WordRenderer, request: Dict, thickness: int) -> Dict:
+    """Render the word in the request
+
+    The request has the keys
+        word: the word to render
+        thickness: optional thickness of the pen
+        format: "contour" (default) for the samples of each glyph, "png" for a
+            base64 encoded image
+    """
+    word = request["word"]
+    thickness = int(request.get("thickness", thickness))
+    out_format = request.get("format", "contour")
+
+    render_start = timer()
+    word_thick_spline = renderer.render(word, thickness, out_format == "png")
+
+    response: Dict = {"word": renderer.filter_word(word), "thickness": thickness}
+    if out_format == "png":
+        image = rasterize_thick_contour(word_thick_spline)
+        response["png"] = base64.b64encode(encode_png(image)).decode()
+    elif out_format == "contour":
+        response["contour"] = [
+            [[segment[0].tolist(), segment[1].tolist()] for segment in thick_glyph]
+            for thick_glyph in word_thick_spline
+        ]
+    else:
+        raise ValueError(f"Unknown format {out_format}")
+
+    render_end = timer()
+    response["time"] = render_end - render_start
+    return response
+
+
+def serve_jsonl(
+    renderer: WordRenderer,
+    thickness: int,
+    f_in: IO[str],
+    f_out: IO[str],
+    watch: bool = False,
+) -> None:
+    """Read one JSON request per line from f_in, write one response per line
+
+    If watch is set, the edited letters are reloaded before each request
+    """
+    logg = logging.getLogger(f"c.{__name__}.serve_jsonl")
+    logg.info("Waiting for requests")
+
+    for line in f_in:
+        line = line.strip()
+        if len(line) == 0:
+            continue
+        try:
+            if watch:
+                renderer.refresh()
+            response = handle_request(renderer, json.loads(line), thickness)
+        except Exception as e:
+            logg.warn(f"Unable to handle {line}: {e!r}")
+            response = {"error": repr(e)}
+        f_out.write(json.dumps(response) + "\n")
+        f_out.flush()
+
+
+def serve_http(
+    renderer: WordRenderer, thickness: int, port: int, watch: bool = False
+) -> None:
+    """Serve GET /render?word=...&thickness=...&format=... on localhost
+
+    format=png returns the image directly, the other formats return JSON.
+    If watch is set, the edited letters are reloaded before each request
+    """
+    logg = logging.getLogger(f"c.{__name__}.serve_http")
+
+    class RenderHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/render":
+                self.send_error(404)
+                return
+            query = parse_qs(url.query)
+            request = {k: v[0] for k, v in query.items()}
+            if "word" not in request:
+                self.send_error(400, "Missing word")
+                return
+
+            try:
+                if watch:
+                    renderer.refresh()
+                if request.get("format") == "png":
+                    thick = int(request.get("thickness", thickness))
+                    word_contour = renderer.render(request["word"], thick, True)
+                    body = encode_png(rasterize_thick_contour(word_contour))
+                    content_type = "image/png"
+                else:
+                    response = handle_request(renderer, request, thickness)
+                    body = json.dumps(response).encode()
+                    content_type = "application/json"
+            except Exception as e:
+                logg.warn(f"Unable to handle {self.path}: {e!r}")
+                self.send_error(400, repr(e))
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logg.debug(format % args)
+
+    server = HTTPServer(("localhost", port), RenderHandler)
+    logg.info(f"Serving on http://localhost:{port}/render?word=")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+def run_word_renderer(args: argparse.Namespace) -> None:
+    """Load the letters once, then render words until the input ends"""
+    logg = logging.getLogger(f"c.{__name__}.run_word_renderer")
+    logg.debug("Starting run_word_renderer")
+
+    main_dir = Path(__file__).resolve().parent
+    data_dir = main_dir.parent / "data"
+    ligature_dir = main_dir.parent / "connections"
+    if not ligature_dir.exists():
+        ligature_dir.mkdir(parents=True)
+    ligature_store = LigatureStore(ligature_dir / "ligature_store.bin")
+    sample_cache = ThickSampleCache(main_dir.parent / "thick_samples")
+
+    thickness = args.thickness if args.thickness > 0 else 1
+
+    letters_info = load_letter_dict(thickness, data_dir, sample_cache)
+    renderer = WordRenderer(
+        letters_info, ligature_store, data_dir, max_words=args.max_words
+    )
+
+    if args.port > 0:
+        serve_http(renderer, thickness, args.port, args.watch)
+    else:
+        serve_jsonl(renderer, thickness, sys.stdin, sys.stdout, args.watch)
+
+
+if __name__ == "__main__":
+    args = setup_env()
+    run_word_renderer(args)
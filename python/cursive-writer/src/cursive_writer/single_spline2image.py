@@ -3,9 +3,12 @@ import logging
 import matplotlib.pyplot as plt  # type: ignore
 
 from pathlib import Path
+from PIL import Image  # type: ignore
 
+from cursive_writer.spliner.spliner import compute_long_thick_contour
 from cursive_writer.spliner.spliner import compute_long_thick_spline
 from cursive_writer.utils.geometric_utils import find_spline_sequence_bbox
+from cursive_writer.utils.rasterizer import rasterize_thick_contour
 from cursive_writer.utils.setup import setup_logger
 from cursive_writer.utils.utils import load_spline
 
@@ -46,6 +49,14 @@ def parse_arguments():
         help="Color to use, set 'cycle' to use a different one in each glyph",
     )
 
+    parser.add_argument(
+        "-o",
+        "--out_dir",
+        type=str,
+        default="",
+        help="Save the letters as PNG in this folder, instead of plotting them",
+    )
+
     # last line to parse the args
     args = parser.parse_args()
     return args
@@ -105,7 +116,20 @@ def plot_letter(pf_input_spline, thickness, color="k"):
         i += 1
 
 
-def plot_good_letters(data_dir, thickness, colors, prefixes=None):
+def save_letter_image(pf_input_spline, thickness, out_dir):
+    """Rasterize the outlines of the letter and save them as PNG, no plotting"""
+    logg = logging.getLogger(f"c.{__name__}.save_letter_image")
+
+    spline_sequence = load_spline(pf_input_spline)
+    spline_contours = compute_long_thick_contour(spline_sequence, thickness)
+    image = rasterize_thick_contour(spline_contours)
+
+    pf_out = out_dir / f"{pf_input_spline.stem}.png"
+    Image.fromarray(image).save(pf_out)
+    logg.debug(f"Saved {pf_out}")
+
+
+def plot_good_letters(data_dir, thickness, colors, prefixes=None, out_dir=None):
     """"""
     logg = logging.getLogger(f"c.{__name__}.plot_good_letters")
     logg.debug(f"Starting plot_good_letters")
@@ -137,7 +161,10 @@ def plot_good_letters(data_dir, thickness, colors, prefixes=None):
         first_char = letter_name[0]
         if prefixes is None or first_char in prefixes:
             pf_input_spline = data_dir / first_char / letter_name
-            plot_letter(pf_input_spline, thickness, colors)
+            if out_dir is None:
+                plot_letter(pf_input_spline, thickness, colors)
+            else:
+                save_letter_image(pf_input_spline, thickness, out_dir)
 
 
 def run_single_spline2image(args):
@@ -159,20 +186,30 @@ def run_single_spline2image(args):
 
     logg.debug(f"args.which_plot: {args.which_plot}")
 
+    out_dir = None
+    if args.out_dir != "":
+        out_dir = Path(args.out_dir)
+        if not out_dir.exists():
+            out_dir.mkdir(parents=True)
+
     if args.which_plot == "single":
         path_input = args.path_input
         first_char = path_input[0]
         pf_input_spline = data_dir / first_char / path_input
         logg.debug(f"pf_input_spline: {pf_input_spline}")
 
-        plot_letter(pf_input_spline, thickness, args.colors)
+        if out_dir is None:
+            plot_letter(pf_input_spline, thickness, args.colors)
+        else:
+            save_letter_image(pf_input_spline, thickness, out_dir)
     elif args.which_plot == "all":
-        plot_good_letters(data_dir, thickness, args.colors)
+        plot_good_letters(data_dir, thickness, args.colors, out_dir=out_dir)
     else:
         # send the which_plot args as string of prefixes, only plot the letters sent
-        plot_good_letters(data_dir, thickness, args.colors, args.which_plot)
+        plot_good_letters(data_dir, thickness, args.colors, args.which_plot, out_dir)
 
-    plt.show()
+    if out_dir is None:
+        plt.show()
 
 
 if __name__ == "__main__":
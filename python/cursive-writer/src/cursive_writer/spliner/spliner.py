@@ -10,11 +10,13 @@ from cursive_writer.utils.geometric_utils import rotate_derive_coeff
 from cursive_writer.utils.geometric_utils import rotate_point
 from cursive_writer.utils.geometric_utils import sample_parametric_aligned
 from cursive_writer.utils.oriented_point import OrientedPoint
+from cursive_writer.utils.oriented_point_array import wrap_ori_deg
 from cursive_writer.utils.utils import print_coeff
 
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
-from cursive_writer.utils.type_utils import DArray, Glyph, Spline, ThickSpline
+from cursive_writer.utils.type_utils import DArray, Glyph, Spline
+from cursive_writer.utils.type_utils import ThickSegment, ThickSpline
 
 
 def translate_points_to_origin(
@@ -159,9 +161,12 @@ def linspace_segment_points(
 
 
 def sample_nat_segment_points(
-    x_start: float, x_end: float, coeff: DArray
+    x_start: float, x_end: float, coeff: DArray, x_step: float = 1
 ) -> Tuple[np.ndarray, np.ndarray]:
-    """Sample a poly_model in the [x_start, x_end] range on natural numbers"""
+    """Sample a poly_model in the [x_start, x_end] range on natural numbers
+
+    With x_step != 1 sample on the multiples of x_step instead
+    """
     logg = logging.getLogger(f"c.{__name__}.sample_nat_segment_points")
     # logg.setLevel("TRACE")
     logg.log(5, f"Starting sample_nat_segment_points")
@@ -170,12 +175,14 @@ def sample_nat_segment_points(
         x_start, x_end = x_end, x_start
 
     # align x_start and x_end to grid step
-    x_start_align = math.ceil(x_start)
-    x_end_align = math.floor(x_end)
+    x_start_align = math.ceil(x_start / x_step)
+    x_end_align = math.floor(x_end / x_step)
     logg.log(5, f"x_start_align: {x_start_align} x_end_align: {x_end_align}")
 
     # sample from x_start_align to x_end_align included
     x_sample = np.arange(x_start_align, x_end_align + 1)
+    if x_step != 1:
+        x_sample = x_sample * x_step
     logg.log(5, f"x_sample.shape: {x_sample.shape}")
     #  logg.log(5, f"x_sample: {x_sample}")
 
@@ -184,12 +191,15 @@ def sample_nat_segment_points(
 
 
 def compute_cubic_segment(
-    p0: OrientedPoint, p1: OrientedPoint, ax: Optional[plt.Axes] = None
+    p0: OrientedPoint,
+    p1: OrientedPoint,
+    ax: Optional[plt.Axes] = None,
+    x_step: float = 1,
 ) -> Tuple[np.ndarray, np.ndarray]:
     """Compute the cubic segment between two points
 
     * translate to the origin and rotate the points to have both on the x axis
-    * compute the spline
+    * compute the spline, sampled every x_step along the rotated x axis
     * rotate and translate to original position
     """
     logg = logging.getLogger(f"c.{__name__}.compute_cubic_segment")
@@ -206,7 +216,7 @@ def compute_cubic_segment(
 
     # compute the segment points
     coeff = fit_cubic(rot_p0, rot_p1)
-    x_sample, y_segment = sample_nat_segment_points(rot_p0.x, rot_p1.x, coeff)
+    x_sample, y_segment = sample_nat_segment_points(rot_p0.x, rot_p1.x, coeff, x_step)
 
     # rototranslate points to the original position
     rototran_x, rototran_y = rototranslate_points(
@@ -539,6 +549,485 @@ def compute_thick_spline(
     return rototran_x, rototran_y
 
 
+def isclose_batch(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Element wise math.isclose with the default tolerances"""
+    return np.abs(a - b) <= 1e-9 * np.maximum(np.abs(a), np.abs(b))
+
+
+def fit_cubic_batch(
+    x0: np.ndarray,
+    y0: np.ndarray,
+    y0p: np.ndarray,
+    x1: np.ndarray,
+    y1: np.ndarray,
+    y1p: np.ndarray,
+) -> np.ndarray:
+    """Find the coefficients for N cubic curves passing through N pairs of points
+
+    Same system as fit_cubic, solved for all the pairs in a single call
+
+    Returns a (N, 4) array, each row is [a, b, c, d] for
+
+        y = a*x^3 + b*x^2 + c*x + d
+    """
+    num = x0.shape[0]
+    A = np.empty((num, 4, 4))
+    A[:, 0] = np.stack((x0 ** 3, x0 ** 2, x0, np.ones(num)), axis=1)
+    A[:, 1] = np.stack((3 * x0 ** 2, 2 * x0, np.ones(num), np.zeros(num)), axis=1)
+    A[:, 2] = np.stack((x1 ** 3, x1 ** 2, x1, np.ones(num)), axis=1)
+    A[:, 3] = np.stack((3 * x1 ** 2, 2 * x1, np.ones(num), np.zeros(num)), axis=1)
+    b = np.stack((y0, y0p, y1, y1p), axis=1)
+
+    # coincident points are fit with a line, as fit_cubic does
+    coincident = isclose_batch(x0, x1) & isclose_batch(y0, y1)
+    A[coincident] = np.eye(4)
+    b[coincident] = [0, 0, 1, 0]
+
+    return np.linalg.solve(A, b[:, :, np.newaxis])[:, :, 0]
+
+
+def sample_nat_segment_batch(
+    x_start: np.ndarray, x_end: np.ndarray, coeff: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sample N poly_model in the [x_start, x_end] ranges on natural numbers
+
+    coeff is a (N, k) array, with the high degrees first as returned by fit_cubic
+
+    Returns the samples of all the segments stacked in two flat arrays, and the
+    number of samples in each segment
+    """
+    x_low = np.minimum(x_start, x_end)
+    x_high = np.maximum(x_start, x_end)
+
+    # align x_start and x_end to grid step
+    x_start_align = np.ceil(x_low)
+    x_end_align = np.floor(x_high)
+    counts = np.maximum(x_end_align - x_start_align + 1, 0).astype(np.int64)
+
+    # position of each sample inside its own segment
+    seg_id = np.repeat(np.arange(counts.shape[0]), counts)
+    seg_first = np.cumsum(counts) - counts
+    in_seg_id = np.arange(seg_id.shape[0]) - seg_first[seg_id]
+    x_sample = x_start_align[seg_id] + in_seg_id
+
+    # evaluate the polynomials with the Horner scheme
+    seg_coeff = coeff[seg_id]
+    y_segment = seg_coeff[:, 0].copy()
+    for i in range(1, coeff.shape[1]):
+        y_segment = y_segment * x_sample + seg_coeff[:, i]
+
+    return x_sample, y_segment, counts
+
+
+def split_batch(values: np.ndarray, counts: np.ndarray) -> List[np.ndarray]:
+    """Split a flat array of stacked segments in a list of arrays"""
+    return np.split(values, np.cumsum(counts)[:-1])
+
+
+# pieces of the contours for each case, the codes index [left, top, bottom, right]
+# and -1 is an unused slot: for each case the pieces of x_sample, contour_t and
+# contour_b, in the same order as in build_contour
+CL, CT, CB, CR, CN = 0, 1, 2, 3, -1
+CONTOUR_CASES = np.array(
+    [
+        # regular case: /\ // \\ \/
+        [[CL, CT, CR], [CL, CT, CR], [CB, CN, CN]],
+        [[CL, CT, CN], [CL, CT, CN], [CB, CR, CN]],
+        [[CL, CB, CN], [CT, CR, CN], [CL, CB, CN]],
+        [[CL, CB, CR], [CT, CN, CN], [CL, CB, CR]],
+        # keep the lower part: /\ // \\
+        [[CL, CR, CN], [CL, CR, CN], [CB, CN, CN]],
+        [[CL, CN, CN], [CL, CN, CN], [CB, CR, CN]],
+        [[CR, CN, CN], [CR, CN, CN], [CL, CB, CN]],
+        # keep the upper part: // \\ \/
+        [[CL, CT, CN], [CL, CT, CN], [CR, CN, CN]],
+        [[CL, CN, CN], [CT, CR, CN], [CL, CN, CN]],
+        [[CL, CR, CN], [CT, CN, CN], [CL, CR, CN]],
+    ]
+)
+
+
+def classify_contour_batch(
+    x0t: np.ndarray,
+    x0b: np.ndarray,
+    x1t: np.ndarray,
+    x1b: np.ndarray,
+    al: np.ndarray,
+    ar: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find the case of build_contour for N thick segments
+
+    al and ar are the slopes of the left and right sides
+
+    Returns the index of the case in CONTOUR_CASES and the masks of the lower
+    and upper overlapping cases
+    """
+    is_reg = (x0t <= x1t) & (x0b <= x1b)
+    is_low = (x0t > x1t) & (x0b <= x1b)
+    is_upp = (x0t <= x1t) & (x0b > x1b)
+
+    # the slope cases, in the order they are checked in build_contour
+    s_ud = (al >= 0) & (ar <= 0)
+    s_uu = (al >= 0) & (ar >= 0)
+    s_dd = (al <= 0) & (ar <= 0)
+    s_du = (al <= 0) & (ar >= 0)
+
+    case_reg = np.select([s_ud, s_uu, s_dd, s_du], [0, 1, 2, 3], -1)
+    case_low = np.select([s_ud, s_uu, s_dd], [4, 5, 6], -1)
+    case_upp = np.select([s_uu, s_dd, s_du], [7, 8, 9], -1)
+    case_id = np.select([is_reg, is_low, is_upp], [case_reg, case_low, case_upp], -1)
+
+    return case_id, is_low, is_upp
+
+
+def gather_pieces(
+    pieces: np.ndarray,
+    src: np.ndarray,
+    src_first: np.ndarray,
+    src_counts: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenate the pieces of each segment in a single flat array
+
+    pieces is a (N, k) array of source codes, -1 for unused slots
+    src holds all the sources stacked, src_first and src_counts are (4, N) arrays
+    with the position and length of each source of each segment in src
+
+    Returns the flat array and the length of each segment in it
+    """
+    num_seg = pieces.shape[0]
+    used = pieces >= 0
+    code = np.where(used, pieces, 0)
+    seg_id = np.arange(num_seg)[:, np.newaxis]
+
+    # start and length of each piece, segment by segment, slot by slot
+    piece_first = src_first[code, seg_id].ravel()
+    piece_len = np.where(used, src_counts[code, seg_id], 0).ravel()
+
+    # the index in src of each output value
+    tot_len = int(piece_len.sum())
+    out_first = np.cumsum(piece_len) - piece_len
+    src_id = np.repeat(piece_first - out_first, piece_len) + np.arange(tot_len)
+
+    # fill the output directly, without building the pieces
+    out = np.empty(tot_len)
+    np.take(src, src_id, out=out)
+
+    seg_len = piece_len.reshape(num_seg, -1).sum(axis=1)
+    return out, seg_len
+
+
+def build_contour_flat(
+    x0t: np.ndarray,
+    x0b: np.ndarray,
+    x1t: np.ndarray,
+    x1b: np.ndarray,
+    coeff_l: np.ndarray,
+    coeff_r: np.ndarray,
+    x_sample_t: np.ndarray,
+    y_segment_t: np.ndarray,
+    counts_t: np.ndarray,
+    x_sample_b: np.ndarray,
+    y_segment_b: np.ndarray,
+    counts_b: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Build the top and bottom contours of N thick segments in flat arrays
+
+    Same cases as build_contour, but the top and bottom samples are
+    passed stacked as returned by sample_nat_segment_batch, the segments are
+    classified by case all at once and the contours are gathered with a single
+    take for each output, without building the pieces of each segment.
+
+    Returns x_sample, contour_t and contour_b of all the segments stacked, and
+    the number of samples in each segment. The contours are cut at the length
+    of x_sample, as they are indexed along it.
+    """
+    num_seg = x0t.shape[0]
+    case_id, is_low, is_upp = classify_contour_batch(
+        x0t, x0b, x1t, x1b, coeff_l[:, 0], coeff_r[:, 0]
+    )
+    if np.any(case_id < 0):
+        bad_seg = np.nonzero(case_id < 0)
+        raise ValueError(f"Unable to build the contour of segments {bad_seg}")
+
+    # compute the intersection between the two lines
+    # x = (b2-b1)/(a1-a2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        i_x = (coeff_l[:, 1] - coeff_r[:, 1]) / (coeff_r[:, 0] - coeff_l[:, 0])
+
+    # the extremes of the left and right sides to sample
+    is_over = is_low | is_upp
+    l_start = np.where(is_low, x0b, x0t)
+    l_end = np.where(is_over, i_x, x0b)
+    r_start = np.where(is_low, x1b, x1t)
+    r_end = np.where(is_over, i_x, x1b)
+    x_sample_l, y_segment_l, counts_l = sample_nat_segment_batch(
+        l_start, l_end, coeff_l
+    )
+    x_sample_r, y_segment_r, counts_r = sample_nat_segment_batch(
+        r_start, r_end, coeff_r
+    )
+
+    # where each source of each segment is, in the stacked sources
+    src_counts = np.stack((counts_l, counts_t, counts_b, counts_r))
+    src_base = np.cumsum(src_counts.sum(axis=1)) - src_counts.sum(axis=1)
+    src_first = np.cumsum(src_counts, axis=1) - src_counts + src_base[:, np.newaxis]
+
+    x_src = np.concatenate((x_sample_l, x_sample_t, x_sample_b, x_sample_r))
+    y_src = np.concatenate((y_segment_l, y_segment_t, y_segment_b, y_segment_r))
+
+    seg_cases = CONTOUR_CASES[case_id]
+    x_sample, counts_x = gather_pieces(seg_cases[:, 0], x_src, src_first, src_counts)
+    contour_t, counts_ct = gather_pieces(seg_cases[:, 1], y_src, src_first, src_counts)
+    contour_b, counts_cb = gather_pieces(seg_cases[:, 2], y_src, src_first, src_counts)
+
+    # cut the contours that are longer than x_sample
+    if np.any(counts_ct != counts_x):
+        contour_t = cut_segments(contour_t, counts_ct, counts_x)
+    if np.any(counts_cb != counts_x):
+        contour_b = cut_segments(contour_b, counts_cb, counts_x)
+
+    return x_sample, contour_t, contour_b, counts_x
+
+
+def cut_segments(
+    values: np.ndarray, counts: np.ndarray, new_counts: np.ndarray
+) -> np.ndarray:
+    """Keep the first new_counts values of each stacked segment"""
+    seg_id = np.repeat(np.arange(counts.shape[0]), counts)
+    in_seg_id = np.arange(values.shape[0]) - (np.cumsum(counts) - counts)[seg_id]
+    return values[in_seg_id < new_counts[seg_id]]
+
+
+def frame_thick_contour_batch(p0s: DArray, p1s: DArray, thickness: float) -> Tuple:
+    """Compute the contours of N thick segments, each rotated on the x axis
+
+    Shared by compute_thick_spline_batch and compute_thick_contour_batch
+
+    Returns a tuple with
+        coincident: mask of the segments with coincident points, that are skipped
+        p0_x, p0_y, cos_01, sin_01: to rototranslate the good segments back
+        x_sample, contour_t, contour_b, counts_x: the flat contours of the good
+            segments, counts_x of them in each segment
+    """
+    p0s = np.asarray(p0s, dtype=float).reshape(-1, 3)
+    p1s = np.asarray(p1s, dtype=float).reshape(-1, 3)
+
+    p0_x, p0_y, p0_ori = p0s[:, 0], p0s[:, 1], p0s[:, 2]
+    p1_x, p1_y, p1_ori = p1s[:, 0], p1s[:, 1], p1s[:, 2]
+
+    # the coincident segments are removed, and added back as a single point
+    coincident = isclose_batch(p0_x, p1_x) & isclose_batch(p0_y, p1_y)
+    good = ~coincident
+    if np.any(coincident):
+        logg = logging.getLogger(f"c.{__name__}.frame_thick_contour_batch")
+        logg.warn(f"Coincident points in segments {np.nonzero(coincident)[0]}")
+
+    # translate and rotate the points to the origin
+    dir_01 = np.degrees(np.arctan2(p1_y[good] - p0_y[good], p1_x[good] - p0_x[good]))
+    dir_01_rad = np.radians(dir_01)
+    cos_01 = np.cos(dir_01_rad)
+    sin_01 = np.sin(dir_01_rad)
+    tran_p1x = p1_x[good] - p0_x[good]
+    tran_p1y = p1_y[good] - p0_y[good]
+    rot_p1_x = tran_p1x * cos_01 + tran_p1y * sin_01
+    rot_p1_y = -tran_p1x * sin_01 + tran_p1y * cos_01
+    rot_p0_ori = wrap_ori_deg(p0_ori[good] - dir_01)
+    rot_p1_ori = wrap_ori_deg(p1_ori[good] - dir_01)
+
+    # if the points are outside the [-90, 90] range, the arrow is reversed
+    rot_p0_ori = np.where(
+        (-90 < rot_p0_ori) & (rot_p0_ori < 90),
+        rot_p0_ori,
+        wrap_ori_deg(rot_p0_ori + 180),
+    )
+    rot_p1_ori = np.where(
+        (-90 < rot_p1_ori) & (rot_p1_ori < 90),
+        rot_p1_ori,
+        wrap_ori_deg(rot_p1_ori + 180),
+    )
+    rot_p0_slo = np.tan(np.radians(rot_p0_ori))
+    rot_p1_slo = np.tan(np.radians(rot_p1_ori))
+
+    # compute the corner points of the thick spline
+    np0_ori_rad = np.radians(rot_p0_ori) + math.pi / 2
+    np1_ori_rad = np.radians(rot_p1_ori) + math.pi / 2
+    offset_x_0 = np.cos(np0_ori_rad) * thickness
+    offset_y_0 = np.sin(np0_ori_rad) * thickness
+    offset_x_1 = np.cos(np1_ori_rad) * thickness
+    offset_y_1 = np.sin(np1_ori_rad) * thickness
+    x0t, y0t = offset_x_0, offset_y_0
+    x0b, y0b = -offset_x_0, -offset_y_0
+    x1t, y1t = rot_p1_x + offset_x_1, rot_p1_y + offset_y_1
+    x1b, y1b = rot_p1_x - offset_x_1, rot_p1_y - offset_y_1
+
+    # compute the coeff of the lines passing through the corners
+    a_l = (y0b - y0t) / (x0b - x0t)
+    coeff_l = np.stack((a_l, y0t - a_l * x0t), axis=1)
+    a_r = (y1b - y1t) / (x1b - x1t)
+    coeff_r = np.stack((a_r, y1t - a_r * x1t), axis=1)
+
+    # compute the spline points
+    coeff_t = fit_cubic_batch(x0t, y0t, rot_p0_slo, x1t, y1t, rot_p1_slo)
+    coeff_b = fit_cubic_batch(x0b, y0b, rot_p0_slo, x1b, y1b, rot_p1_slo)
+    x_sample_t, y_segment_t, counts_t = sample_nat_segment_batch(x0t, x1t, coeff_t)
+    x_sample_b, y_segment_b, counts_b = sample_nat_segment_batch(x0b, x1b, coeff_b)
+
+    # the contours are indexed along x_sample
+    x_sample, contour_t, contour_b, counts_x = build_contour_flat(
+        x0t,
+        x0b,
+        x1t,
+        x1b,
+        coeff_l,
+        coeff_r,
+        x_sample_t,
+        y_segment_t,
+        counts_t,
+        x_sample_b,
+        y_segment_b,
+        counts_b,
+    )
+
+    return (
+        coincident,
+        p0_x,
+        p0_y,
+        cos_01,
+        sin_01,
+        x_sample,
+        contour_t,
+        contour_b,
+        counts_x,
+    )
+
+
+def compute_thick_spline_batch(
+    p0s: DArray, p1s: DArray, thickness: float
+) -> List[ThickSegment]:
+    """Compute the thick cubic splines between N pairs of points
+
+    p0s and p1s are (N, 3) arrays of (x, y, ori_deg), the i-th segment goes
+    from p0s[i] to p1s[i]
+
+    The result is the same as calling compute_thick_spline on each pair, but the
+    rototranslations, the cubic fits, the sampling and the filling of the
+    segments are done on stacked arrays, without creating OrientedPoints
+
+    Returns a list of N (x, y) tuples of arrays, one for each segment
+    """
+    p0s = np.asarray(p0s, dtype=float).reshape(-1, 3)
+    num_seg = p0s.shape[0]
+    if num_seg == 0:
+        return []
+
+    frame = frame_thick_contour_batch(p0s, p1s, thickness)
+    coincident, p0_x, p0_y, cos_01, sin_01 = frame[:5]
+    x_sample, contour_t, contour_b, counts_x = frame[5:]
+    good = ~coincident
+
+    # sample all the points inside the splines, aligned on the grid: for each
+    # x_sample, the y in [ceil(contour_b), floor(contour_t)]
+    y_low = np.ceil(contour_b)
+    counts_y = np.maximum(np.floor(contour_t) - y_low + 1, 0).astype(np.int64)
+    col_id = np.repeat(np.arange(counts_y.shape[0]), counts_y)
+    col_first = np.cumsum(counts_y) - counts_y
+    on_points_x = x_sample[col_id]
+    on_points_y = y_low[col_id] + np.arange(col_id.shape[0]) - col_first[col_id]
+
+    # how many points are inside each segment
+    col_seg_id = np.repeat(np.arange(counts_x.shape[0]), counts_x)
+    counts_on = np.bincount(col_seg_id, weights=counts_y, minlength=counts_x.shape[0])
+    counts_on = counts_on.astype(np.int64)
+
+    # rototranslate points to the original position
+    pt_seg_id = np.repeat(np.arange(counts_on.shape[0]), counts_on)
+    pt_cos = cos_01[pt_seg_id]
+    pt_sin = sin_01[pt_seg_id]
+    rototran_x = on_points_x * pt_cos - on_points_y * pt_sin + p0_x[good][pt_seg_id]
+    rototran_y = on_points_x * pt_sin + on_points_y * pt_cos + p0_y[good][pt_seg_id]
+
+    good_x = split_batch(rototran_x, counts_on)
+    good_y = split_batch(rototran_y, counts_on)
+
+    # put the segments back in order
+    thick_segments: List[ThickSegment] = []
+    i_good = 0
+    for i in range(num_seg):
+        if coincident[i]:
+            thick_segments.append((p0_x[i : i + 1].copy(), p0_y[i : i + 1].copy()))
+        else:
+            thick_segments.append((good_x[i_good], good_y[i_good]))
+            i_good += 1
+
+    return thick_segments
+
+
+def compute_thick_contour_batch(
+    p0s: DArray, p1s: DArray, thickness: float
+) -> List[ThickSegment]:
+    """Compute the outlines of the thick cubic splines between N pairs of points
+
+    Same inputs as compute_thick_spline_batch, but instead of the points inside
+    each segment returns the closed polygon around them: the top contour from
+    left to right, then the bottom contour from right to left. The polygon is
+    half a unit wider on each end, to cover the same area as the points.
+
+    Returns a list of N (x, y) tuples of arrays with the vertices of the polygons,
+    the coincident segments are a single point
+    """
+    p0s = np.asarray(p0s, dtype=float).reshape(-1, 3)
+    num_seg = p0s.shape[0]
+    if num_seg == 0:
+        return []
+
+    frame = frame_thick_contour_batch(p0s, p1s, thickness)
+    coincident, p0_x, p0_y, cos_01, sin_01 = frame[:5]
+    x_sample, contour_t, contour_b, counts_x = frame[5:]
+    good = ~coincident
+
+    # each sample covers a unit column, so the first and last columns are
+    # repeated half a unit outside, and the polygons of consecutive segments
+    # touch; each side of a polygon has counts_x + 2 vertices
+    counts_side = np.where(counts_x > 0, counts_x + 2, 0)
+    counts_v = 2 * counts_side
+
+    # for each vertex of the polygons, the column in the flat contours: forward
+    # on the top contour, backward on the bottom one
+    v_seg_id = np.repeat(np.arange(counts_v.shape[0]), counts_v)
+    v_first = np.cumsum(counts_v) - counts_v
+    x_first = np.cumsum(counts_x) - counts_x
+    v_pos = np.arange(v_seg_id.shape[0]) - v_first[v_seg_id]
+    v_side = counts_side[v_seg_id]
+    is_top = v_pos < v_side
+    side_pos = np.where(is_top, v_pos, 2 * v_side - 1 - v_pos)
+    v_col = np.clip(side_pos - 1, 0, counts_x[v_seg_id] - 1)
+    v_idx = x_first[v_seg_id] + v_col
+    v_dx = np.where(side_pos == 0, -0.5, np.where(side_pos == v_side - 1, 0.5, 0))
+    poly_x = x_sample[v_idx] + v_dx
+    poly_y = np.where(is_top, contour_t[v_idx], contour_b[v_idx])
+
+    # rototranslate the vertices to the original position
+    v_cos = cos_01[v_seg_id]
+    v_sin = sin_01[v_seg_id]
+    rototran_x = poly_x * v_cos - poly_y * v_sin + p0_x[good][v_seg_id]
+    rototran_y = poly_x * v_sin + poly_y * v_cos + p0_y[good][v_seg_id]
+
+    good_x = split_batch(rototran_x, counts_v)
+    good_y = split_batch(rototran_y, counts_v)
+
+    # put the segments back in order
+    thick_contours: List[ThickSegment] = []
+    i_good = 0
+    for i in range(num_seg):
+        if coincident[i]:
+            thick_contours.append((p0_x[i : i + 1].copy(), p0_y[i : i + 1].copy()))
+        else:
+            thick_contours.append((good_x[i_good], good_y[i_good]))
+            i_good += 1
+
+    return thick_contours
+
+
 def compute_long_thick_spline(
     spline_sequence: Spline, thickness: int = 20
 ) -> ThickSpline:
@@ -548,6 +1037,8 @@ def compute_long_thick_spline(
     returns a list of list of 2-tuples
     spline_samples = [[(x12, y12), (x23, y23), ...], ...]
     where each (x12, y12) is a segment of points of the glpyh of the spline
+
+    All the segments of a glyph are computed at once with compute_thick_spline_batch
     """
     # logg = logging.getLogger(f"c.{__name__}.compute_long_thick_spline")
     # logg.debug(f"Start compute_long_thick_spline")
@@ -555,20 +1046,41 @@ def compute_long_thick_spline(
     spline_samples = []
 
     for glyph in spline_sequence:
-        glyph_sample = []
-        for i in range(len(glyph) - 1):
-            p0 = glyph[i]
-            p1 = glyph[i + 1]
+        glyph_points = np.array([(op.x, op.y, op.ori_deg) for op in glyph], dtype=float)
+        glyph_points = glyph_points.reshape(-1, 3)
 
-            segment_x, segment_y = compute_thick_spline(p0, p1, thickness)
-
-            glyph_sample.append((segment_x, segment_y))
+        glyph_sample = compute_thick_spline_batch(
+            glyph_points[:-1], glyph_points[1:], thickness
+        )
 
         spline_samples.append(glyph_sample)
 
     return spline_samples
 
 
+def compute_long_thick_contour(
+    spline_sequence: Spline, thickness: int = 20
+) -> ThickSpline:
+    """Compute the thick segment outlines for a Spline
+
+    Same layout as compute_long_thick_spline, but each (x, y) is the polygon
+    around a segment, computed with compute_thick_contour_batch
+    """
+    spline_contours = []
+
+    for glyph in spline_sequence:
+        glyph_points = np.array([(op.x, op.y, op.ori_deg) for op in glyph], dtype=float)
+        glyph_points = glyph_points.reshape(-1, 3)
+
+        glyph_contour = compute_thick_contour_batch(
+            glyph_points[:-1], glyph_points[1:], thickness
+        )
+
+        spline_contours.append(glyph_contour)
+
+    return spline_contours
+
+
 def compute_aligned_cubic_segment(
     p0: OrientedPoint,
     p1: OrientedPoint,
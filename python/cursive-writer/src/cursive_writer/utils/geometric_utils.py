@@ -2,7 +2,7 @@ import logging
 import numpy as np  # type: ignore
 import math
 
-from typing import Iterable, List, Optional, Tuple
+from typing import Iterable, List, Optional, Tuple, Union
 
 from cursive_writer.utils.type_utils import DArray
 from cursive_writer.utils.type_utils import Glyph
@@ -11,6 +11,7 @@ from cursive_writer.utils.type_utils import ThickSpline
 
 from cursive_writer.utils.color_utils import fmt_cn
 from cursive_writer.utils.oriented_point import OrientedPoint
+from cursive_writer.utils.oriented_point_array import SplineArray
 from cursive_writer.utils.utils import print_coeff
 
 
@@ -157,7 +158,9 @@ def translate_point_dir(
     return OrientedPoint(new_x, new_y, orig_point.ori_deg)
 
 
-def translate_spline_sequence(spline_sequence: Spline, dx: float, dy: float) -> None:
+def translate_spline_sequence(
+    spline_sequence: Union[Spline, SplineArray], dx: float, dy: float
+) -> None:
     """Changes a spline, translating the points by (dx, dy)
 
     NOTE: changes the spline *in place*
@@ -166,6 +169,10 @@ def translate_spline_sequence(spline_sequence: Spline, dx: float, dy: float) ->
     # logg = logging.getLogger(f"c.{__name__}.translate_spline_sequence")
     # logg.debug(f"Start translate_spline_sequence")
 
+    if isinstance(spline_sequence, SplineArray):
+        spline_sequence.translate(dx, dy)
+        return
+
     for glyph in spline_sequence:
         for op in glyph:
             op.x += dx
@@ -348,10 +355,10 @@ def bisect_poly(
         # find the midpoint
         x_mid = (x_low + x_high) / 2
 
-        # compute the value of the function in low, mid, high
-        y_low = poly_model(np.array([x_low]), coeff, flip_coeff=True)
-        y_mid = poly_model(np.array([x_mid]), coeff, flip_coeff=True)
-        y_high = poly_model(np.array([x_high]), coeff, flip_coeff=True)
+        # compute the value of the function in low, mid, high, as scalars
+        y_low = poly_model(np.array([x_low]), coeff, flip_coeff=True)[0]
+        y_mid = poly_model(np.array([x_mid]), coeff, flip_coeff=True)[0]
+        y_high = poly_model(np.array([x_high]), coeff, flip_coeff=True)[0]
 
         logg.debug(f"x_low: {x_low} x_mid: {x_mid} x_high: {x_high}")
         logg.debug(f"y_low: {y_low} y_mid: {y_mid} y_high: {y_high}")
@@ -375,7 +382,7 @@ def bisect_poly(
         # else it would be in the other cases)
         elif y_target >= y_mid:
             logg.debug(f"the y_target {y_target} is over y_mid")
-            y_d_mid = poly_model(np.array([x_mid]), d_coeff, flip_coeff=True)
+            y_d_mid = poly_model(np.array([x_mid]), d_coeff, flip_coeff=True)[0]
 
             # the curve is going up at midpoint, pick right interval
             if y_d_mid >= 0:
@@ -389,7 +396,7 @@ def bisect_poly(
 
         elif y_target <= y_mid:
             logg.debug(f"the y_target {y_target} is below y_mid")
-            y_d_mid = poly_model(np.array([x_mid]), d_coeff, flip_coeff=True)
+            y_d_mid = poly_model(np.array([x_mid]), d_coeff, flip_coeff=True)[0]
 
             # the curve is going up at midpoint, pick left interval
             if y_d_mid >= 0:
@@ -406,6 +413,84 @@ def bisect_poly(
     return (x_low + x_high) / 2
 
 
+def find_poly_root(
+    coeff: DArray, d_coeff: DArray, y_target: float, x_low: float, x_high: float
+) -> Optional[float]:
+    """Finds the first x in [x_low, x_high] so that p(x) = y_target, in closed form
+
+    The roots of p(x) - y_target are computed with np.roots, then polished with
+    one Newton step using the derivative. Returns None if there is no real root
+    in the interval.
+    """
+    if x_high < x_low:
+        x_low, x_high = x_high, x_low
+
+    shifted_coeff = np.array(coeff, dtype=float)
+    shifted_coeff[-1] -= y_target
+    all_roots = np.roots(shifted_coeff)
+
+    # keep the real roots, allowing some noise in the imaginary part
+    real_roots = all_roots.real[np.abs(all_roots.imag) < 1e-9]
+    pad = 1e-9 * max(1, abs(x_low), abs(x_high))
+    valid_roots = real_roots[(real_roots >= x_low - pad) & (real_roots <= x_high + pad)]
+    if valid_roots.shape[0] == 0:
+        return None
+
+    x_root = np.min(valid_roots)
+    d_root = np.polyval(d_coeff, x_root)
+    if d_root != 0:
+        x_root -= (np.polyval(shifted_coeff, x_root)) / d_root
+    return float(x_root)
+
+
+def invert_poly_newton(
+    coeff: DArray,
+    d_coeff: DArray,
+    y_target: np.ndarray,
+    x_low: np.ndarray,
+    x_high: np.ndarray,
+    x_guess: np.ndarray,
+    tolerance: float = 1e-9,
+    max_iter: int = 50,
+) -> np.ndarray:
+    """Finds x so that |p(x) - y_target| < tolerance, for many targets at once
+
+    Each target must be bracketed: p(x_low) <= y_target <= p(x_high). A Newton
+    step is taken from x_guess using the derivative d_coeff, if it falls out of
+    the bracket a bisection step is used instead, and the bracket is shrunk.
+    """
+    x_low = np.array(x_low, dtype=float)
+    x_high = np.array(x_high, dtype=float)
+    x_sol = np.array(x_guess, dtype=float)
+
+    active = np.ones(x_sol.shape, dtype=bool)
+    for _ in range(max_iter):
+        y_err = np.polyval(coeff, x_sol) - y_target
+        active &= np.abs(y_err) >= tolerance
+        if not np.any(active):
+            break
+
+        # shrink the bracket
+        below = y_err < 0
+        x_low = np.where(active & below, x_sol, x_low)
+        x_high = np.where(active & ~below, x_sol, x_high)
+
+        # the Newton step, use bisection where it is not usable
+        y_d = np.polyval(d_coeff, x_sol)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_newton = x_sol - y_err / y_d
+        x_mid = (x_low + x_high) / 2
+        in_bracket = (x_newton > x_low) & (x_newton < x_high)
+        x_next = np.where(in_bracket, x_newton, x_mid)
+
+        x_sol = np.where(active, x_next, x_sol)
+
+        # the bracket is as small as it gets
+        active &= x_low < x_high
+
+    return x_sol
+
+
 def rotate_coeff(coeff: DArray, theta_deg: float) -> Tuple[List[float], List[float]]:
     """Returns the parametric expression of the rotated coeff
 
@@ -505,6 +590,8 @@ def sample_parametric_aligned(
     x_offset: float = 0,
     x_low: float = None,
     x_high: float = None,
+    tolerance: float = 1e-9,
+    root_finder: str = "newton",
 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     """Sample a parametric curve along a grid
 
@@ -537,6 +624,12 @@ def sample_parametric_aligned(
 
     So x_offset is how much p0.x is misaligned with the grid
 
+    With root_finder "newton" the t values of the extremes are found with the
+    closed form roots of the cubic, and the t values of all the grid points are
+    found at once with a safeguarded Newton, until |x(t) - x_a| < tolerance.
+    With root_finder "bisect" the extremes are found with bisect_poly and the
+    grid points by linear interpolation of a dense oversample of the curve.
+
     TODO: better documentation of parameters/return
     """
     logg = logging.getLogger(f"c.{__name__}.sample_parametric_aligned")
@@ -551,9 +644,24 @@ def sample_parametric_aligned(
     if x_high is None:
         x_high = 2 * x_max
 
+    if root_finder == "newton":
+        return sample_parametric_aligned_newton(
+            x_coeff,
+            y_coeff,
+            x_d_coeff,
+            y_d_coeff,
+            x_min,
+            x_max,
+            x_stride,
+            x_offset,
+            x_low,
+            x_high,
+            tolerance,
+        )
+
     # find the value for t that corresponds to x_min and x_max
-    t_min = bisect_poly(x_coeff, x_d_coeff, x_min, x_low, x_high)
-    t_max = bisect_poly(x_coeff, x_d_coeff, x_max, x_low, x_high)
+    t_min = bisect_poly(x_coeff, x_d_coeff, x_min, x_low=x_low, x_high=x_high)
+    t_max = bisect_poly(x_coeff, x_d_coeff, x_max, x_low=x_low, x_high=x_high)
     logg.debug(f"t_min: {t_min} t_max: {t_max}")
 
     # check where the extremes are
@@ -623,6 +731,80 @@ def sample_parametric_aligned(
     return t_a_sample, x_a_sample, y_a_sample, yp_a_sample
 
 
+def sample_parametric_aligned_newton(
+    x_coeff: DArray,
+    y_coeff: DArray,
+    x_d_coeff: DArray,
+    y_d_coeff: DArray,
+    x_min: float,
+    x_max: float,
+    x_stride: float,
+    x_offset: float,
+    x_low: float,
+    x_high: float,
+    tolerance: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Sample a parametric curve along a grid, inverting x(t) with Newton
+
+    See sample_parametric_aligned for the parameters
+    """
+    logg = logging.getLogger(f"c.{__name__}.sample_parametric_aligned_newton")
+    logg.setLevel("INFO")
+
+    # find the value for t that corresponds to x_min and x_max
+    t_min = find_poly_root(x_coeff, x_d_coeff, x_min, x_low, x_high)
+    if t_min is None:
+        t_min = bisect_poly(x_coeff, x_d_coeff, x_min, tolerance, x_low, x_high)
+    t_max = find_poly_root(x_coeff, x_d_coeff, x_max, x_low, x_high)
+    if t_max is None:
+        t_max = bisect_poly(x_coeff, x_d_coeff, x_max, tolerance, x_low, x_high)
+    logg.debug(f"t_min: {t_min} t_max: {t_max}")
+
+    # find the aligned x values
+    x_a_min = math.ceil(x_min / x_stride) * x_stride
+    x_a_max = math.floor(x_max / x_stride) * x_stride
+    x_a_sample = np.arange(x_a_min, x_a_max + x_stride / 2, x_stride)
+
+    # translate the aligned x values to compensate the x_offset
+    x_a_sample += x_offset
+
+    # a coarse sample in t, padded a bit, to bracket each x_a_sample value
+    x_len = x_max - x_min
+    t_pad = x_len / 10 * x_stride
+    t_num_samples = max(16, 2 * x_a_sample.shape[0] + 2)
+    t_oversample = np.linspace(t_min - t_pad, t_max + t_pad, num=t_num_samples)
+    x_oversample = np.polyval(x_coeff, t_oversample)
+
+    # the first sample that is past each x_a_sample value: the running max
+    # finds the first crossing even if x(t) is not monotone
+    x_over_max = np.maximum.accumulate(x_oversample)
+    over_id = np.searchsorted(x_over_max, x_a_sample, side="right")
+    over_id = np.clip(over_id, 1, t_num_samples - 1)
+    t_low = t_oversample[over_id - 1]
+    t_high = t_oversample[over_id]
+
+    # start from the linear interpolation between the two samples
+    x_low_over = x_oversample[over_id - 1]
+    x_high_over = x_oversample[over_id]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        al = (x_a_sample - x_low_over) / (x_high_over - x_low_over)
+    al = np.where(np.isfinite(al), np.clip(al, 0, 1), 0.5)
+    t_guess = (1 - al) * t_low + al * t_high
+
+    t_a_sample = invert_poly_newton(
+        x_coeff, x_d_coeff, x_a_sample, t_low, t_high, t_guess, tolerance
+    )
+
+    y_a_sample = np.polyval(y_coeff, t_a_sample)
+    x_a_d_sample = np.polyval(x_d_coeff, t_a_sample)
+    y_a_d_sample = np.polyval(y_d_coeff, t_a_sample)
+
+    # compute the value of the derivative
+    yp_a_sample = np.divide(y_a_d_sample, x_a_d_sample)
+
+    return t_a_sample, x_a_sample, y_a_sample, yp_a_sample
+
+
 def find_align_stride(glyphs: Iterable[Glyph]) -> float:
     """Given an iterable of glyphs, finds the stride to sample them"""
     # logg = logging.getLogger(f"c.{__name__}.find_align_stride")
@@ -646,7 +828,7 @@ def find_align_stride(glyphs: Iterable[Glyph]) -> float:
 
 
 def find_spline_sequence_bbox(
-    spline_sequence: Spline,
+    spline_sequence: Union[Spline, SplineArray],
     old_xlim: Optional[Tuple[float, float]] = None,
     old_ylim: Optional[Tuple[float, float]] = None,
 ) -> Tuple[Tuple[float, float], Tuple[float, float]]:
@@ -665,6 +847,14 @@ def find_spline_sequence_bbox(
     else:
         min_y, max_y = old_ylim
 
+    if isinstance(spline_sequence, SplineArray):
+        (arr_min_x, arr_max_x), (arr_min_y, arr_max_y) = spline_sequence.bbox()
+        min_x = min(min_x, arr_min_x)
+        max_x = max(max_x, arr_max_x)
+        min_y = min(min_y, arr_min_y)
+        max_y = max(max_y, arr_max_y)
+        return (min_x, max_x), (min_y, max_y)
+
     for glyph in spline_sequence:
         for point in glyph:
             # logg.debug(f"point: {point}")
@@ -0,0 +1,205 @@
+import numpy as np  # type: ignore
+
+from math import radians
+from math import tan
+
+from typing import Iterable, List, Optional, Tuple
+
+from cursive_writer.utils.oriented_point import OrientedPoint
+
+
+def wrap_ori_deg(ori_deg: np.ndarray) -> np.ndarray:
+    """Bring the orientations in the [-180, 180) range, like set_ori_deg does"""
+    ori_deg = np.where(ori_deg > 180, ori_deg - 360, ori_deg)
+    ori_deg = np.where(ori_deg <= -180, ori_deg + 360, ori_deg)
+    return ori_deg
+
+
+class OrientedPointView(OrientedPoint):
+    """An OrientedPoint that reads and writes a row of an OrientedPointArray
+
+    It can be used everywhere an OrientedPoint is expected, but changing it
+    changes the array it comes from
+    """
+
+    def __init__(self, data: np.ndarray, index: int) -> None:
+        self.data = data
+        self.index = index
+
+    @property
+    def x(self) -> float:
+        return float(self.data[self.index, 0])
+
+    @x.setter
+    def x(self, value: float) -> None:
+        self.data[self.index, 0] = value
+
+    @property
+    def y(self) -> float:
+        return float(self.data[self.index, 1])
+
+    @y.setter
+    def y(self, value: float) -> None:
+        self.data[self.index, 1] = value
+
+    @property
+    def ori_deg(self) -> float:
+        return float(self.data[self.index, 2])
+
+    @ori_deg.setter
+    def ori_deg(self, value: float) -> None:
+        self.data[self.index, 2] = value
+
+    @property
+    def ori_rad(self) -> float:
+        return radians(self.ori_deg)
+
+    @property
+    def ori_slo(self) -> float:
+        return tan(self.ori_rad)
+
+    def set_ori_deg(self, ori_deg: float) -> None:
+        """Set the orientation of the point in degrees, in [-180, 180) range"""
+        if ori_deg > 180:
+            ori_deg -= 360
+        if ori_deg <= -180:
+            ori_deg += 360
+        self.ori_deg = ori_deg
+
+
+class OrientedPointArray:
+    def __init__(self, data: Optional[np.ndarray] = None) -> None:
+        """Struct of arrays of oriented points
+
+        data is a (N, 3) array, each row is x, y, ori_deg. The rows can be seen
+        as OrientedPoint with the scalar views returned by to_glyph, without
+        copying the data.
+        """
+        if data is None:
+            data = np.empty((0, 3))
+        self.data = data
+
+    @classmethod
+    def from_glyph(cls, glyph: Iterable[OrientedPoint]) -> "OrientedPointArray":
+        """Build the array from a list of OrientedPoint"""
+        data = np.array([[op.x, op.y, op.ori_deg] for op in glyph], dtype=float)
+        return cls(data.reshape(-1, 3))
+
+    def to_glyph(self) -> List[OrientedPoint]:
+        """List of views on the points of the array"""
+        return [OrientedPointView(self.data, i) for i in range(len(self))]
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def __getitem__(self, index: int) -> OrientedPointView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Point index {index} out of range")
+        return OrientedPointView(self.data, index)
+
+    def __iter__(self):
+        return iter(self.to_glyph())
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.data[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.data[:, 1]
+
+    @property
+    def ori_deg(self) -> np.ndarray:
+        return self.data[:, 2]
+
+    @property
+    def ori_rad(self) -> np.ndarray:
+        return np.radians(self.data[:, 2])
+
+    @property
+    def ori_slo(self) -> np.ndarray:
+        return np.tan(self.ori_rad)
+
+    def translate(self, dx: float, dy: float) -> None:
+        """Translate all the points by (dx, dy), in place"""
+        self.data[:, 0] += dx
+        self.data[:, 1] += dy
+
+    def rotate(self, theta_deg: float, center: Tuple[float, float] = (0, 0)) -> None:
+        """Rotate all the points by theta_deg around center, in place
+
+        The orientations are rotated as well
+        """
+        theta_rad = radians(theta_deg)
+        ct = np.cos(theta_rad)
+        st = np.sin(theta_rad)
+        cx, cy = center
+        x = self.data[:, 0] - cx
+        y = self.data[:, 1] - cy
+        self.data[:, 0] = x * ct - y * st + cx
+        self.data[:, 1] = x * st + y * ct + cy
+        self.data[:, 2] = wrap_ori_deg(self.data[:, 2] + theta_deg)
+
+    def bbox(self) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+        """Bounding box of the points, as (min_x, max_x), (min_y, max_y)"""
+        if len(self) == 0:
+            return (float("inf"), float("-inf")), (float("inf"), float("-inf"))
+        min_x, min_y = self.data[:, :2].min(axis=0)
+        max_x, max_y = self.data[:, :2].max(axis=0)
+        return (float(min_x), float(max_x)), (float(min_y), float(max_y))
+
+
+class SplineArray(OrientedPointArray):
+    def __init__(
+        self, data: Optional[np.ndarray] = None, glyph_len: Optional[List[int]] = None
+    ) -> None:
+        """Struct of arrays of a spline: the points of all the glyphs, one after
+        the other, and the number of points in each glyph
+
+        The operations on the points (translate, rotate, bbox) work on the whole
+        spline at once.
+        """
+        super().__init__(data)
+        if glyph_len is None:
+            glyph_len = [len(self)] if len(self) > 0 else []
+        self.glyph_len = list(glyph_len)
+        self.glyph_start = np.cumsum([0] + self.glyph_len)
+
+    @classmethod
+    def from_spline(cls, spline_sequence: Iterable[Iterable[OrientedPoint]]):
+        """Build the array from a list of glyphs"""
+        all_data = []
+        glyph_len = []
+        for glyph in spline_sequence:
+            glyph_data = OrientedPointArray.from_glyph(glyph).data
+            all_data.append(glyph_data)
+            glyph_len.append(glyph_data.shape[0])
+        if len(all_data) > 0:
+            data = np.vstack(all_data)
+        else:
+            data = np.empty((0, 3))
+        return cls(data, glyph_len)
+
+    def to_spline(self) -> List[List[OrientedPoint]]:
+        """List of glyphs, each a list of views on the points of the array"""
+        return [self.glyph(i).to_glyph() for i in range(self.num_glyphs)]
+
+    def to_points(self) -> List[List[OrientedPoint]]:
+        """List of glyphs, each a list of new OrientedPoint copied from the array"""
+        all_rows = self.data.tolist()
+        return [
+            [OrientedPoint(*row) for row in all_rows[start:end]]
+            for start, end in zip(self.glyph_start[:-1], self.glyph_start[1:])
+        ]
+
+    @property
+    def num_glyphs(self) -> int:
+        return len(self.glyph_len)
+
+    def glyph(self, i_glyph: int) -> OrientedPointArray:
+        """The points of a glyph, a view on the data of the spline"""
+        start = self.glyph_start[i_glyph]
+        end = self.glyph_start[i_glyph + 1]
+        return OrientedPointArray(self.data[start:end])
@@ -0,0 +1,165 @@
+import numpy as np  # type: ignore
+
+from typing import List, Tuple
+
+from cursive_writer.utils.type_utils import ThickSpline
+
+
+def fill_polygons(
+    all_u: List[np.ndarray],
+    all_v: List[np.ndarray],
+    wid: int,
+    hei: int,
+    supersample: int = 1,
+) -> np.ndarray:
+    """Fill the polygons on a (hei, wid) image, with supersampled scanlines
+
+    The vertices are in sub pixel units, u along the columns and v along the
+    rows, each pixel is split in supersample x supersample sub pixels. A sub
+    pixel is inside if its center is inside any of the polygons, using the
+    even odd rule inside each polygon. Polygons with less than three vertices
+    only cover the sub pixel they are in.
+
+    All the edges of all the polygons are processed at once: each edge is
+    intersected with the sub rows it crosses, the crossings are sorted by
+    polygon, row and column, and each pair of crossings is a span. The spans
+    of a sub row are merged, then counted in the pixels they cover on a
+    difference array, so the sub pixel grid is never built.
+
+    Returns the (hei, wid) fraction of each pixel that is covered
+    """
+    ss = supersample
+    sub_wid = wid * ss
+    sub_hei = hei * ss
+
+    poly_u = [u for u in all_u if len(u) >= 3]
+    poly_v = [v for v in all_v if len(v) >= 3]
+
+    # single points and lines are drawn as dots, a span one sub pixel long
+    dot_u = np.hstack([np.empty(0)] + [u for u in all_u if 0 < len(u) < 3])
+    dot_v = np.hstack([np.empty(0)] + [v for v in all_v if 0 < len(v) < 3])
+    dot_c = np.floor(dot_u).astype(np.int64)
+    dot_r = np.floor(dot_v).astype(np.int64)
+    inside = (0 <= dot_c) & (dot_c < sub_wid) & (0 <= dot_r) & (dot_r < sub_hei)
+    all_row = [dot_r[inside]]
+    all_lo = [dot_c[inside]]
+    all_hi = [dot_c[inside] + 1]
+
+    if len(poly_u) > 0:
+        # the edges go from each vertex to the next one in the same polygon
+        counts = np.array([len(u) for u in poly_u], dtype=np.int64)
+        u0 = np.hstack(poly_u)
+        v0 = np.hstack(poly_v)
+        poly_id = np.repeat(np.arange(counts.shape[0]), counts)
+        first = np.cumsum(counts) - counts
+        next_id = np.arange(u0.shape[0]) + 1
+        next_id[first + counts - 1] = first
+        u1 = u0[next_id]
+        v1 = v0[next_id]
+
+        # the rows whose center is in [min(v0, v1), max(v0, v1)), so that a
+        # vertex shared by two edges is counted once, and the horizontal edges
+        # are skipped
+        row_lo = np.clip(np.ceil(np.minimum(v0, v1) - 0.5), 0, sub_hei)
+        row_hi = np.clip(np.ceil(np.maximum(v0, v1) - 0.5), 0, sub_hei)
+        row_counts = (row_hi - row_lo).astype(np.int64)
+
+        # one crossing for each edge and row
+        edge_id = np.repeat(np.arange(u0.shape[0]), row_counts)
+        edge_first = np.cumsum(row_counts) - row_counts
+        row = row_lo.astype(np.int64)[edge_id]
+        row += np.arange(edge_id.shape[0]) - edge_first[edge_id]
+        e_u0, e_v0 = u0[edge_id], v0[edge_id]
+        slope = (u1[edge_id] - e_u0) / (v1[edge_id] - e_v0)
+        cross_u = e_u0 + (row + 0.5 - e_v0) * slope
+
+        # in each polygon every row has an even number of crossings, sorted
+        # they pair up in spans
+        order = np.lexsort((cross_u, row, poly_id[edge_id]))
+        cross_u = cross_u[order]
+        row = row[order]
+        all_row.append(row[0::2])
+        all_lo.append(np.clip(np.ceil(cross_u[0::2] - 0.5), 0, sub_wid))
+        all_hi.append(np.clip(np.ceil(cross_u[1::2] - 0.5), 0, sub_wid))
+
+    span_row = np.hstack(all_row).astype(np.int64)
+    span_lo = np.hstack(all_lo).astype(np.int64)
+    span_hi = np.hstack(all_hi).astype(np.int64)
+    keep = span_lo < span_hi
+    span_row, span_lo, span_hi = span_row[keep], span_lo[keep], span_hi[keep]
+    if span_row.shape[0] == 0:
+        return np.zeros((hei, wid))
+
+    # merge the overlapping spans of each sub row: sorted by row and start, a
+    # span starts a new interval if it begins after the end of all the previous
+    # ones in the row; the row offset keeps the running max inside the row
+    order = np.lexsort((span_lo, span_row))
+    span_row, span_lo, span_hi = span_row[order], span_lo[order], span_hi[order]
+    offset = span_row * (sub_wid + 1)
+    run_hi = np.maximum.accumulate(span_hi + offset) - offset
+    is_start = np.ones(span_row.shape[0], dtype=bool)
+    is_start[1:] = (span_row[1:] != span_row[:-1]) | (span_lo[1:] > run_hi[:-1])
+    start_id = np.nonzero(is_start)[0]
+    end_id = np.append(start_id[1:], span_row.shape[0]) - 1
+    merged_row = span_row[start_id] // ss
+    merged_lo = span_lo[start_id]
+    merged_hi = run_hi[end_id]
+
+    # count the sub pixels of each span in the pixels, on a difference array
+    # where the sub rows of a pixel share a row: a span from sub column lo to
+    # hi adds ss to the pixels in [lo // ss, hi // ss), and the partial pixels
+    # on the ends are corrected by adding the remainder on a single pixel; if
+    # lo and hi are in the same pixel the terms cancel out to hi - lo
+    row_len = wid + 2
+    pix_lo = merged_row * row_len + merged_lo // ss
+    pix_hi = merged_row * row_len + merged_hi // ss
+    rem_lo = merged_lo % ss
+    rem_hi = merged_hi % ss
+    all_pix = np.hstack((pix_lo, pix_lo + 1, pix_hi, pix_hi + 1))
+    all_step = np.hstack((ss - rem_lo, rem_lo, rem_hi - ss, -rem_hi))
+    diff = np.bincount(all_pix, weights=all_step, minlength=hei * row_len)
+    pixel_count = np.cumsum(diff.reshape(hei, row_len), axis=1)
+
+    return pixel_count[:, :wid] / (ss * ss)
+
+
+def thick_spline_bbox(thick_spline: ThickSpline) -> Tuple[float, float, float, float]:
+    """Bounding box (min_x, max_x, min_y, max_y) of all the vertices"""
+    all_x = [segment[0] for thick_glyph in thick_spline for segment in thick_glyph]
+    all_y = [segment[1] for thick_glyph in thick_spline for segment in thick_glyph]
+    x = np.hstack(all_x)
+    y = np.hstack(all_y)
+    return x.min(), x.max(), y.min(), y.max()
+
+
+def rasterize_thick_contour(
+    thick_contour: ThickSpline,
+    margin: int = 5,
+    scale: float = 1,
+    supersample: int = 4,
+) -> np.ndarray:
+    """Draw the outlines of a thick spline on a white grayscale image
+
+    The outlines are the ones from compute_long_thick_contour, each segment is
+    filled as a polygon. Each pixel is split in supersample x supersample sub
+    pixels, and the ink is the fraction of them that is inside the outlines.
+
+    scale is the number of pixels for each unit of the spline. The y axis is
+    flipped, to have the word upright in the image, and the canvas covers the
+    bounding box of the outlines, plus margin units on each side.
+    """
+    min_x, max_x, min_y, max_y = thick_spline_bbox(thick_contour)
+    wid = int(np.ceil((max_x - min_x + 2 * margin + 1) * scale))
+    hei = int(np.ceil((max_y - min_y + 2 * margin + 1) * scale))
+
+    # move to the sub pixel grid, a unit is centered on an integer coordinate
+    ss_scale = scale * supersample
+    all_u = []
+    all_v = []
+    for thick_glyph in thick_contour:
+        for segment in thick_glyph:
+            all_u.append((segment[0] - min_x + margin + 0.5) * ss_scale)
+            all_v.append((max_y - segment[1] + margin + 0.5) * ss_scale)
+    coverage = fill_polygons(all_u, all_v, wid, hei, supersample)
+    image = np.rint(255 * (1 - coverage)).astype(np.uint8)
+    return image
@@ -0,0 +1,168 @@
+import logging
+import numpy as np  # type: ignore
+import os
+
+from hashlib import sha1
+from pathlib import Path
+
+from typing import Optional, Tuple
+from cursive_writer.utils.type_utils import ThickSpline
+
+# change this when the way the thick samples are computed changes, to
+# invalidate all the entries saved in the cache
+SAMPLES_VERSION = "thick_batch_nat_1"
+
+
+class ThickSampleCache:
+    def __init__(self, cache_dir: Path, max_size: int = 256 * 2 ** 20) -> None:
+        """Content addressed cache of thick spline samples on disk
+
+        Each entry is keyed on the sha1 of the spline points, the thickness and
+        SAMPLES_VERSION, so when a spline is edited the old entry is simply never
+        requested again, and eventually evicted.
+
+        An entry is saved in two .npy files:
+            - {key}.npy: (2, M) array with all the x and y of the samples
+            - {key}.idx.npy: layout of the samples, [num_glyphs, segments in each
+              glyph..., points in each segment...]
+
+        The samples are loaded with mmap, the segments are views on the file.
+
+        max_size is the size in bytes of the cache: when it is exceeded, the least
+        recently used entries are removed.
+        """
+        # logg = logging.getLogger(f"c.{__name__}.__init__")
+        # logg.debug(f"Start __init__")
+
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+        if not self.cache_dir.exists():
+            self.cache_dir.mkdir(parents=True)
+
+    def get_key(self, hash_sha1: str, thickness: int) -> str:
+        """Build the key of an entry
+
+        The sampling has no parameters besides the thickness, SAMPLES_VERSION
+        stands for how the samples are computed
+        """
+        key_str = f"{hash_sha1}_{thickness}_{SAMPLES_VERSION}"
+        return sha1(key_str.encode()).hexdigest()
+
+    def get_pf(self, key: str) -> Tuple[Path, Path]:
+        """Paths to the samples and the layout of the entry"""
+        pf_samples = self.cache_dir / f"{key}.npy"
+        pf_layout = self.cache_dir / f"{key}.idx.npy"
+        return pf_samples, pf_layout
+
+    def load(self, hash_sha1: str, thickness: int) -> Optional[ThickSpline]:
+        """Load the samples if they are in the cache, None otherwise"""
+        logg = logging.getLogger(f"c.{__name__}.load")
+
+        key = self.get_key(hash_sha1, thickness)
+        pf_samples, pf_layout = self.get_pf(key)
+
+        if not pf_samples.exists() or not pf_layout.exists():
+            return None
+
+        try:
+            samples = np.load(pf_samples, mmap_mode="r")
+            layout = np.load(pf_layout)
+        except (OSError, ValueError) as e:
+            logg.warn(f"Unable to load {key}: {e}")
+            return None
+
+        # mark the entry as recently used
+        os.utime(pf_samples)
+        os.utime(pf_layout)
+
+        num_glyphs = layout[0]
+        segments_num = layout[1 : 1 + num_glyphs]
+        points_num = layout[1 + num_glyphs :]
+        points_end = np.cumsum(points_num)
+
+        thick_spline: ThickSpline = []
+        i_seg = 0
+        for seg_num in segments_num:
+            thick_glyph = []
+            for _ in range(seg_num):
+                start = points_end[i_seg] - points_num[i_seg]
+                end = points_end[i_seg]
+                thick_glyph.append((samples[0, start:end], samples[1, start:end]))
+                i_seg += 1
+            thick_spline.append(thick_glyph)
+
+        logg.debug(f"Loaded samples {key}")
+        return thick_spline
+
+    def save(self, hash_sha1: str, thickness: int, thick_spline: ThickSpline) -> None:
+        """Save the samples in the cache, then evict the old entries if needed"""
+        logg = logging.getLogger(f"c.{__name__}.save")
+
+        key = self.get_key(hash_sha1, thickness)
+        pf_samples, pf_layout = self.get_pf(key)
+
+        segments_num = [len(thick_glyph) for thick_glyph in thick_spline]
+        points_num = [
+            len(segment[0]) for thick_glyph in thick_spline for segment in thick_glyph
+        ]
+        layout = np.array(
+            [len(thick_spline), *segments_num, *points_num], dtype=np.int64
+        )
+
+        all_x = [segment[0] for thick_glyph in thick_spline for segment in thick_glyph]
+        all_y = [segment[1] for thick_glyph in thick_spline for segment in thick_glyph]
+        if len(all_x) > 0:
+            samples = np.vstack((np.hstack(all_x), np.hstack(all_y))).astype(float)
+        else:
+            samples = np.empty((2, 0))
+
+        # write to a temp file and rename, a concurrent reader never sees half a file
+        pf_samples_tmp = self.cache_dir / f"{key}.{os.getpid()}.tmp.npy"
+        pf_layout_tmp = self.cache_dir / f"{key}.idx.{os.getpid()}.tmp.npy"
+        np.save(pf_samples_tmp, samples)
+        np.save(pf_layout_tmp, layout)
+        os.replace(pf_samples_tmp, pf_samples)
+        os.replace(pf_layout_tmp, pf_layout)
+        logg.debug(f"Saved samples {key}")
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in max_size"""
+        logg = logging.getLogger(f"c.{__name__}.evict")
+
+        all_pf_samples = [
+            pf for pf in self.cache_dir.glob("*.npy") if len(pf.suffixes) == 1
+        ]
+        entries = []
+        tot_size = 0
+        for pf_samples in all_pf_samples:
+            pf_layout = pf_samples.with_suffix(".idx.npy")
+            try:
+                stat = pf_samples.stat()
+                size = stat.st_size
+                if pf_layout.exists():
+                    size += pf_layout.stat().st_size
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, size, pf_samples, pf_layout))
+            tot_size += size
+
+        # oldest first
+        entries.sort(key=lambda e: e[0])
+        for _, size, pf_samples, pf_layout in entries:
+            if tot_size <= self.max_size:
+                break
+            logg.debug(f"Evicting {pf_samples.stem}")
+            for pf in (pf_samples, pf_layout):
+                try:
+                    pf.unlink()
+                except FileNotFoundError:
+                    pass
+            tot_size -= size
+
+    def clear(self) -> None:
+        """Remove all the entries"""
+        for pf in self.cache_dir.glob("*.npy"):
+            pf.unlink()
@@ -0,0 +1,79 @@
+import logging
+import multiprocessing as mp
+
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+
+class SegmentWorker:
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        """Compute segments in a pool of background processes
+
+        Each job has a key: submitting a new job with the same key replaces the
+        old one, that is cancelled if it did not start yet, and its result is
+        discarded if it did. The results are handed to the on_done callbacks
+        only in collect, so that they can be applied on the GUI thread.
+        """
+        logg = logging.getLogger(f"c.{__class__.__name__}.init")
+        logg.info(f"Start init with {max_workers} workers")
+
+        # spawn the workers, forking a process that runs Tk is not safe
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=mp.get_context("spawn")
+        )
+
+        # the latest job for each key { key : (future, on_done) }
+        self.pending: Dict[Hashable, Tuple[Future, Callable]] = {}
+
+    def submit(self, key: Hashable, on_done: Callable, func: Callable, *args) -> None:
+        """Compute func(*args) in the background, replacing the job with this key
+
+        func and args must be picklable
+        """
+        if key in self.pending:
+            old_future, _ = self.pending[key]
+            old_future.cancel()
+
+        future = self.executor.submit(func, *args)
+        self.pending[key] = (future, on_done)
+
+    def is_pending(self, key: Hashable) -> bool:
+        """Check if there is a job with this key that was not collected yet"""
+        return key in self.pending
+
+    def collect(self) -> int:
+        """Call on_done(result) for all the finished jobs, return how many"""
+        logg = logging.getLogger(f"c.{__class__.__name__}.collect")
+
+        done_keys = [key for key, (fut, _) in self.pending.items() if fut.done()]
+
+        num_done = 0
+        for key in done_keys:
+            future, on_done = self.pending.pop(key)
+            if future.cancelled():
+                continue
+            if future.exception() is not None:
+                logg.warn(f"Job {key} failed: {future.exception()!r}")
+                continue
+            on_done(future.result())
+            num_done += 1
+
+        return num_done
+
+    def wait(self) -> int:
+        """Wait for all the pending jobs and collect them"""
+        num_done = 0
+        while len(self.pending) > 0:
+            for future, _ in list(self.pending.values()):
+                if not future.cancelled():
+                    future.exception()
+            num_done += self.collect()
+        return num_done
+
+    def shutdown(self) -> None:
+        """Drop the pending jobs and stop the workers"""
+        for future, _ in self.pending.values():
+            future.cancel()
+        self.pending = {}
+        self.executor.shutdown(wait=False)
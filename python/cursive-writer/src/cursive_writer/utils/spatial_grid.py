@@ -0,0 +1,111 @@
+import math
+
+from typing import Dict, Hashable, Iterable, Optional, Set, Tuple
+
+# a box as (left, top, right, bottom), like ImageCropper.region
+Box = Tuple[float, float, float, float]
+
+
+class SpatialGrid:
+    def __init__(self, cell_size: float = 64) -> None:
+        """Uniform grid of buckets, to find the items in a box
+
+        Each item has a key and a bounding box, and is saved in all the cells
+        that the box touches. A point is a box with no area.
+        """
+        self.cell_size = cell_size
+
+        # { (cell_x, cell_y) : {key, ...} }
+        self.cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        # { key : box }
+        self.boxes: Dict[Hashable, Box] = {}
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.boxes
+
+    def cell_range(self, box: Box) -> Tuple[range, range]:
+        """The ranges of cell indexes covered by the box"""
+        left, top, right, bottom = box
+        cs = self.cell_size
+        range_x = range(math.floor(left / cs), math.floor(right / cs) + 1)
+        range_y = range(math.floor(top / cs), math.floor(bottom / cs) + 1)
+        return range_x, range_y
+
+    def insert(self, key: Hashable, box: Box) -> None:
+        """Add the item, or move it if the key is already in the grid"""
+        if key in self.boxes:
+            if self.boxes[key] == box:
+                return
+            self.remove(key)
+
+        self.boxes[key] = box
+        range_x, range_y = self.cell_range(box)
+        for cx in range_x:
+            for cy in range_y:
+                self.cells.setdefault((cx, cy), set()).add(key)
+
+    def insert_point(self, key: Hashable, x: float, y: float) -> None:
+        """Add a point, or move it if the key is already in the grid"""
+        self.insert(key, (x, y, x, y))
+
+    def remove(self, key: Hashable) -> None:
+        """Remove the item, if it is in the grid"""
+        if key not in self.boxes:
+            return
+
+        range_x, range_y = self.cell_range(self.boxes.pop(key))
+        for cx in range_x:
+            for cy in range_y:
+                cell = self.cells[(cx, cy)]
+                cell.discard(key)
+                if len(cell) == 0:
+                    del self.cells[(cx, cy)]
+
+    def query(self, box: Box) -> Set[Hashable]:
+        """Keys of the items whose box intersects the box"""
+        left, top, right, bottom = box
+        range_x, range_y = self.cell_range(box)
+
+        # if the box covers more cells than there are items, check them all
+        if len(range_x) * len(range_y) > len(self.boxes):
+            candidates: Iterable[Hashable] = self.boxes.keys()
+        else:
+            candidates = set()
+            for cx in range_x:
+                for cy in range_y:
+                    if (cx, cy) in self.cells:
+                        candidates.update(self.cells[(cx, cy)])
+
+        found = set()
+        for key in candidates:
+            b_left, b_top, b_right, b_bottom = self.boxes[key]
+            if (
+                b_left <= right
+                and left <= b_right
+                and b_top <= bottom
+                and top <= b_bottom
+            ):
+                found.add(key)
+        return found
+
+    def nearest(self, x: float, y: float, max_dist: float) -> Optional[Hashable]:
+        """Key of the item with the box closest to (x, y), within max_dist"""
+        candidates = self.query(
+            (x - max_dist, y - max_dist, x + max_dist, y + max_dist)
+        )
+
+        best_key = None
+        best_dist = max_dist
+        for key in candidates:
+            b_left, b_top, b_right, b_bottom = self.boxes[key]
+            # distance from the point to the box
+            dx = max(b_left - x, 0, x - b_right)
+            dy = max(b_top - y, 0, y - b_bottom)
+            dist = math.hypot(dx, dy)
+            if dist <= best_dist:
+                best_key = key
+                best_dist = dist
+        return best_key
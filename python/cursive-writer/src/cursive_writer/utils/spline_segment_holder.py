@@ -1,10 +1,29 @@
 import logging
 import copy
+import math
+import numpy as np  # type: ignore
+
+from functools import partial
 
 from cursive_writer.utils.utils import iterate_double_list
 from cursive_writer.utils.color_utils import fmt_cn
 from cursive_writer.spliner.spliner import compute_cubic_segment
 from cursive_writer.spliner.spliner import compute_thick_spline
+from cursive_writer.utils.spatial_grid import SpatialGrid
+
+
+def sample_segment_points(p0, p1, thickness=-1):
+    """Compute the points of the segment between p0 and p1
+
+    If thickness is not -1 compute the thick spline.
+    A module level function, so that it can run in a SegmentWorker
+    """
+    if thickness == -1:
+        x_segment, y_segment = compute_cubic_segment(p0, p1)
+    else:
+        x_segment, y_segment = compute_thick_spline(p0, p1, thickness)
+
+    return list(zip(x_segment, y_segment))
 
 
 class SplineSegmentHolder:
@@ -27,8 +46,32 @@ class SplineSegmentHolder:
 
         self.thickness = thickness
 
-    def update_data(self, new_all_SP, new_path_SP):
-        """TODO: what is update_data doing?"""
+        # the points used to compute each segment { pair : (p0, p1) }
+        self.segment_ends = {}
+
+        # segments sampled at different levels of detail, as arrays
+        # { pair : { level : (x, y) } }, the level l has a sample every 2**l
+        # pixels in absolute coordinates
+        self.lod_segments = {}
+        # how many view pixels between two samples, at least
+        self.lod_view_step = 2
+        # the range of levels available
+        self.lod_min_level = -3
+        self.lod_max_level = 6
+
+        # set when a segment is updated, the owner can reset it
+        self.updated = False
+
+        # the bounding boxes of the segments, to find the ones in a region
+        self.segment_grid = SpatialGrid()
+
+    def update_data(self, new_all_SP, new_path_SP, worker=None):
+        """TODO: what is update_data doing?
+
+        If a SegmentWorker is passed, the changed segments are computed in the
+        background, and set when the worker collects them: until then the old
+        version of the segment, if any, is kept.
+        """
         logg = logging.getLogger(f"c.{self.cn}.update_data")
         # logg.setLevel("TRACE")
         logg.info(f"Start {fmt_cn('update_data')}")
@@ -67,7 +110,10 @@ class SplineSegmentHolder:
                 ):
 
                     # check if the segment between them is already computed
-                    if pair in self.segments:
+                    # or will be soon
+                    if pair in self.segments or (
+                        worker is not None and worker.is_pending((id(self), pair))
+                    ):
                         # nothing to recompute
                         logg.log(5, f"Already computed pair: {pair}")
 
@@ -84,10 +130,20 @@ class SplineSegmentHolder:
             self.cached_pos[spid0] = copy.copy(new_all_SP[spid0])
 
             # use the right point from the new data arriving
-            self.segments[pair] = self.compute_segment_points(
-                self.cached_pos[spid0],
-                new_all_SP[spid1],
-            )
+            p0 = self.cached_pos[spid0]
+            p1 = copy.copy(new_all_SP[spid1])
+            if worker is None:
+                self.set_segment(pair, p0, p1, self.compute_segment_points(p0, p1))
+            else:
+                # a newer job for the same pair replaces the stale one
+                worker.submit(
+                    (id(self), pair),
+                    partial(self.set_segment, pair, p0, p1),
+                    sample_segment_points,
+                    p0,
+                    p1,
+                    self.thickness,
+                )
 
             # get ready for next iteration
             spid0 = spid1
@@ -97,25 +153,80 @@ class SplineSegmentHolder:
 
         # MAYBE do clean up of unused segments
 
+    def set_segment(self, pair, p0, p1, the_points):
+        """Save the points of the segment computed between p0 and p1"""
+        self.segments[pair] = the_points
+
+        if len(the_points) > 0:
+            all_x, all_y = zip(*the_points)
+            self.segment_grid.insert(
+                pair, (min(all_x), min(all_y), max(all_x), max(all_y))
+            )
+        else:
+            self.segment_grid.remove(pair)
+
+        # the levels of detail will be sampled again when needed
+        self.segment_ends[pair] = (p0, p1)
+        self.lod_segments.pop(pair, None)
+
+        self.updated = True
+
     def compute_segment_points(self, p0, p1):
         """TODO: what is compute_segment_points doing?
 
-        TODO: do this with multiprocessing
-        MAYBE: resample the segment with different precision for different zoom levels?
+        To compute it in the background, pass a SegmentWorker to update_data
+        The segment is resampled for different zoom levels in get_segment_lod
         """
         logg = logging.getLogger(f"c.{self.cn}.compute_segment_points")
         # logg.setLevel("TRACE")
         logg.log(5, f"Start {fmt_cn('compute_segment_points')} {p0} :: {p1}")
 
-        # if thickness is set, compute the thick spline
-        if self.thickness == -1:
-            x_segment, y_segment = compute_cubic_segment(p0, p1)
-        else:
-            logg.log(5, f"self.thickness: {self.thickness}")
-            x_segment, y_segment = compute_thick_spline(p0, p1, self.thickness)
-
-        the_points = list(zip(x_segment, y_segment))
+        the_points = sample_segment_points(p0, p1, self.thickness)
 
         logg.log(5, f"the_points: {the_points}")
 
         return the_points
+
+    def find_lod_level(self, zoom: float) -> int:
+        """Find the level of detail to use at the current zoom
+
+        The samples must be at least lod_view_step pixels apart in the view:
+        at level l they are 2**l pixels apart in the image, 2**l * zoom in view
+        """
+        level = math.floor(math.log2(self.lod_view_step / zoom))
+        return min(max(level, self.lod_min_level), self.lod_max_level)
+
+    def get_segment_lod(self, pair, zoom: float):
+        """Get the points of the segment sampled for the current zoom
+
+        Returns two arrays x, y in absolute coordinates.
+        The coarse levels keep one point every 2**l of the computed segment,
+        the fine ones sample the cubic again with a smaller step.
+        Only works on the thin segments.
+        """
+        level = self.find_lod_level(zoom)
+
+        pair_lod = self.lod_segments.setdefault(pair, {})
+        if level in pair_lod:
+            return pair_lod[level]
+
+        if level < 0:
+            p0, p1 = self.segment_ends[pair]
+            x_segment, y_segment = compute_cubic_segment(p0, p1, x_step=2 ** level)
+            x_segment = np.asarray(x_segment, dtype=float)
+            y_segment = np.asarray(y_segment, dtype=float)
+
+        else:
+            seg_pts = np.array(self.segments[pair], dtype=float).reshape(-1, 2)
+            x_all = seg_pts[:, 0]
+            y_all = seg_pts[:, 1]
+
+            # keep the last point as well, to connect to the next segment
+            x_segment = x_all[:: 2 ** level]
+            y_segment = y_all[:: 2 ** level]
+            if len(x_all) > 0 and (len(x_all) - 1) % 2 ** level != 0:
+                x_segment = np.append(x_segment, x_all[-1])
+                y_segment = np.append(y_segment, y_all[-1])
+
+        pair_lod[level] = (x_segment, y_segment)
+        return pair_lod[level]
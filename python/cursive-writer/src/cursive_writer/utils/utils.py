@@ -1,5 +1,6 @@
 import logging
 import json
+import mmap
 import numpy as np  # type: ignore
 
 from hashlib import sha1
@@ -10,9 +11,16 @@ from cursive_writer.utils.type_utils import DArray, Glyph, Spline
 
 from cursive_writer.utils.color_utils import fmt_cn
 from cursive_writer.utils.oriented_point import OrientedPoint
+from cursive_writer.utils.oriented_point_array import SplineArray
 
 T = TypeVar("T")
 
+# the binary spline format: the magic, the version and the number of glyphs,
+# the number of points in each glyph, then x, y, ori_deg of all the points
+SPLINE_BIN_SUFFIX = ".spl"
+SPLINE_BIN_MAGIC = b"CWSPLINE"
+SPLINE_BIN_VERSION = 1
+
 
 def iterate_double_list(the_list: Iterable[Iterable[T]]) -> Iterator[T]:
     """Iterate over the elements of a list of lists
@@ -114,11 +122,122 @@ def load_spline(pf_input_spline: Path, dx: float = 0, dy: float = 0) -> Spline:
     return spline
 
 
+def hash_spline_array(spline_arr: SplineArray) -> str:
+    """The sha1 of the packed glyph lengths and points of the spline
+
+    The bytes are the same that save_spline_bin writes after the header, so
+    the text and the binary files of a spline have the same hash
+    """
+    hash_sha1 = sha1()
+    hash_sha1.update(np.asarray(spline_arr.glyph_len, dtype="<i8").tobytes())
+    hash_sha1.update(np.ascontiguousarray(spline_arr.data, dtype="<f8").tobytes())
+    return hash_sha1.hexdigest()
+
+
 def compute_hash_spline(pf_spline: Path) -> str:
-    """TODO: what is compute_hash_spline doing?"""
-    # logg = logging.getLogger(f"c.{__name__}.compute_hash_spline")
-    # logg.debug(f"Start compute_hash_spline")
+    """The sha1 of the points of the spline, loaded from the text files"""
+    return hash_spline_array(SplineArray.from_spline(load_spline(pf_spline)))
+
+
+def save_spline_bin(pf_spline_bin: Path, spline_arr: SplineArray) -> None:
+    """Save the spline in the binary format
+
+    After the 8 bytes magic there are the version and the number of glyphs, then
+    the number of points in each glyph, all little endian int64, then the
+    (N, 3) array of x, y, ori_deg of the points, little endian float64
+    """
+    header = np.array(
+        [SPLINE_BIN_VERSION, spline_arr.num_glyphs, *spline_arr.glyph_len],
+        dtype="<i8",
+    )
+    with pf_spline_bin.open("wb") as f:
+        f.write(SPLINE_BIN_MAGIC)
+        f.write(header.tobytes())
+        f.write(spline_arr.data.astype("<f8").tobytes())
 
+
+def load_spline_bin(pf_spline_bin: Path) -> Tuple[SplineArray, str]:
+    """Load a spline in the binary format, and its sha1
+
+    The file is mapped in memory, copy on write: the points are a view on the
+    mapped file, and the hash is computed on the same pages, see hash_spline_array
+    """
+    with pf_spline_bin.open("rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except ValueError:
+            raise ValueError(f"Empty spline file {pf_spline_bin}")
+
+    magic_len = len(SPLINE_BIN_MAGIC)
+    if mm[:magic_len] != SPLINE_BIN_MAGIC:
+        raise ValueError(f"Not a binary spline file {pf_spline_bin}")
+    version, num_glyphs = np.frombuffer(mm, dtype="<i8", count=2, offset=magic_len)
+    if version != SPLINE_BIN_VERSION:
+        raise ValueError(f"Unknown version {version} of {pf_spline_bin}")
+
+    glyph_len = np.frombuffer(mm, dtype="<i8", count=num_glyphs, offset=magic_len + 16)
+    num_points = int(glyph_len.sum())
+    data_offset = magic_len + 16 + 8 * int(num_glyphs)
+    data = np.frombuffer(mm, dtype="<f8", count=num_points * 3, offset=data_offset)
+
+    # the packed glyph_len and data, without the header
+    with memoryview(mm) as mv:
+        hash_sha1 = sha1(mv[magic_len + 16 : data_offset + data.nbytes]).hexdigest()
+
+    return SplineArray(data.reshape(-1, 3), glyph_len.tolist()), hash_sha1
+
+
+def convert_spline(pf_spline: Path) -> Path:
+    """Convert a spline from the text files to the binary format
+
+    The binary file is saved next to the spline file, with SPLINE_BIN_SUFFIX
+    """
+    spline_arr = SplineArray.from_spline(load_spline(pf_spline))
+    pf_spline_bin = pf_spline.with_suffix(SPLINE_BIN_SUFFIX)
+    save_spline_bin(pf_spline_bin, spline_arr)
+    return pf_spline_bin
+
+
+def find_spline_file(pf_spline: Path) -> Path:
+    """Use the binary version of the spline if it is newer than the text files
+
+    The text files are only checked with stat, the glyph points are not read
+    """
+    pf_spline_bin = pf_spline.with_suffix(SPLINE_BIN_SUFFIX)
+    if not pf_spline_bin.exists():
+        return pf_spline
+
+    bin_mtime = pf_spline_bin.stat().st_mtime
+    if pf_spline.stat().st_mtime > bin_mtime:
+        return pf_spline
+
+    data_dir = pf_spline.parent
+    with pf_spline.open() as fs:
+        for line in fs:
+            glyph_name, _, _ = line.rstrip().split("\t")
+            current_glyph = data_dir / glyph_name
+            if current_glyph.exists() and current_glyph.stat().st_mtime > bin_mtime:
+                return pf_spline
+
+    return pf_spline_bin
+
+
+def load_spline_hashed(pf_spline: Path) -> Tuple[SplineArray, str]:
+    """Load the spline and its sha1, from the binary version if it is up to date"""
+    pf_spline_load = find_spline_file(pf_spline)
+    if pf_spline_load.suffix == SPLINE_BIN_SUFFIX:
+        return load_spline_bin(pf_spline_load)
+
+    spline_arr = SplineArray.from_spline(load_spline(pf_spline))
+    return spline_arr, hash_spline_array(spline_arr)
+
+
+def compute_fingerprint_spline(pf_spline: Path) -> str:
+    """The sha1 of the bytes of the text files of the spline
+
+    Cheaper than compute_hash_spline, as the points are not parsed: use it to
+    check if the spline changed, and the hash of the points as the cache key
+    """
     # the glyphs in the spline must be in the same folder
     data_dir = pf_spline.parent
 
@@ -130,7 +249,9 @@ def compute_hash_spline(pf_spline: Path) -> str:
         for line in fs:
             glyph_name, _, _ = line.rstrip().split("\t")
             current_glyph = data_dir / glyph_name
-            hash_sha1.update(current_glyph.read_bytes())
+            # the missing glyphs are skipped by load_spline
+            if current_glyph.exists():
+                hash_sha1.update(current_glyph.read_bytes())
 
     return hash_sha1.hexdigest()
 
@@ -148,10 +269,16 @@ def print_coeff(coeff: DArray) -> str:
 
 
 class OrientedPointEncoder(json.JSONEncoder):
-    """Encoder for an OrientedPoint"""
+    """Encoder for an OrientedPoint and a SplineArray"""
 
     def default(self, obj):
         """TODO: what is default doing?"""
+        if isinstance(obj, SplineArray):
+            return {
+                "_type": "SplineArray",
+                "data": obj.data.tolist(),
+                "glyph_len": obj.glyph_len,
+            }
         if isinstance(obj, OrientedPoint):
             return {
                 "_type": "OrientedPoint",
@@ -163,7 +290,7 @@ class OrientedPointEncoder(json.JSONEncoder):
 
 
 class OrientedPointDecoder(json.JSONDecoder):
-    """Decoder for OrientedPoint"""
+    """Decoder for OrientedPoint and SplineArray"""
 
     def __init__(self, *args, **kwargs):
         """TODO: what is __init__ doing?"""
@@ -178,6 +305,9 @@ class OrientedPointDecoder(json.JSONDecoder):
             y = obj["y"]
             ori_deg = obj["ori_deg"]
             return OrientedPoint(x, y, ori_deg)
+        if obj["_type"] == "SplineArray":
+            data = np.array(obj["data"], dtype=float).reshape(-1, 3)
+            return SplineArray(data, obj["glyph_len"])
         return obj
 
 
@@ -0,0 +1,82 @@
+import numpy as np  # type: ignore
+import pytest
+from PIL import Image  # type: ignore
+
+from cursive_writer.gui_spline.tile_pyramid import TilePyramid
+
+
+def build_image(wid=700, hei=450):
+    # a smooth gradient with some stripes, so that the scaling is comparable
+    x = np.arange(wid)[None, :]
+    y = np.arange(hei)[:, None]
+    data = 128 + 60 * np.sin(x / 37) * np.cos(y / 23) + 40 * ((x // 50) % 2)
+    data = np.repeat(data[:, :, None], 3, axis=2)
+    return Image.fromarray(data.astype(np.uint8), "RGB")
+
+
+def test_levels():
+    pyramid = TilePyramid(build_image(), tile_size=64)
+    assert pyramid.num_levels == 5
+    assert pyramid.level_size(4) == (44, 29)
+    assert pyramid.find_level(2) == 0
+    assert pyramid.find_level(0.3) == 1
+    assert pyramid.find_level(0.01) == 4
+
+
+@pytest.mark.parametrize(
+    "region, resized_dim",
+    [
+        ((0, 0, 700, 450), (350, 225)),
+        ((0, 0, 700, 450), (140, 90)),
+        ((100.5, 30.2, 300.5, 130.2), (400, 200)),
+        ((333, 111, 699, 449), (183, 169)),
+    ],
+)
+def test_render(region, resized_dim):
+    image = build_image()
+    pyramid = TilePyramid(image, tile_size=64)
+    for mode in [Image.NEAREST, Image.LANCZOS]:
+        expected = np.asarray(image.resize(resized_dim, mode, region), dtype=float)
+        rendered = np.asarray(pyramid.render(region, resized_dim, mode), dtype=float)
+        assert rendered.shape == expected.shape
+        assert np.mean(np.abs(rendered - expected)) < 3
+
+
+def test_disk_cache(tmp_path):
+    image = build_image()
+    pyramid = TilePyramid(image, tile_size=64, cache_dir=tmp_path, cache_key="hp")
+    rendered = pyramid.render((0, 0, 700, 450), (100, 64), Image.LANCZOS)
+    assert len(list((tmp_path / "hp").glob("*.png"))) > 0
+
+    # a new pyramid loads the tiles from disk
+    blank = Image.new("RGB", image.size)
+    pyramid = TilePyramid(blank, tile_size=64, cache_dir=tmp_path, cache_key="hp")
+    cached = pyramid.render((0, 0, 700, 450), (100, 64), Image.LANCZOS)
+    assert np.array_equal(np.asarray(cached), np.asarray(rendered))
+
+
+def test_lru():
+    pyramid = TilePyramid(build_image(), tile_size=64, max_tiles=4)
+    pyramid.render((0, 0, 700, 450), (350, 225), Image.NEAREST)
+    assert len(pyramid.tiles) == 4
+
+    # the level 0 tiles are crops of the image, never cached
+    pyramid.render((0, 0, 700, 450), (700, 450), Image.NEAREST)
+    assert all(level > 0 for level, _, _ in pyramid.tiles)
+
+
+def test_evict(tmp_path):
+    image = build_image()
+    pyramid = TilePyramid(image, tile_size=64, cache_dir=tmp_path, cache_key="hp")
+    pyramid.render((0, 0, 700, 450), (350, 225), Image.NEAREST)
+    all_pf_tile = list((tmp_path / "hp").glob("*.png"))
+    tot_size = sum(pf.stat().st_size for pf in all_pf_tile)
+
+    # the cache holds about half the tiles
+    pyramid = TilePyramid(
+        image, 64, cache_dir=tmp_path, cache_key="hp2", max_cache_size=tot_size
+    )
+    pyramid.render((0, 0, 700, 450), (350, 225), Image.NEAREST)
+    all_size = [pf.stat().st_size for pf in tmp_path.glob("*/*.png")]
+    assert sum(all_size) <= tot_size
+    assert len(list((tmp_path / "hp2").glob("*.png"))) == len(all_pf_tile)
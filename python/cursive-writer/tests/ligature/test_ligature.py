@@ -0,0 +1,48 @@
+import numpy as np  # type: ignore
+import pytest
+
+from cursive_writer.ligature.ligature import find_best_shift
+from cursive_writer.spliner.spliner import compute_aligned_glyph
+from cursive_writer.utils.oriented_point import OrientedPoint
+
+
+@pytest.mark.parametrize("x_stride", [1, 0.5])
+def test_find_best_shift_batch(x_stride):
+    gly_seq_l = [OrientedPoint(0, 0, 0), OrientedPoint(100, 60, 45)]
+    gly_seq_r = [
+        OrientedPoint(0, 0, 60),
+        OrientedPoint(50, 60, 0),
+        OrientedPoint(100, 0, -60),
+    ]
+    _, l_x_as, l_y_as, l_yp_as = compute_aligned_glyph(gly_seq_l, x_stride)
+    _, r_x_orig_as, r_y_as, r_yp_as = compute_aligned_glyph(gly_seq_r, x_stride)
+    args = (l_x_as, l_y_as, l_yp_as, r_x_orig_as, r_y_as, r_yp_as, x_stride)
+
+    loop_res = find_best_shift(*args, batch=False)
+    batch_res = find_best_shift(*args, batch=True)
+
+    for loop_val, batch_val in zip(loop_res, batch_res):
+        if isinstance(loop_val, np.ndarray):
+            assert np.array_equal(loop_val, batch_val)
+        elif isinstance(loop_val, OrientedPoint):
+            assert loop_val.x == batch_val.x
+            assert loop_val.y == batch_val.y
+            assert loop_val.ori_deg == batch_val.ori_deg
+        else:
+            assert loop_val == batch_val
+
+
+def test_find_best_shift_coarse():
+    gly_seq_l = [OrientedPoint(0, 0, 0), OrientedPoint(100, 60, 45)]
+    gly_seq_r = [
+        OrientedPoint(0, 0, 60),
+        OrientedPoint(50, 60, 0),
+        OrientedPoint(100, 0, -60),
+    ]
+    _, l_x_as, l_y_as, l_yp_as = compute_aligned_glyph(gly_seq_l, 1)
+    _, r_x_orig_as, r_y_as, r_yp_as = compute_aligned_glyph(gly_seq_r, 1)
+    args = (l_x_as, l_y_as, l_yp_as, r_x_orig_as, r_y_as, r_yp_as, 1)
+
+    best_shift, *_ = find_best_shift(*args, batch=False)
+    coarse_shift, *_ = find_best_shift(*args, coarse_step=4)
+    assert coarse_shift == best_shift
@@ -0,0 +1,54 @@
+from cursive_writer.ligature.ligature_info import LigatureInfo
+from cursive_writer.ligature.ligature_store import LigatureStore
+from cursive_writer.utils.oriented_point import OrientedPoint
+
+
+def build_ligature_info(shift):
+    return LigatureInfo(
+        f_pf_name="a.txt",
+        s_pf_name="b.txt",
+        f_let_type="alone",
+        s_let_type="low",
+        spline_seq_con=[[OrientedPoint(1, 2, 30), OrientedPoint(3, 4, -170)]],
+        f_gly_chop=[OrientedPoint(0, 0, 0)],
+        s_gly_chop=[OrientedPoint(5, 6, 45), OrientedPoint(7, 8, 90)],
+        shift=shift,
+        f_hash_sha1="f_hash",
+        s_hash_sha1="s_hash",
+    )
+
+
+def test_ligature_store_roundtrip(tmp_path):
+    pf_store = tmp_path / "store.bin"
+    store = LigatureStore(pf_store)
+    assert store.get("ab") is None
+
+    store.add("ab", build_ligature_info(12.5))
+    store.save()
+    store.add("ba", build_ligature_info(-3))
+    store.save()
+
+    loaded_store = LigatureStore(pf_store)
+    assert len(loaded_store) == 2
+    for pair, shift in [("ab", 12.5), ("ba", -3)]:
+        loaded = loaded_store.get(pair)
+        original = build_ligature_info(shift)
+        assert loaded.shift == shift
+        assert loaded.f_hash_sha1 == original.f_hash_sha1
+        assert loaded.s_let_type == original.s_let_type
+        assert loaded.f_gly_chop == original.f_gly_chop
+        assert loaded.s_gly_chop == original.s_gly_chop
+        assert loaded.spline_seq_con == original.spline_seq_con
+
+
+def test_ligature_store_overwrite(tmp_path):
+    pf_store = tmp_path / "store.bin"
+    store = LigatureStore(pf_store)
+    store.add("ab", build_ligature_info(1))
+    store.save()
+    store.add("ab", build_ligature_info(2))
+    store.save()
+
+    loaded_store = LigatureStore(pf_store)
+    assert len(loaded_store) == 1
+    assert loaded_store.get("ab").shift == 2
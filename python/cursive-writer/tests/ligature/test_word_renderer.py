@@ -0,0 +1,98 @@
+import numpy as np  # type: ignore
+import shutil
+
+from pathlib import Path
+
+from cursive_writer.ligature.letter_class import Letter
+from cursive_writer.ligature.ligature_store import LigatureStore
+from cursive_writer.ligature.word_renderer import WordRenderer
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "src" / "cursive_writer" / "data"
+
+
+def load_test_letters(data_dir):
+    """Load i and m from their spline files in data_dir"""
+    letters_info = {}
+    letters_info["i"] = Letter(
+        "i",
+        left_type="low_up",
+        right_type="low_up",
+        pf_spline_low=data_dir / "i" / "i2_l_dot_000.txt",
+        pf_spline_high=data_dir / "i" / "i2_h_dot_000.txt",
+    )
+    letters_info["m"] = Letter(
+        "m",
+        left_type="high_down",
+        right_type="low_up",
+        pf_spline_alone=data_dir / "m" / "m2_000.txt",
+    )
+    return letters_info
+
+
+def test_word_renderer_refresh(tmp_path):
+    # work on a copy of the letters, to edit them
+    for letter in ["i", "m"]:
+        shutil.copytree(DATA_DIR / letter, tmp_path / letter)
+    letters_info = load_test_letters(tmp_path)
+    ligature_store = LigatureStore(tmp_path / "ligature_store.bin")
+    renderer = WordRenderer(letters_info, ligature_store, tmp_path, max_words=8)
+
+    word_ii = renderer.render("ii", 5)
+    word_mi = renderer.render("mi", 5)
+    con_ii = renderer.get_thick_con("ii", 5)
+    assert renderer.render("ii", 5) is word_ii
+    assert renderer.refresh() == set()
+    assert renderer.render("mi", 5) is word_mi
+
+    # move a glyph of m
+    pf_glyph = tmp_path / "m" / "m2_000_002.txt"
+    lines = pf_glyph.read_text().splitlines()
+    moved = []
+    for line in lines:
+        x, y, ori_deg = line.split("\t")
+        moved.append(f"{x}\t{float(y) + 3}\t{ori_deg}")
+    pf_glyph.write_text("\n".join(moved) + "\n")
+
+    assert renderer.refresh() == {("m", "alone")}
+    assert "mi" not in renderer.ligature_info
+    assert renderer.get_thick_con("ii", 5) is con_ii
+    assert renderer.render("ii", 5) is word_ii
+
+    # the word with m is built again, from the new spline
+    new_word_mi = renderer.render("mi", 5)
+    assert new_word_mi is not word_mi
+    assert renderer.ligature_info["mi"].f_hash_sha1 == letters_info["m"].get_hash(
+        "alone"
+    )
+    fresh_renderer = WordRenderer(load_test_letters(tmp_path), ligature_store, tmp_path)
+    fresh_word_mi = fresh_renderer.render("mi", 5)
+    for glyph, fresh_glyph in zip(new_word_mi, fresh_word_mi):
+        for segment, fresh_segment in zip(glyph, fresh_glyph):
+            assert np.array_equal(segment[0], fresh_segment[0])
+            assert np.array_equal(segment[1], fresh_segment[1])
+
+
+def test_word_renderer_max_words(tmp_path):
+    renderer = WordRenderer(
+        load_test_letters(DATA_DIR),
+        LigatureStore(tmp_path / "s.bin"),
+        DATA_DIR,
+        max_words=1,
+    )
+    word_i = renderer.render("i", 5)
+    assert renderer.render("i", 5) is word_i
+    renderer.render("m", 5)
+    assert renderer.render("i", 5) is not word_i
+    assert len(renderer.words) == 1
+
+
+def test_word_renderer_no_save(tmp_path):
+    pf_store = tmp_path / "s.bin"
+    renderer = WordRenderer(
+        load_test_letters(DATA_DIR),
+        LigatureStore(pf_store),
+        DATA_DIR,
+        save_ligatures=False,
+    )
+    renderer.render("mi", 5)
+    assert not pf_store.exists()
@@ -0,0 +1,126 @@
+import numpy as np  # type: ignore
+import pytest
+from pytest import approx
+
+from cursive_writer.spliner.spliner import build_contour
+from cursive_writer.spliner.spliner import build_contour_flat
+from cursive_writer.spliner.spliner import classify_contour_batch
+from cursive_writer.spliner.spliner import compute_thick_spline
+from cursive_writer.spliner.spliner import compute_thick_spline_batch
+from cursive_writer.spliner.spliner import sample_nat_segment_batch
+from cursive_writer.spliner.spliner import split_batch
+from cursive_writer.utils.oriented_point import OrientedPoint
+
+
+@pytest.mark.parametrize(
+    "p0, p1, thickness",
+    [
+        (OrientedPoint(0.3, 0.2, 10), OrientedPoint(40.7, 20.1, 30), 5),
+        (OrientedPoint(10.4, 50.3, -20), OrientedPoint(60.1, 30.6, 170), 8),
+        (OrientedPoint(100.2, 30.7, 100), OrientedPoint(70.3, 90.9, 120), 3),
+        (OrientedPoint(-20.3, -10.6, -80), OrientedPoint(-25.9, -60.2, -100), 10),
+    ],
+)
+def test_compute_thick_spline_batch(p0, p1, thickness):
+    segment_x, segment_y = compute_thick_spline(p0, p1, thickness)
+    p0s = np.array([[p0.x, p0.y, p0.ori_deg]])
+    p1s = np.array([[p1.x, p1.y, p1.ori_deg]])
+    thick_segments = compute_thick_spline_batch(p0s, p1s, thickness)
+    assert len(thick_segments) == 1
+    batch_x, batch_y = thick_segments[0]
+    assert batch_x == approx(segment_x)
+    assert batch_y == approx(segment_y)
+
+
+def test_compute_thick_spline_batch_glyph():
+    glyph = [
+        OrientedPoint(0.3, 0.2, 10),
+        OrientedPoint(40.7, 20.1, 30),
+        OrientedPoint(40.7, 20.1, 30),
+        OrientedPoint(60.2, 70.8, 95),
+    ]
+    glyph_points = np.array([(op.x, op.y, op.ori_deg) for op in glyph])
+    thick_segments = compute_thick_spline_batch(glyph_points[:-1], glyph_points[1:], 4)
+    assert len(thick_segments) == 3
+    # coincident points are kept as a single point
+    assert list(thick_segments[1][0]) == approx([40.7])
+    assert list(thick_segments[1][1]) == approx([20.1])
+    for i in [0, 2]:
+        segment_x, segment_y = compute_thick_spline(glyph[i], glyph[i + 1], 4)
+        assert thick_segments[i][0] == approx(segment_x)
+        assert thick_segments[i][1] == approx(segment_y)
+
+
+def test_compute_thick_spline_batch_empty():
+    assert compute_thick_spline_batch(np.empty((0, 3)), np.empty((0, 3)), 4) == []
+
+
+def test_build_contour_flat():
+    # short thick segments with sharp turns, so that the sides overlap in all
+    # the ways that build_contour handles
+    rng = np.random.default_rng(42)
+    num_seg = 500
+    thickness = 6
+    seg_len = rng.uniform(1, 30, num_seg)
+    ori_0 = np.radians(rng.uniform(-89, 89, num_seg) + 90)
+    ori_1 = np.radians(rng.uniform(-89, 89, num_seg) + 90)
+    y1 = rng.uniform(-10, 10, num_seg)
+    x0t, y0t = np.cos(ori_0) * thickness, np.sin(ori_0) * thickness
+    x1t, y1t = seg_len + np.cos(ori_1) * thickness, y1 + np.sin(ori_1) * thickness
+    x0b, y0b = -x0t, -y0t
+    x1b, y1b = 2 * seg_len - x1t, 2 * y1 - y1t
+
+    a_l = (y0b - y0t) / (x0b - x0t)
+    coeff_l = np.stack((a_l, y0t - a_l * x0t), axis=1)
+    a_r = (y1b - y1t) / (x1b - x1t)
+    coeff_r = np.stack((a_r, y1t - a_r * x1t), axis=1)
+    coeff_t = rng.normal(size=(num_seg, 4))
+    coeff_b = rng.normal(size=(num_seg, 4))
+    x_sample_t, y_segment_t, counts_t = sample_nat_segment_batch(x0t, x1t, coeff_t)
+    x_sample_b, y_segment_b, counts_b = sample_nat_segment_batch(x0b, x1b, coeff_b)
+
+    # the segments that build_contour can not handle are skipped
+    case_id, _, _ = classify_contour_batch(x0t, x0b, x1t, x1b, a_l, a_r)
+    all_x_st = split_batch(x_sample_t, counts_t)
+    all_y_st = split_batch(y_segment_t, counts_t)
+    all_x_sb = split_batch(x_sample_b, counts_b)
+    all_y_sb = split_batch(y_segment_b, counts_b)
+    good = np.zeros(num_seg, dtype=bool)
+    all_x_sample, cut_t, cut_b = [], [], []
+    for i in np.nonzero(case_id >= 0)[0]:
+        try:
+            ct, cb, xs = build_contour(
+                OrientedPoint(x0t[i], y0t[i], 0),
+                OrientedPoint(x0b[i], y0b[i], 0),
+                OrientedPoint(x1t[i], y1t[i], 0),
+                OrientedPoint(x1b[i], y1b[i], 0),
+                coeff_l[i],
+                coeff_r[i],
+                all_x_st[i],
+                all_y_st[i],
+                all_x_sb[i],
+                all_y_sb[i],
+                None,
+            )
+        except ValueError:
+            # build_contour fails when a side has no samples
+            continue
+        good[i] = True
+        all_x_sample.append(xs)
+        cut_t.append(ct[: len(xs)])
+        cut_b.append(cb[: len(xs)])
+    assert len(np.unique(case_id[good])) == 10
+    good_t = np.repeat(good, counts_t)
+    good_b = np.repeat(good, counts_b)
+
+    in_t = (x_sample_t[good_t], y_segment_t[good_t], counts_t[good])
+    in_b = (x_sample_b[good_b], y_segment_b[good_b], counts_b[good])
+    corners = (x0t[good], x0b[good], x1t[good], x1b[good])
+    x_sample, contour_t, contour_b, counts_x = build_contour_flat(
+        *corners, coeff_l[good], coeff_r[good], *in_t, *in_b
+    )
+
+    assert list(counts_x) == [len(xs) for xs in all_x_sample]
+    assert x_sample == approx(np.hstack(all_x_sample))
+    assert contour_t == approx(np.hstack(cut_t))
+    assert contour_b == approx(np.hstack(cut_b))
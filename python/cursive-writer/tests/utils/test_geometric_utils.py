@@ -1,7 +1,14 @@
+import math
+import numpy as np  # type: ignore
 import pytest
 from pytest import approx
 
+from cursive_writer.spliner.spliner import fit_cubic
+from cursive_writer.spliner.spliner import translate_points_to_origin
 from cursive_writer.utils.geometric_utils import collide_line_box
+from cursive_writer.utils.geometric_utils import rotate_coeff
+from cursive_writer.utils.geometric_utils import rotate_derive_coeff
+from cursive_writer.utils.geometric_utils import sample_parametric_aligned
 from cursive_writer.utils.oriented_point import OrientedPoint
 
 
@@ -53,3 +60,48 @@ def test_diagonal(bbox, line_point, expected):
     else:
         assert admissible_inter[0] == approx(expected[0])
         assert admissible_inter[1] == approx(expected[1])
+
+
+@pytest.mark.parametrize(
+    "p0, p1, x_stride",
+    [
+        (OrientedPoint(0, 0, 30), OrientedPoint(40, 10, -20), 1),
+        (OrientedPoint(3.4, 2, 60), OrientedPoint(50.2, -5, 10), 1),
+        (OrientedPoint(-7.3, 5, -45), OrientedPoint(20, 30, 80), 0.5),
+        (OrientedPoint(10, 10, 0), OrientedPoint(130, 0, 0), 2),
+    ],
+)
+def test_sample_parametric_aligned_newton(p0, p1, x_stride):
+    rot_p0, rot_p1, dir_01 = translate_points_to_origin(p0, p1)
+    coeff = fit_cubic(rot_p0, rot_p1)
+    x_rot_coeff, y_rot_coeff = rotate_coeff(coeff, dir_01)
+    x_rot_d_coeff, y_rot_d_coeff = rotate_derive_coeff(coeff, dir_01)
+    x_offset = math.ceil(p0.x / x_stride) * x_stride - p0.x
+    x_high = max(p1.x - p0.x, abs(p1.y - p0.y)) * 2
+
+    all_samples = {}
+    for root_finder in ["newton", "bisect"]:
+        all_samples[root_finder] = sample_parametric_aligned(
+            x_rot_coeff,
+            y_rot_coeff,
+            x_rot_d_coeff,
+            y_rot_d_coeff,
+            0,
+            p1.x - p0.x,
+            x_stride,
+            x_offset,
+            x_low=0,
+            x_high=x_high,
+            tolerance=1e-9,
+            root_finder=root_finder,
+        )
+    t_new, x_new, y_new, yp_new = all_samples["newton"]
+    t_bis, x_bis, y_bis, yp_bis = all_samples["bisect"]
+
+    assert np.array_equal(x_new, x_bis)
+    # the newton samples are exactly on the grid
+    assert np.polyval(x_rot_coeff, t_new) == approx(x_new, abs=1e-9)
+    # the bisection interpolates the dense oversample
+    assert t_new == approx(t_bis, abs=1e-3)
+    assert y_new == approx(y_bis, abs=1e-2)
+    assert yp_new == approx(yp_bis, abs=1e-2)
@@ -0,0 +1,79 @@
+import json
+import pytest
+from pytest import approx
+
+from cursive_writer.utils.geometric_utils import find_spline_sequence_bbox
+from cursive_writer.utils.geometric_utils import translate_spline_sequence
+from cursive_writer.utils.oriented_point import OrientedPoint
+from cursive_writer.utils.oriented_point_array import OrientedPointArray
+from cursive_writer.utils.oriented_point_array import SplineArray
+from cursive_writer.utils.utils import OrientedPointDecoder
+from cursive_writer.utils.utils import OrientedPointEncoder
+
+
+def build_spline():
+    glyph_0 = [OrientedPoint(0, 0, 0), OrientedPoint(10, 5, 45)]
+    glyph_1 = [
+        OrientedPoint(10, 5, 45),
+        OrientedPoint(20, -3, -90),
+        OrientedPoint(30, 1, 170),
+    ]
+    return [glyph_0, glyph_1]
+
+
+def test_spline_array_roundtrip():
+    spline = build_spline()
+    spline_arr = SplineArray.from_spline(spline)
+    assert spline_arr.num_glyphs == 2
+    assert len(spline_arr) == 5
+    assert spline_arr.to_spline() == spline
+
+
+def test_spline_array_views():
+    spline_arr = SplineArray.from_spline(build_spline())
+    view_spline = spline_arr.to_spline()
+    op = view_spline[1][1]
+    assert isinstance(op, OrientedPoint)
+    assert op.ori_slo == approx(OrientedPoint(20, -3, -90).ori_slo)
+
+    # changing a view changes the array, and the other way around
+    op.translate(1, 2)
+    assert spline_arr.glyph(1).x[1] == 21
+    assert spline_arr.data[3, 1] == -1
+    spline_arr.translate(-1, -2)
+    assert op.x == 20
+    assert op.y == -3
+
+
+def test_spline_array_translate_bbox():
+    spline = build_spline()
+    spline_arr = SplineArray.from_spline(spline)
+
+    translate_spline_sequence(spline, 3, -2)
+    translate_spline_sequence(spline_arr, 3, -2)
+    assert spline_arr.to_spline() == spline
+    assert find_spline_sequence_bbox(spline_arr) == find_spline_sequence_bbox(spline)
+
+
+@pytest.mark.parametrize("theta_deg", [30, 90, -135, 180])
+def test_oriented_point_array_rotate(theta_deg):
+    glyph = build_spline()[1]
+    glyph_arr = OrientedPointArray.from_glyph(glyph)
+    glyph_arr.rotate(theta_deg, center=(10, 5))
+
+    # the first point is the center
+    assert glyph_arr.x[0] == approx(10)
+    assert glyph_arr.y[0] == approx(5)
+    for op, rot_op in zip(glyph, glyph_arr):
+        expected = op.ori_deg + theta_deg
+        expected = OrientedPoint(0, 0, expected).ori_deg
+        assert rot_op.ori_deg == approx(expected)
+        assert -180 < rot_op.ori_deg <= 180
+
+
+def test_spline_array_json():
+    spline_arr = SplineArray.from_spline(build_spline())
+    encoded = json.dumps(spline_arr, cls=OrientedPointEncoder)
+    decoded = json.loads(encoded, cls=OrientedPointDecoder)
+    assert decoded.glyph_len == spline_arr.glyph_len
+    assert decoded.to_spline() == spline_arr.to_spline()
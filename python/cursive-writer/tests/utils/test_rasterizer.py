@@ -0,0 +1,72 @@
+import numpy as np  # type: ignore
+from pathlib import Path
+from pytest import approx
+
+from cursive_writer.spliner.spliner import compute_long_thick_contour
+from cursive_writer.spliner.spliner import compute_long_thick_spline
+from cursive_writer.utils.rasterizer import fill_polygons
+from cursive_writer.utils.rasterizer import rasterize_thick_contour
+from cursive_writer.utils.utils import load_spline
+
+
+def ink(image):
+    """How many pixels worth of ink are in the image"""
+    return np.sum(255 - image.astype(int)) / 255
+
+
+def test_fill_polygons():
+    # a triangle on a 4x4 grid, covering the lower left half of the pixels: on
+    # the diagonal only one of the four sub pixels has the center inside
+    coverage = fill_polygons([np.array([0.0, 8, 0])], [np.array([0.0, 8, 8])], 4, 4, 2)
+    assert coverage.shape == (4, 4)
+    assert np.all(np.diag(coverage) == approx(1 / 4))
+    assert np.all(coverage[np.tril_indices(4, -1)] == 1)
+    assert np.all(coverage[np.triu_indices(4, 1)] == 0)
+
+
+def test_rasterize_thick_contour_union():
+    # two overlapping rectangles and a single point inside them
+    rect_0 = (np.array([0.0, 10, 10, 0]), np.array([0.0, 0, 4, 4]))
+    rect_1 = (np.array([5.0, 15, 15, 5]), np.array([0.0, 0, 4, 4]))
+    dot = (np.array([3.0]), np.array([2.0]))
+    image = rasterize_thick_contour([[rect_0, rect_1], [dot]], margin=0)
+    assert image.shape == (5, 16)
+    assert ink(image) == approx(15 * 4, abs=0.1)
+
+
+def test_rasterize_thick_contour_flip():
+    # the y axis is flipped: the higher edge of the rectangle is in the first rows
+    rect = (np.array([0.0, 4, 4, 0]), np.array([1.0, 1, 3, 3]))
+    image = rasterize_thick_contour([[rect]], margin=2, supersample=2)
+    assert image.shape == (7, 9)
+    # the corners are on the pixel centers, the border pixels are half covered
+    assert np.all(image[3, 3:6] == 0)
+    assert np.all(image[2, 3:6] == 128)
+    assert np.all(image[4, 3:6] == 128)
+    assert image[2, 2] == 191
+    assert np.all(image[0:2] == 255)
+    assert np.all(image[5:] == 255)
+
+
+def test_rasterize_letter():
+    # each outline covers about as many pixels as the samples inside it
+    data_dir = Path(__file__).resolve().parents[2] / "src" / "cursive_writer" / "data"
+    spline_sequence = load_spline(data_dir / "i" / "i2_l_dot_000.txt")
+    thickness = 8
+    thick_spline = compute_long_thick_spline(spline_sequence, thickness)
+    thick_contour = compute_long_thick_contour(spline_sequence, thickness)
+    assert [len(glyph) for glyph in thick_contour] == [
+        len(glyph) for glyph in thick_spline
+    ]
+
+    num_samples = 0
+    num_ink = 0
+    for glyph_spline, glyph_contour in zip(thick_spline, thick_contour):
+        for seg_spline, seg_contour in zip(glyph_spline, glyph_contour):
+            num_samples += len(seg_spline[0])
+            num_ink += ink(rasterize_thick_contour([[seg_contour]]))
+    assert num_ink == approx(num_samples, rel=0.02)
+
+    # the segments overlap at the joints, so the whole letter has less ink
+    image = rasterize_thick_contour(thick_contour)
+    assert ink(image) < num_ink
@@ -0,0 +1,37 @@
+import numpy as np  # type: ignore
+
+from cursive_writer.utils.sample_cache import ThickSampleCache
+
+
+def build_thick_spline():
+    seg_0 = (np.array([0.0, 1.0, 2.0]), np.array([3.0, 4.0, 5.0]))
+    seg_1 = (np.array([6.0]), np.array([7.0]))
+    seg_2 = (np.array([8.0, 9.0]), np.array([10.0, 11.0]))
+    return [[seg_0, seg_1], [seg_2]]
+
+
+def test_sample_cache_roundtrip(tmp_path):
+    cache = ThickSampleCache(tmp_path / "cache")
+    thick_spline = build_thick_spline()
+
+    assert cache.load("abc", 10) is None
+    cache.save("abc", 10, thick_spline)
+
+    loaded = cache.load("abc", 10)
+    assert loaded is not None
+    assert len(loaded) == len(thick_spline)
+    for loaded_glyph, thick_glyph in zip(loaded, thick_spline):
+        assert len(loaded_glyph) == len(thick_glyph)
+        for loaded_seg, thick_seg in zip(loaded_glyph, thick_glyph):
+            assert np.array_equal(loaded_seg[0], thick_seg[0])
+            assert np.array_equal(loaded_seg[1], thick_seg[1])
+
+    # a different thickness or hash is a different entry
+    assert cache.load("abc", 11) is None
+    assert cache.load("abd", 10) is None
+
+
+def test_sample_cache_evict(tmp_path):
+    cache = ThickSampleCache(tmp_path / "cache", max_size=0)
+    cache.save("abc", 10, build_thick_spline())
+    assert cache.load("abc", 10) is None
@@ -0,0 +1,54 @@
+import pytest
+
+from cursive_writer.utils.segment_worker import SegmentWorker
+from cursive_writer.utils.spline_point import SplinePoint
+from cursive_writer.utils.spline_segment_holder import SplineSegmentHolder
+
+
+@pytest.fixture(scope="module")
+def worker():
+    worker = SegmentWorker(max_workers=1)
+    yield worker
+    worker.shutdown()
+
+
+def build_spline():
+    all_SP = {
+        0: SplinePoint(0, 0, 30, 0),
+        1: SplinePoint(100, 20, -10, 1),
+        2: SplinePoint(150, 80, 70, 2),
+    }
+    path = [[0, 1, 2]]
+    return all_SP, path
+
+
+@pytest.mark.parametrize("thickness", [-1, 10])
+def test_update_data_worker(worker, thickness):
+    all_SP, path = build_spline()
+    sync_holder = SplineSegmentHolder(thickness)
+    sync_holder.update_data(all_SP, path)
+
+    async_holder = SplineSegmentHolder(thickness)
+    async_holder.update_data(all_SP, path, worker)
+    assert len(async_holder.segments) == 0
+    assert worker.wait() == 2
+
+    assert async_holder.updated
+    assert async_holder.segments == sync_holder.segments
+
+
+def test_update_data_worker_stale(worker):
+    all_SP, path = build_spline()
+    holder = SplineSegmentHolder()
+
+    # move the point while the segments are being computed
+    holder.update_data(all_SP, path, worker)
+    all_SP[1] = SplinePoint(120, 40, 0, 1)
+    holder.update_data(all_SP, path, worker)
+    worker.wait()
+
+    # only the latest position is kept
+    sync_holder = SplineSegmentHolder()
+    sync_holder.update_data(all_SP, path)
+    assert holder.segments == sync_holder.segments
+    assert holder.segment_ends[(0, 1)][1] == all_SP[1]
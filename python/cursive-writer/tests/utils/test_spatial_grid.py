@@ -0,0 +1,55 @@
+import random
+
+from cursive_writer.utils.spatial_grid import SpatialGrid
+
+
+def build_grid(num_points=500):
+    random.seed(42)
+    grid = SpatialGrid(cell_size=16)
+    points = {}
+    for key in range(num_points):
+        x, y = random.uniform(-100, 300), random.uniform(-50, 200)
+        grid.insert_point(key, x, y)
+        points[key] = (x, y)
+    return grid, points
+
+
+def test_query_points():
+    grid, points = build_grid()
+    box = (10, 20, 90, 75)
+    expected = {
+        key
+        for key, (x, y) in points.items()
+        if box[0] <= x <= box[2] and box[1] <= y <= box[3]
+    }
+    assert grid.query(box) == expected
+    # a box larger than the grid checks all the items
+    assert grid.query((-1000, -1000, 1000, 1000)) == set(points)
+
+
+def test_move_remove():
+    grid, points = build_grid(10)
+    grid.insert_point(3, 1000, 1000)
+    assert grid.query((990, 990, 1010, 1010)) == {3}
+    grid.remove(3)
+    assert 3 not in grid
+    assert len(grid) == 9
+    assert grid.query((990, 990, 1010, 1010)) == set()
+
+
+def test_query_boxes():
+    grid = SpatialGrid(cell_size=10)
+    grid.insert("long", (0, 0, 100, 5))
+    grid.insert("small", (40, 40, 45, 45))
+    assert grid.query((90, -10, 95, 1)) == {"long"}
+    assert grid.query((44, 44, 60, 60)) == {"small"}
+    assert grid.query((20, 10, 30, 30)) == set()
+
+
+def test_nearest():
+    grid, points = build_grid()
+    for x, y in [(0, 0), (150, 100), (-80, 190)]:
+        key = grid.nearest(x, y, 50)
+        dist = lambda k: (points[k][0] - x) ** 2 + (points[k][1] - y) ** 2
+        assert key == min(points, key=dist)
+    assert grid.nearest(1000, 1000, 10) is None
@@ -0,0 +1,60 @@
+import numpy as np  # type: ignore
+from pytest import approx
+
+from cursive_writer.utils.spline_point import SplinePoint
+from cursive_writer.utils.spline_segment_holder import SplineSegmentHolder
+
+
+def build_holder():
+    all_SP = {
+        0: SplinePoint(0, 0, 30, 0),
+        1: SplinePoint(100, 20, -10, 1),
+        2: SplinePoint(150, 80, 70, 2),
+    }
+    path = [[0, 1, 2]]
+    holder = SplineSegmentHolder()
+    holder.update_data(all_SP, path)
+    return holder, all_SP, path
+
+
+def test_find_lod_level():
+    holder = SplineSegmentHolder()
+    assert holder.find_lod_level(1) == 1
+    assert holder.find_lod_level(2) == 0
+    assert holder.find_lod_level(0.25) == 3
+    assert holder.find_lod_level(1e-6) == holder.lod_max_level
+    assert holder.find_lod_level(1e6) == holder.lod_min_level
+
+
+def test_get_segment_lod():
+    holder, _, _ = build_holder()
+    pair = (0, 1)
+    full_x, full_y = np.array(holder.segments[pair]).T
+
+    # the full resolution segment
+    x, y = holder.get_segment_lod(pair, 2)
+    assert x == approx(full_x)
+    assert y == approx(full_y)
+
+    # a coarse level keeps the ends of the segment
+    x, y = holder.get_segment_lod(pair, 0.25)
+    assert len(x) < len(full_x) / 4 + 2
+    assert (x[0], y[0]) == approx((full_x[0], full_y[0]))
+    assert (x[-1], y[-1]) == approx((full_x[-1], full_y[-1]))
+
+    # a fine level has more samples on the same curve
+    x, y = holder.get_segment_lod(pair, 8)
+    assert len(x) > 3 * len(full_x)
+    assert x[::4][: len(full_x)] == approx(full_x)
+    assert y[::4][: len(full_y)] == approx(full_y)
+
+
+def test_get_segment_lod_invalidate():
+    holder, all_SP, path = build_holder()
+    pair = (0, 1)
+    x_old, _ = holder.get_segment_lod(pair, 0.5)
+
+    all_SP[1] = SplinePoint(200, 20, -10, 1)
+    holder.update_data(all_SP, path)
+    x_new, _ = holder.get_segment_lod(pair, 0.5)
+    assert x_new[-1] > x_old[-1]
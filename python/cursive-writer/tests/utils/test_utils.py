@@ -1,7 +1,20 @@
+import os
 import pytest
+import shutil
 
+from pathlib import Path
+
+from cursive_writer.utils.utils import compute_hash_spline
+from cursive_writer.utils.utils import compute_fingerprint_spline
+from cursive_writer.utils.utils import convert_spline
+from cursive_writer.utils.utils import find_spline_file
 from cursive_writer.utils.utils import iterate_double_list
 from cursive_writer.utils.utils import enumerate_double_list
+from cursive_writer.utils.utils import load_spline
+from cursive_writer.utils.utils import load_spline_bin
+from cursive_writer.utils.utils import load_spline_hashed
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "src" / "cursive_writer" / "data"
 
 
 def test_iterate_double_list():
@@ -32,3 +45,62 @@ def test_enumerate_double_list_empty():
     the_list = []
     enumerated = list(enumerate_double_list(the_list))
     assert len(enumerated) == 0
+
+
+def copy_letter(tmp_path):
+    """Copy the files of the m in tmp_path"""
+    shutil.copytree(DATA_DIR / "m", tmp_path / "m")
+    return tmp_path / "m" / "m2_000.txt"
+
+
+def test_spline_bin_roundtrip(tmp_path):
+    pf_spline = copy_letter(tmp_path)
+    spline_sequence = load_spline(pf_spline)
+
+    pf_spline_bin = convert_spline(pf_spline)
+    spline_arr, hash_sha1 = load_spline_bin(pf_spline_bin)
+    assert spline_arr.glyph_len == [len(glyph) for glyph in spline_sequence]
+    assert spline_arr.to_points() == spline_sequence
+    # the text and the binary files hash the same points
+    assert hash_sha1 == compute_hash_spline(pf_spline)
+
+    # the points can be changed, the file is not
+    spline_arr.translate(10, 0)
+    assert load_spline_bin(pf_spline_bin)[0].to_points() == spline_sequence
+
+
+def test_spline_bin_not_spline(tmp_path):
+    pf_bad = tmp_path / "bad.spl"
+    pf_bad.write_bytes(b"not a spline at all")
+    with pytest.raises(ValueError):
+        load_spline_bin(pf_bad)
+
+
+def test_find_spline_file(tmp_path):
+    pf_spline = copy_letter(tmp_path)
+    assert find_spline_file(pf_spline) == pf_spline
+    spline_arr, hash_sha1 = load_spline_hashed(pf_spline)
+    assert hash_sha1 == compute_hash_spline(pf_spline)
+
+    pf_spline_bin = convert_spline(pf_spline)
+    assert find_spline_file(pf_spline) == pf_spline_bin
+    bin_arr, _ = load_spline_hashed(pf_spline)
+    assert bin_arr.to_points() == spline_arr.to_points()
+
+    # a glyph edited after the conversion makes the binary version stale
+    pf_glyph = tmp_path / "m" / "m2_000_001.txt"
+    bin_mtime = pf_spline_bin.stat().st_mtime
+    os.utime(pf_glyph, (bin_mtime + 1, bin_mtime + 1))
+    assert find_spline_file(pf_spline) == pf_spline
+
+
+def test_compute_fingerprint_spline(tmp_path):
+    pf_spline = copy_letter(tmp_path)
+    fingerprint = compute_fingerprint_spline(pf_spline)
+    # the binary version does not change the text files
+    convert_spline(pf_spline)
+    assert compute_fingerprint_spline(pf_spline) == fingerprint
+
+    pf_glyph = tmp_path / "m" / "m2_000_001.txt"
+    pf_glyph.write_text(pf_glyph.read_text() + "1\t2\t3\n")
+    assert compute_fingerprint_spline(pf_spline) != fingerprint
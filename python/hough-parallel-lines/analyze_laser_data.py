@@ -141,6 +141,43 @@ def extract_filt_lr(sector_wid, ranges, angles_rad, range_min, range_max):
     return left_filt_x, left_filt_y, right_filt_x, right_filt_y
 
 
+def extract_filt_lr_batch(sector_wid, all_ranges, angles_rad, range_min, range_max):
+    """Extract and filter the LaserScan data of many scans at once
+
+    all_ranges is a (scan_num, ray_num) array, all the scans have the same
+    angles_rad. Returns the x, y of the left sector then the right one, like
+    extract_filt_lr, as (scan_num, sector_wid * 4) arrays: the points filtered
+    out are NaN.
+    """
+    # logg = logging.getLogger(f"c.{__name__}.extract_filt_lr_batch")
+    # logg.debug(f"Start extract_filt_lr_batch")
+
+    # get left and right values
+    left_center = 300
+    right_center = 100
+    sector_index = np.hstack(
+        (
+            np.arange(left_center - sector_wid, left_center + sector_wid),
+            np.arange(right_center - sector_wid, right_center + sector_wid),
+        )
+    )
+    sector_ranges = all_ranges[:, sector_index]
+
+    # the rays are the same in all the scans, compute cos/sin once
+    sector_angles_rad = angles_rad[sector_index]
+    sector_cos = np.cos(sector_angles_rad)
+    sector_sin = np.sin(sector_angles_rad)
+
+    # filter out overflow values
+    condition = (range_min < sector_ranges) & (sector_ranges < range_max)
+    sector_ranges_filt = np.where(condition, sector_ranges, np.nan)
+
+    all_filt_x = np.multiply(sector_ranges_filt, sector_cos)
+    all_filt_y = np.multiply(sector_ranges_filt, sector_sin)
+
+    return all_filt_x, all_filt_y
+
+
 def fit_parallel_lines(left_filt_x, left_filt_y, right_filt_x, right_filt_y):
     """Fit two lines separately in the data
     """
@@ -274,30 +311,17 @@ def do_hough_mat(data_x, data_y, th_values):
     uses np functions
     """
 
-    # distance from all points to the origin
-    all_LP_dist = np.sqrt(np.square(data_x) + np.square(data_y))
-
-    # direction from all points to origin
-    all_LP_rad = np.arctan2(data_y, data_x)
-
-    # use broadcasting to stretch the arrays into common shapes
-    # https://numpy.org/devdocs/user/theory.broadcasting.html#figure-4
-    all_rel_LP_rad = th_values[:, np.newaxis] - all_LP_rad
-
-    sin_all_rel_LP_rad = np.sin(all_rel_LP_rad)
-
-    # all_pt_dist_all_th = all_LP_dist * sin_all_rel_LP_rad
-    all_pt_dist_all_th = np.multiply(all_LP_dist, sin_all_rel_LP_rad)
+    # the distance is |LP| * sin(th - LP_rad) = x * sin(th) - y * cos(th), so all
+    # of them are a (points x 2) by (2 x th) matrix product
+    all_LP_xy = np.column_stack((data_x, data_y))
+    trig_th = np.vstack((np.sin(th_values), -np.cos(th_values)))
+    all_pt_dist_all_th = np.matmul(all_LP_xy, trig_th)
 
     # logg = logging.getLogger(f"c.{__name__}.do_hough_mat")
     # logg.debug(f"th_values.shape: {th_values.shape}")
-    # logg.debug(f"all_LP_dist.shape: {all_LP_dist.shape}")
-    # logg.debug(f"all_LP_rad.shape: {all_LP_rad.shape}")
-    # logg.debug(f"all_rel_LP_rad.shape: {all_rel_LP_rad.shape}")
-    # logg.debug(f"sin_all_rel_LP_rad.shape: {sin_all_rel_LP_rad.shape}")
     # logg.debug(f"all_pt_dist_all_th.shape: {all_pt_dist_all_th.shape}")
 
-    return all_pt_dist_all_th.transpose()
+    return all_pt_dist_all_th
 
 
 def fill_bins(
@@ -415,13 +439,6 @@ def load_filer_data(data_file_name, sector_wid):
 
     data = load_data(data_file_name)
 
-    # extract the data
-    # tot_ray_number = data["tot_ray_number"]
-    # logg.debug(f"tot_ray_number: {tot_ray_number}")
-    ranges = np.array(data["ranges"])
-    range_min = data["range_min"]
-    range_max = data["range_max"]
-    angles_rad = np.array(data["scan_angles"])
     # odom_robot_pose = data["odom_robot_pose"]
     odom_robot_yaw = data["odom_robot_yaw"]
     logg.debug(f"odom_robot_yaw {odom_robot_yaw} relative {odom_robot_yaw-math.pi/2}")
@@ -429,8 +446,8 @@ def load_filer_data(data_file_name, sector_wid):
     t_filt_start = timer()
 
     # filter the data from the lasers
-    left_filt_x, left_filt_y, right_filt_x, right_filt_y = extract_filt_lr(
-        sector_wid, ranges, angles_rad, range_min, range_max
+    left_filt_x, left_filt_y, right_filt_x, right_filt_y = filter_laser_data(
+        data, sector_wid
     )
 
     t_filt_end = timer()
@@ -439,6 +456,58 @@ def load_filer_data(data_file_name, sector_wid):
     return left_filt_x, left_filt_y, right_filt_x, right_filt_y, data
 
 
+def filter_laser_data(data, sector_wid):
+    """Extract and filter the left/right sectors of a scan, loaded or received
+    """
+    # extract the data
+    # tot_ray_number = data["tot_ray_number"]
+    # logg.debug(f"tot_ray_number: {tot_ray_number}")
+    ranges = np.array(data["ranges"])
+    range_min = data["range_min"]
+    range_max = data["range_max"]
+    angles_rad = np.array(data["scan_angles"])
+
+    return extract_filt_lr(sector_wid, ranges, angles_rad, range_min, range_max)
+
+
+def laser_rays_key(data):
+    """The values that must match to filter scans together
+    """
+    angles_rad = np.asarray(data["scan_angles"], dtype=np.float64)
+    ray_num = len(data["ranges"])
+    return ray_num, data["range_min"], data["range_max"], angles_rad.tobytes()
+
+
+def group_laser_scans(all_data):
+    """Group the indexes of the scans with the same rays, in order of appearance
+    """
+    groups = {}
+    for i_data, data in enumerate(all_data):
+        groups.setdefault(laser_rays_key(data), []).append(i_data)
+    return list(groups.values())
+
+
+def filter_laser_scans(all_data, sector_wid):
+    """Extract and filter the left/right sectors of many scans with the same rays
+
+    Use group_laser_scans to split scans with different rays
+    """
+    first_data = all_data[0]
+    first_key = laser_rays_key(first_data)
+    for data in all_data[1:]:
+        if laser_rays_key(data) != first_key:
+            raise ValueError("The scans have different rays")
+
+    all_ranges = np.array([data["ranges"] for data in all_data])
+    range_min = first_data["range_min"]
+    range_max = first_data["range_max"]
+    angles_rad = np.array(first_data["scan_angles"])
+
+    return extract_filt_lr_batch(
+        sector_wid, all_ranges, angles_rad, range_min, range_max
+    )
+
+
 def run_analyze_laser_data(args):
     """TODO: What is analyze_laser_data doing?
     """
@@ -762,9 +762,72 @@ def run_compare_generated(args):
     logg.debug(f"mean_all_t_fit:       {mean_all_t_fit:9.6f}")
 
 
+def run_compare_pyramid(args):
+    """Compare the two passes with the pyramid, at different latency budgets
+    """
+    logg = logging.getLogger(f"c.{__name__}.run_compare_pyramid")
+    logg.debug(f"Start run_compare_pyramid")
+
+    # the same params of run_compare_generated
+    sector_wid_deg = 30
+    dh = DoubleHough(
+        0,
+        0,
+        th_bin_num_fp=20,
+        r_stride_fp=0.025,
+        th_bin_num_sp=81,
+        r_stride_sp=0.005,
+        r_num_sp=20,
+        corridor_width=0.56,
+    )
+
+    # generate the data once
+    all_data = []
+    for th_rot_deg in np.linspace(-30, 30, 200):
+        left_filt_x, left_filt_y = create_laser_data(
+            90, sector_wid_deg, 301, 0.01, th_rot_deg, 0.56
+        )
+        right_filt_x, right_filt_y = create_laser_data(
+            270, sector_wid_deg, 301, 0.01, th_rot_deg, 0.56
+        )
+        data_x = np.hstack((left_filt_x, right_filt_x))
+        data_y = np.hstack((left_filt_y, right_filt_y))
+        all_data.append((data_x, data_y, math.radians(th_rot_deg)))
+
+    # as fine as the second pass, finer and limited by a budget
+    all_find = {
+        "two passes": dh.find_parallel_lines,
+        "two levels": lambda: dh.find_parallel_lines_pyramid(0.01, 0.005),
+        "four levels": lambda: dh.find_parallel_lines_pyramid(3e-5, 3e-4),
+        "budget 1 ms": lambda: dh.find_parallel_lines_pyramid(1e-9, 1e-9, 0.001),
+        "budget 3 ms": lambda: dh.find_parallel_lines_pyramid(1e-9, 1e-9, 0.003),
+    }
+
+    for find_name, find_parallel_lines in all_find.items():
+        parallel_errors = []
+        all_t_analyze = []
+        for data_x, data_y, true_yaw in all_data:
+            dh.data_x = data_x
+            dh.data_y = data_y
+
+            t_analyze_start = timer()
+            best_th, best_r = find_parallel_lines()
+            t_analyze_end = timer()
+            all_t_analyze.append(t_analyze_end - t_analyze_start)
+
+            left_line_rad = slope2rad(rth2ab(best_r, best_th)[0])
+            parallel_errors.append(true_yaw + left_line_rad)
+
+        recap = f"{find_name:>12}"
+        recap += f" mean_parallel_errors: {np.mean(np.abs(parallel_errors)):9.6f}"
+        recap += f" mean_all_t_analyze: {np.mean(all_t_analyze):9.6f}"
+        logg.debug(recap)
+
+
 if __name__ == "__main__":
     args = setup_env()
     # run_analyze_parallel_lines(args)
     # run_compare(args)
     # run_double_hough(args)
+    # run_compare_pyramid(args)
     run_compare_generated(args)
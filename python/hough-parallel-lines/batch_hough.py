@@ -0,0 +1,420 @@
+import argparse
+import logging
+import math
+import numpy as np  # type: ignore
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from timeit import default_timer as timer
+
+from typing import Dict, List, Optional, Tuple
+
+from analyze_laser_data import filter_laser_data
+from analyze_laser_data import filter_laser_scans
+from analyze_laser_data import group_laser_scans
+from analyze_parallel_lines import rth2ab
+from double_hough import DoubleHough
+from utils import iterate_laser_data
+from utils import slope2rad
+
+
+def parse_arguments():
+    """Setup CLI interface
+    """
+    parser = argparse.ArgumentParser(
+        description="Find the corridor in all the recorded scans at once"
+    )
+
+    parser.add_argument(
+        "-i",
+        "--data_pattern",
+        type=str,
+        default="ld_*.txt",
+        help="Analyze the files in laser_data matching this",
+    )
+
+    parser.add_argument(
+        "-b",
+        "--batch_size",
+        type=int,
+        default=256,
+        help="How many scans to analyze in a single vectorized pass",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--max_workers",
+        type=int,
+        default=0,
+        help="Processes used for the ragged scans, 0 to use all the cpus",
+    )
+
+    # last line to parse the args
+    args = parser.parse_args()
+    return args
+
+
+def setup_logger(logLevel="DEBUG"):
+    """Setup logger that outputs to console for the module
+    """
+    logroot = logging.getLogger("c")
+    logroot.propagate = False
+    logroot.setLevel(logLevel)
+
+    module_console_handler = logging.StreamHandler()
+
+    #  log_format_module = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    #  log_format_module = "%(name)s - %(levelname)s: %(message)s"
+    #  log_format_module = '%(levelname)s: %(message)s'
+    #  log_format_module = '%(name)s: %(message)s'
+    log_format_module = "%(message)s"
+
+    formatter = logging.Formatter(log_format_module)
+    module_console_handler.setFormatter(formatter)
+
+    logroot.addHandler(module_console_handler)
+
+    logging.addLevelName(5, "TRACE")
+    # use it like this
+    # logroot.log(5, 'Exceedingly verbose debug')
+
+
+def setup_env():
+    setup_logger("INFO")
+
+    args = parse_arguments()
+
+    # build command string to repeat this run
+    # FIXME if an option is a flag this does not work, sorry
+    recap = f"python3 batch_hough.py"
+    for a, v in args._get_kwargs():
+        recap += f" --{a} {v}"
+
+    logmain = logging.getLogger(f"c.{__name__}.setup_env")
+    logmain.info(recap)
+
+    return args
+
+
+def unstack_scans(
+    stack_x: np.ndarray, stack_y: np.ndarray
+) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """Split the padded (scan_num, point_num) arrays in the points of each scan
+    """
+    all_data_x = []
+    all_data_y = []
+    for data_x, data_y in zip(stack_x, stack_y):
+        valid = ~np.isnan(data_x)
+        all_data_x.append(data_x[valid])
+        all_data_y.append(data_y[valid])
+    return all_data_x, all_data_y
+
+
+def fill_bins_batch(
+    all_dist_from_th: np.ndarray, r_stride: float
+) -> Tuple[np.ndarray, float]:
+    """Fill the bins of all the scans at once, like DoubleHough.fill_bins
+
+    all_dist_from_th is a (scan_num, dist_num, th_num) array. All the scans use
+    the same r range, so the bins are a (scan_num, th_num, r_bin_num) array.
+    """
+    # quantize the dist values along r_stride grid by zooming in and rounding
+    int_all_dist_from_th = np.rint(all_dist_from_th / r_stride)
+
+    # find the extremes of the distance interval, of all the scans
+    r_min = np.nanmin(int_all_dist_from_th)
+    r_max = np.nanmax(int_all_dist_from_th)
+    r_bin_num = int(r_max - r_min + 1)
+
+    # each distance goes in the bin (scan_index * th_num + th_index) * r_bin_num
+    # + r_index of the flattened bins, the nan of the padding go in the first
+    # r bin and are removed later
+    scan_num, _, th_num = int_all_dist_from_th.shape
+    padding = np.isnan(int_all_dist_from_th)
+    np.copyto(int_all_dist_from_th, r_min, where=padding)
+    int_all_dist_from_th -= r_min
+    all_scan_th_index = np.arange(scan_num * th_num).reshape(scan_num, 1, th_num)
+    int_all_dist_from_th += all_scan_th_index * r_bin_num
+    flat_index = int_all_dist_from_th.astype(np.intp).ravel()
+    bins = np.bincount(flat_index, minlength=scan_num * th_num * r_bin_num)
+    bins = bins.reshape(scan_num, th_num, r_bin_num)
+    bins[:, :, 0] -= np.sum(padding, axis=1)
+
+    return bins, r_min
+
+
+def find_parallel_lines_batch(
+    dh: DoubleHough, stack_x: np.ndarray, stack_y: np.ndarray
+) -> List[Tuple[float, float]]:
+    """Find the corridor in many scans, with the params of dh
+
+    The points of the scans are (scan_num, point_num) arrays padded with NaN.
+    The first pass is done for all the scans at once, the second one scan by scan,
+    the results are the same of dh.find_parallel_lines on each scan.
+    """
+    ######################################
+    # do the first pass on all the scans #
+    ######################################
+
+    all_dist_fp_th = dh.kernel.compute_dist_batch(
+        dh.th_values_fp, stack_x, stack_y, dh.corridor_width
+    )
+    bins_fp, r_min_fp = fill_bins_batch(all_dist_fp_th, dh.r_stride_fp)
+
+    # find the max of each scan, the first one like np.argmax
+    scan_num, th_num, r_bin_num = bins_fp.shape
+    all_argmax = np.argmax(bins_fp.reshape(scan_num, -1), axis=1)
+    all_i_th, all_i_r = np.unravel_index(all_argmax, (th_num, r_bin_num))
+    all_best_th_fp = dh.th_values_fp[all_i_th]
+    all_best_r_fp = (all_i_r + r_min_fp) * dh.r_stride_fp
+
+    ######################################
+    # do the second pass on each of them #
+    ######################################
+
+    all_best = []
+    all_data_x, all_data_y = unstack_scans(stack_x, stack_y)
+    for i_scan in range(scan_num):
+        dh.data_x = all_data_x[i_scan]
+        dh.data_y = all_data_y[i_scan]
+        dh.precompute_values()
+        best = dh.do_second_pass(
+            all_best_th_fp[i_scan], all_best_r_fp[i_scan], dh.th_fp_wid
+        )
+        all_best.append(best)
+
+    return all_best
+
+
+def find_parallel_lines_scans(
+    dh: DoubleHough, all_data_x: List[np.ndarray], all_data_y: List[np.ndarray]
+) -> List[Tuple[float, float]]:
+    """Find the corridor in each scan, one at a time
+    """
+    all_best = []
+    for data_x, data_y in zip(all_data_x, all_data_y):
+        dh.data_x = data_x
+        dh.data_y = data_y
+        all_best.append(dh.find_parallel_lines())
+    return all_best
+
+
+def find_parallel_lines_pool(
+    dh: DoubleHough,
+    all_data_x: List[np.ndarray],
+    all_data_y: List[np.ndarray],
+    chunk_size: int,
+    max_workers: Optional[int] = None,
+) -> List[Tuple[float, float]]:
+    """Find the corridor in each scan, chunks of chunk_size scans are analyzed in
+    a pool of processes
+    """
+    all_best: List[Tuple[float, float]] = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for chunk_start in range(0, len(all_data_x), chunk_size):
+            chunk_slice = slice(chunk_start, chunk_start + chunk_size)
+            future = executor.submit(
+                find_parallel_lines_scans,
+                dh,
+                all_data_x[chunk_slice],
+                all_data_y[chunk_slice],
+            )
+            futures.append(future)
+        for future in futures:
+            all_best.extend(future.result())
+    return all_best
+
+
+def analyze_scans(
+    dh: DoubleHough,
+    stack_x: np.ndarray,
+    stack_y: np.ndarray,
+    batch_size: int = 256,
+    max_pad_ratio: float = 1.5,
+    max_workers: Optional[int] = None,
+) -> List[Tuple[float, float]]:
+    """Find the corridor in all the scans, in batches of batch_size
+
+    The points of the scans are (scan_num, point_num) arrays padded with NaN: if
+    a batch has more than max_pad_ratio times the padded size of valid points, it
+    is too ragged, and the scans are instead analyzed one at a time in a pool of
+    processes
+    """
+    logg = logging.getLogger(f"c.{__name__}.analyze_scans")
+
+    all_best: List[Tuple[float, float]] = []
+    ragged_batches = []
+    for batch_start in range(0, stack_x.shape[0], batch_size):
+        batch_slice = slice(batch_start, batch_start + batch_size)
+        batch_x = stack_x[batch_slice]
+        batch_y = stack_y[batch_slice]
+
+        valid_num = np.count_nonzero(~np.isnan(batch_x))
+        if batch_x.size <= valid_num * max_pad_ratio:
+            all_best.extend(find_parallel_lines_batch(dh, batch_x, batch_y))
+        else:
+            # keep the place for the results
+            ragged_batches.append((len(all_best), batch_x, batch_y))
+            all_best.extend([(math.nan, math.nan)] * batch_x.shape[0])
+
+    if len(ragged_batches) == 0:
+        return all_best
+
+    logg.info(f"Analyzing {len(ragged_batches)} ragged batches in a process pool")
+    all_data_x: List[np.ndarray] = []
+    all_data_y: List[np.ndarray] = []
+    for _, batch_x, batch_y in ragged_batches:
+        batch_data_x, batch_data_y = unstack_scans(batch_x, batch_y)
+        all_data_x.extend(batch_data_x)
+        all_data_y.extend(batch_data_y)
+    ragged_best = find_parallel_lines_pool(
+        dh, all_data_x, all_data_y, batch_size, max_workers
+    )
+
+    # put the results back in place
+    ragged_start = 0
+    for batch_start, batch_x, _ in ragged_batches:
+        batch_num = batch_x.shape[0]
+        batch_best = ragged_best[ragged_start : ragged_start + batch_num]
+        all_best[batch_start : batch_start + batch_num] = batch_best
+        ragged_start += batch_num
+
+    return all_best
+
+
+def analyze_laser_scans(
+    dh: DoubleHough,
+    all_data: List[Dict],
+    sector_wid: int,
+    batch_size: int = 256,
+    max_workers: Optional[int] = None,
+) -> List[Tuple[float, float]]:
+    """Find the corridor in all the scans, that can have different rays
+
+    The scans with the same rays are filtered together and analyzed in batches,
+    the ones that match no other scan are filtered one at a time and analyzed in
+    a pool of processes. The results are in the order of all_data.
+    """
+    logg = logging.getLogger(f"c.{__name__}.analyze_laser_scans")
+
+    all_best: List[Tuple[float, float]] = [(math.nan, math.nan)] * len(all_data)
+    odd_index = []
+    for group in group_laser_scans(all_data):
+        if len(group) == 1:
+            odd_index.extend(group)
+            continue
+        group_data = [all_data[i_data] for i_data in group]
+        stack_x, stack_y = filter_laser_scans(group_data, sector_wid)
+        group_best = analyze_scans(
+            dh, stack_x, stack_y, batch_size, max_workers=max_workers
+        )
+        for i_data, best in zip(group, group_best):
+            all_best[i_data] = best
+
+    if len(odd_index) == 0:
+        return all_best
+
+    logg.info(f"Analyzing {len(odd_index)} scans with unique rays in a process pool")
+    odd_data_x = []
+    odd_data_y = []
+    for i_data in odd_index:
+        left_filt_x, left_filt_y, right_filt_x, right_filt_y = filter_laser_data(
+            all_data[i_data], sector_wid
+        )
+        odd_data_x.append(np.hstack((left_filt_x, right_filt_x)))
+        odd_data_y.append(np.hstack((left_filt_y, right_filt_y)))
+
+    # spread the scans on all the workers
+    worker_num = max_workers if max_workers is not None else os.cpu_count() or 1
+    chunk_size = math.ceil(len(odd_index) / worker_num)
+    odd_best = find_parallel_lines_pool(
+        dh, odd_data_x, odd_data_y, chunk_size, max_workers
+    )
+    for i_data, best in zip(odd_index, odd_best):
+        all_best[i_data] = best
+
+    return all_best
+
+
+def iterate_batches(iterable, batch_size):
+    """Yield lists of batch_size elements, the last one can be shorter
+    """
+    batch = []
+    for element in iterable:
+        batch.append(element)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if len(batch) > 0:
+        yield batch
+
+
+def run_batch_hough(args):
+    """Analyze all the scans of a run, in batches and one at a time
+    """
+    logg = logging.getLogger(f"c.{__name__}.run_batch_hough")
+    logg.debug(f"Starting run_batch_hough")
+
+    # the same params of run_double_hough
+    sector_wid_deg = 30
+    sector_wid = math.floor(sector_wid_deg / 180 * 200)
+    dh = DoubleHough(
+        0,
+        0,
+        th_bin_num_fp=20,
+        r_stride_fp=0.025,
+        th_bin_num_sp=81,
+        r_stride_sp=0.005,
+        r_num_sp=20,
+        corridor_width=0.56,
+    )
+
+    # load a batch of scans at a time, the logs are read lazily
+    all_best = []
+    all_best_scans = []
+    all_true_yaw = []
+    t_batch = 0
+    t_scans = 0
+    max_workers = args.max_workers if args.max_workers > 0 else None
+    all_scans = iterate_laser_data(args.data_pattern)
+    for batch in iterate_batches(all_scans, args.batch_size):
+        all_data = [data for _, data in batch]
+        all_true_yaw.extend(data["odom_robot_yaw"] for data in all_data)
+
+        t_batch_start = timer()
+        batch_best = analyze_laser_scans(
+            dh, all_data, sector_wid, args.batch_size, max_workers=max_workers
+        )
+        all_best.extend(batch_best)
+        t_batch += timer() - t_batch_start
+
+        t_scans_start = timer()
+        all_data_x = []
+        all_data_y = []
+        for data in all_data:
+            left_filt_x, left_filt_y, right_filt_x, right_filt_y = filter_laser_data(
+                data, sector_wid
+            )
+            all_data_x.append(np.hstack((left_filt_x, right_filt_x)))
+            all_data_y.append(np.hstack((left_filt_y, right_filt_y)))
+        all_best_scans.extend(find_parallel_lines_scans(dh, all_data_x, all_data_y))
+        t_scans += timer() - t_scans_start
+
+    logg.info(f"Batch analysis of {len(all_best)} scans took {t_batch} seconds")
+    logg.info(f"Scan by scan analysis took {t_scans} seconds")
+
+    num_same = sum(best == seq for best, seq in zip(all_best, all_best_scans))
+    logg.info(f"Same results in {num_same}/{len(all_best)} scans")
+
+    # compare with the odometry, like in run_compare
+    parallel_errors = []
+    for (best_th, best_r), true_yaw in zip(all_best, all_true_yaw):
+        left_line_rad = slope2rad(rth2ab(best_r, best_th)[0])
+        parallel_errors.append(true_yaw + left_line_rad - math.pi / 2)
+    logg.info(f"mean_parallel_errors: {np.mean(np.abs(parallel_errors)):9.6f}")
+
+
+if __name__ == "__main__":
+    args = setup_env()
+    run_batch_hough(args)
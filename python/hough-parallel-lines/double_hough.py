@@ -3,9 +3,12 @@ import math
 import numpy as np  # type: ignore
 import matplotlib.pyplot as plt  # type: ignore
 from scipy.ndimage import gaussian_filter  # type: ignore
+from timeit import default_timer as timer
 
 from typing import Tuple, Optional
 
+from hough_kernel import HoughKernel
+
 
 class DoubleHough:
     def __init__(
@@ -18,8 +21,11 @@ class DoubleHough:
         r_stride_sp: float,
         r_num_sp: int,
         corridor_width: float,
+        dtype=np.float64,
     ):
         """Setup the analyzer
+
+        The distances are computed in dtype, np.float32 is faster
         """
         # logg = logging.getLogger(f"c.{__name__}.__init__")
         # logg.debug(f"Start __init__")
@@ -45,8 +51,20 @@ class DoubleHough:
         self.th_fp_wid = math.radians(180 / self.th_bin_num_fp)
         # logg.debug(f"First th bins are {math.degrees(self.th_fp_wid):.4f} degrees wide")
 
-    def find_parallel_lines(self) -> Tuple[float, float]:
+        # the cos/sin of the first pass th are always the same
+        self.kernel = HoughKernel(dtype)
+        self.kernel.add_fixed_th(self.th_values_fp)
+
+    def find_parallel_lines(
+        self, th_center: Optional[float] = None, th_half_wid: Optional[float] = None
+    ) -> Tuple[float, float]:
         """Runs the algorithm on the current values
+
+        If th_center and th_half_wid are set, the first pass only looks for the
+        corridor in [th_center - th_half_wid, th_center + th_half_wid], with the
+        same number of bins: use the result on the previous scan to warm start the
+        search. If the best value is on the border of the window, the first pass
+        is repeated on the full [0, pi) range.
         """
         # logg = logging.getLogger(f"c.{__name__}.find_parallel_lines")
         # logg.debug(f"Start find_parallel_lines")
@@ -58,34 +76,55 @@ class DoubleHough:
         # do the first pass #
         #####################
 
-        # # use some prior knowledge on the orientation of the corridor
-        # self.th_values_fp = np.linspace(
-        #     math.pi * 2 / 5, math.pi * 3 / 5, self.th_bin_num_fp, endpoint=False
-        # )
+        # use some prior knowledge on the orientation of the corridor
+        self.warm_started = False
+        if th_center is not None and th_half_wid is not None:
+            th_values_fp = np.linspace(
+                th_center - th_half_wid, th_center + th_half_wid, self.th_bin_num_fp
+            )
+            th_fp_wid = th_values_fp[1] - th_values_fp[0]
+            best_th_fp, best_r_fp = self.do_first_pass(th_values_fp)
+            # the corridor might be outside the window
+            self.warm_started = th_values_fp[0] < best_th_fp < th_values_fp[-1]
+
+        if not self.warm_started:
+            th_fp_wid = self.th_fp_wid
+            best_th_fp, best_r_fp = self.do_first_pass(self.th_values_fp)
+        # best_th_fp = math.radians(90)
+        # best_r_fp = -0.28
+        # logg.debug(f"best_th_fp: {best_th_fp} best_r_fp {best_r_fp}")
+        # print(f"best_th_fp: {best_th_fp} best_r_fp {best_r_fp}")
+
+        ######################
+        # do the second pass #
+        ######################
+
+        return self.do_second_pass(best_th_fp, best_r_fp, th_fp_wid)
 
+    def do_first_pass(self, th_values_fp: np.ndarray) -> Tuple[float, float]:
+        """Find the best line with coarse bins, among the th_values_fp rotations
+        """
         # compute the distances
-        all_dist_fp_th = self.compute_all_dist_from_th_mat(self.th_values_fp)
+        all_dist_fp_th = self.compute_all_dist_from_th_mat(th_values_fp)
         # fill the bins
         bins_fp, r_min_fp = self.fill_bins(
             all_dist_fp_th, self.th_bin_num_fp, self.r_stride_fp
         )
         # find the max
         best_th_fp, best_r_fp = self.find_max(
-            bins_fp, r_min_fp, self.r_stride_fp, self.th_values_fp
+            bins_fp, r_min_fp, self.r_stride_fp, th_values_fp
         )
-        # best_th_fp = math.radians(90)
-        # best_r_fp = -0.28
-        # logg.debug(f"best_th_fp: {best_th_fp} best_r_fp {best_r_fp}")
-        # print(f"best_th_fp: {best_th_fp} best_r_fp {best_r_fp}")
-
-        ######################
-        # do the second pass #
-        ######################
+        return best_th_fp, best_r_fp
 
+    def do_second_pass(
+        self, best_th_fp: float, best_r_fp: float, th_fp_wid: float
+    ) -> Tuple[float, float]:
+        """Refine the result of the first pass, with th_fp_wid wide th bins
+        """
         # compute the th values for the precise interval
         self.th_values_sp = np.linspace(
-            best_th_fp - self.th_fp_wid * 2,
-            best_th_fp + self.th_fp_wid * 2,
+            best_th_fp - th_fp_wid * 2,
+            best_th_fp + th_fp_wid * 2,
             self.th_bin_num_sp,
         )
         # logg.debug(f"th_values_sp.shape: {self.th_values_sp.shape}")
@@ -115,17 +154,100 @@ class DoubleHough:
 
         return best_th_sp, best_r_sp
 
+    def find_parallel_lines_pyramid(
+        self, th_res: float, r_res: float, latency_budget: Optional[float] = None,
+    ) -> Tuple[float, float]:
+        """Runs the algorithm, refining the result until th_res and r_res are reached
+
+        After the first pass, each level looks for the lines in a window around
+        the previous result, two bins of the previous level wide on each side in
+        th, r_num_sp bins in r. Each level has th_bin_num_sp th bins, and a
+        r_stride reduced by r_stride_sp / r_stride_fp: the second level is like
+        the second pass. The bins of all the levels are smoothed as wide as one
+        second pass bin, so the levels refine the max of the same smoothed
+        accumulator, instead of chasing the noise in the finer bins.
+
+        If latency_budget is set, no level is started if it would end after
+        latency_budget seconds, estimated from the slowest level so far: the
+        first pass is always done. The levels done are saved in level_num.
+        """
+        if self.th_bin_num_sp <= 5 or self.r_stride_sp >= self.r_stride_fp:
+            raise ValueError("The second pass bins must be finer than the first pass")
+        if th_res <= 0 or r_res <= 0:
+            raise ValueError(f"Invalid resolution th_res {th_res} r_res {r_res}")
+
+        t_start = timer()
+
+        # precompute values common to all levels
+        self.precompute_values()
+
+        best_th, best_r = self.do_first_pass(self.th_values_fp)
+        th_wid = self.th_fp_wid
+        r_stride = self.r_stride_fp
+        self.level_num = 1
+
+        # the levels are th_bin_num_sp wide, the first estimate is the first pass
+        # cost scaled to that
+        t_level_max = (timer() - t_start) * self.th_bin_num_sp / self.th_bin_num_fp
+
+        # the width of the smoothing, one second pass bin
+        th_sigma = th_wid * 4 / (self.th_bin_num_sp - 1)
+        r_sigma = self.r_stride_sp
+
+        while th_wid > th_res or r_stride > r_res:
+            t_level_start = timer()
+            if latency_budget is not None:
+                if t_level_start - t_start + t_level_max > latency_budget:
+                    break
+
+            th_values = np.linspace(
+                best_th - th_wid * 2, best_th + th_wid * 2, self.th_bin_num_sp
+            )
+            th_wid = th_values[1] - th_values[0]
+            r_stride = r_stride * self.r_stride_sp / self.r_stride_fp
+            sigma = (th_sigma / th_wid, r_sigma / r_stride)
+            best_th, best_r = self.do_window_pass(th_values, best_r, r_stride, sigma)
+
+            self.level_num += 1
+            t_level_max = max(t_level_max, timer() - t_level_start)
+
+        return best_th, best_r
+
+    def do_window_pass(
+        self,
+        th_values: np.ndarray,
+        r_central: float,
+        r_stride: float,
+        sigma: Tuple[float, float],
+    ) -> Tuple[float, float]:
+        """Find the best line among th_values, r_num_sp bins around r_central
+
+        The bins are smoothed with a gaussian sigma bins wide, in float to keep
+        the small values of the wide filters
+        """
+        # compute the distances
+        all_dist_th = self.compute_all_dist_from_th_mat(th_values)
+        # fill the bins in the window
+        bins, r_min = self.fill_bins_window(
+            all_dist_th, r_stride, r_central, self.r_num_sp
+        )
+        # smooth the bins, the filter does not need to be wider than the window
+        radius = np.minimum(np.rint(np.multiply(sigma, 4)), bins.shape).astype(int)
+        smooth_bins = gaussian_filter(
+            bins, sigma, output=np.float64, radius=tuple(radius)
+        )
+        # find the max
+        best_th, best_r = self.find_max(smooth_bins, r_min, r_stride, th_values)
+        return best_th, best_r
+
     def precompute_values(self):
         """TODO: what is precompute_values doing?
         """
         # logg = logging.getLogger(f"c.{__name__}.precompute_values")
         # logg.debug(f"Start precompute_values")
 
-        # distance from all points to the origin
-        self.all_OL_dist = np.sqrt(np.square(self.data_x) + np.square(self.data_y))
-
-        # direction from all points to origin
-        self.all_OL_rad = np.arctan2(self.data_y, self.data_x)
+        # copy the points in the buffer of the kernel
+        self.kernel.set_points(self.data_x, self.data_y)
 
     def compute_all_dist_from_th_mat(self, th_values: np.ndarray) -> np.ndarray:
         """Computes the distances for all points and all given rotations values
@@ -133,23 +255,11 @@ class DoubleHough:
         # logg = logging.getLogger(f"c.{__name__}.compute_all_dist_from_th_mat")
         # logg.debug(f"Start compute_all_dist_from_th_mat")
 
-        # use broadcasting to stretch the arrays into common shapes
-        # https://numpy.org/devdocs/user/theory.broadcasting.html#figure-4
-        # the angle between the origin and the point, and the line
-        all_rel_OL_rad = th_values[:, np.newaxis] - self.all_OL_rad
-
-        cos_all_rel_OL_rad = np.cos(all_rel_OL_rad)
-
-        # distances when considering the point on the left line
-        all_dist_from_th_l = np.multiply(self.all_OL_dist, cos_all_rel_OL_rad)
-        all_dist_from_th_l = all_dist_from_th_l.transpose()
-
-        # the distances when considering the point on the right are reduced by corridor width
-        all_dist_from_th_r = all_dist_from_th_l - self.corridor_width
-        # logg.debug(f"all_dist_from_th_l.shape: {all_dist_from_th_l.shape}")
-
-        # stack the two sets of sinusoids
-        all_dist_from_th = np.vstack((all_dist_from_th_l, all_dist_from_th_r))
+        # the distances when considering the point on the left line are
+        # |OL| * cos(th - OL_rad) = x * cos(th) + y * sin(th), a matrix product,
+        # the distances when considering the point on the right are reduced by
+        # corridor width, and the two sets of sinusoids are stacked
+        all_dist_from_th = self.kernel.compute_dist(th_values, self.corridor_width)
         # logg.debug(f"all_dist_from_th.shape: {all_dist_from_th.shape}")
         return all_dist_from_th
 
@@ -206,23 +316,49 @@ class DoubleHough:
         r_bin_num = int(r_max - r_min + 1)
         # logg.debug(f"r_min: {r_min} r_max {r_max} r_bin_num {r_bin_num}")
 
-        bins = np.zeros((th_bin_num, r_bin_num), dtype=np.uint32)
         # bin 0 is associated with value r_min, 1 with r_min + r_stride and so on
+        # each distance goes in the bin th_index * r_bin_num + r_index of the
+        # flattened bins, count them all at once, avoiding nan values
+        all_th_index = np.broadcast_to(
+            np.arange(int_all_dist_from_th.shape[1]), int_all_dist_from_th.shape
+        )
+        valid = ~np.isnan(int_all_dist_from_th)
+        all_r_index = int_all_dist_from_th[valid].astype(np.int64) - int_r_min
+        flat_index = all_th_index[valid] * r_bin_num + all_r_index
+        bins = np.bincount(flat_index, minlength=th_bin_num * r_bin_num)
+        bins = bins.astype(np.uint32).reshape(th_bin_num, r_bin_num)
         # logg.debug(f"bins.shape: {bins.shape}")
 
-        # transpose the data to easily access by theta
-        int_from_th_all_dist = int_all_dist_from_th.T
-        for i_th, all_dist_th in enumerate(int_from_th_all_dist):
-            # get unique values and their counts
-            # avoid nan values
-            uniques, counts = np.unique(
-                all_dist_th[~np.isnan(all_dist_th)], return_counts=True
-            )
-            # cast uniques back to int
-            uniques = uniques.astype(np.int32)
-            for i_u, u in enumerate(uniques):
-                i_r = u - int_r_min
-                bins[i_th][i_r] += counts[i_u]
+        return bins, r_min
+
+    def fill_bins_window(
+        self,
+        all_dist_from_th: np.ndarray,
+        r_stride: float,
+        r_central: float,
+        r_num: int,
+    ) -> Tuple[np.ndarray, float]:
+        """Fill only the bins within r_num bins of r_central
+
+        The bins are a (th_num, r_num * 2 + 1) array, whatever the extent of the
+        distances, the ones outside of the window are not counted
+        """
+        # quantize the dist values along r_stride grid by zooming in and rounding
+        int_all_dist_from_th = np.rint(all_dist_from_th / r_stride)
+
+        # bin 0 is associated with value r_min, the window is r_bin_num bins wide
+        r_min = np.rint(r_central / r_stride) - r_num
+        r_bin_num = r_num * 2 + 1
+        all_r_index = int_all_dist_from_th - r_min
+        in_window = np.logical_and(0 <= all_r_index, all_r_index < r_bin_num)
+
+        # count the distances in the window, like in fill_bins
+        th_num = all_dist_from_th.shape[1]
+        all_th_index = np.broadcast_to(np.arange(th_num), all_r_index.shape)
+        flat_index = all_th_index[in_window] * r_bin_num
+        flat_index += all_r_index[in_window].astype(np.int64)
+        bins = np.bincount(flat_index, minlength=th_num * r_bin_num)
+        bins = bins.astype(np.uint32).reshape(th_num, r_bin_num)
 
         return bins, r_min
 
@@ -261,6 +397,7 @@ class VisualDoubleHough(DoubleHough):
         r_stride_sp: float,
         r_num_sp: int,
         corridor_width: float,
+        dtype=np.float64,
     ):
         """Setup the analyzer
         """
@@ -276,6 +413,7 @@ class VisualDoubleHough(DoubleHough):
             r_stride_sp,
             r_num_sp,
             corridor_width,
+            dtype,
         )
 
     def visual_test_all_dist_sp_th(self, ax=None):
@@ -0,0 +1,103 @@
+import numpy as np  # type: ignore
+
+from typing import Dict, List, Tuple
+
+
+class HoughKernel:
+    def __init__(self, dtype=np.float64):
+        """Compute the distances from the origin of the lines through the points
+
+        The line with normal direction th through the point (x, y) is at distance
+        x * cos(th) + y * sin(th) from the origin: the distances for all the
+        points and all the th are a (points x 2) by (2 x th) matrix product.
+
+        The cos/sin tables of the th grids that do not change are computed once,
+        with add_fixed_th. The points and the distances are written in buffers
+        that are reused for each scan, and grown when a scan has more points.
+
+        The computations are done in dtype, np.float32 is faster but the
+        distances are less precise.
+        """
+        self.dtype = dtype
+
+        # the fixed th grids and their cos/sin tables
+        self.fixed_th: List[Tuple[np.ndarray, np.ndarray]] = []
+
+        # the points as a (point_num, 2) array of x, y
+        self.xy = np.empty((0, 2), dtype=self.dtype)
+        self.point_num = 0
+
+        # the distances, one buffer for each th grid size
+        self.buffers: Dict[int, np.ndarray] = {}
+
+    def add_fixed_th(self, th_values: np.ndarray) -> None:
+        """Cache the cos/sin table of this th grid, it must not be changed later
+        """
+        self.fixed_th.append((th_values, self.compute_trig(th_values)))
+
+    def compute_trig(self, th_values: np.ndarray) -> np.ndarray:
+        """The (2, th_num) table of cos and sin of th_values
+        """
+        return np.vstack((np.cos(th_values), np.sin(th_values))).astype(self.dtype)
+
+    def get_trig(self, th_values: np.ndarray) -> np.ndarray:
+        """The cos/sin table of th_values, from the cache if it is a fixed grid
+        """
+        for fixed_th_values, trig in self.fixed_th:
+            if th_values is fixed_th_values:
+                return trig
+        return self.compute_trig(th_values)
+
+    def set_points(self, data_x: np.ndarray, data_y: np.ndarray) -> None:
+        """Copy the points in the xy buffer
+        """
+        self.point_num = data_x.shape[0]
+        if self.xy.shape[0] < self.point_num:
+            self.xy = np.empty((self.point_num, 2), dtype=self.dtype)
+        self.xy[: self.point_num, 0] = data_x
+        self.xy[: self.point_num, 1] = data_y
+
+    def compute_dist(self, th_values: np.ndarray, shift: float = 0) -> np.ndarray:
+        """Distances of the lines through the points, for all th_values
+
+        Returns a (point_num * 2, th_num) array: in the first point_num rows the
+        distances, in the others the distances reduced by shift. The array is a
+        view on a buffer, overwritten by the next call with the same th_num.
+        """
+        th_num = th_values.shape[0]
+        buffer = self.buffers.get(th_num)
+        if buffer is None or buffer.shape[0] < self.point_num * 2:
+            buffer = np.empty((self.point_num * 2, th_num), dtype=self.dtype)
+            self.buffers[th_num] = buffer
+
+        all_dist = buffer[: self.point_num * 2]
+        dist_main = all_dist[: self.point_num]
+        np.matmul(self.xy[: self.point_num], self.get_trig(th_values), out=dist_main)
+        np.subtract(dist_main, shift, out=all_dist[self.point_num :])
+
+        return all_dist
+
+    def compute_dist_batch(
+        self,
+        th_values: np.ndarray,
+        all_data_x: np.ndarray,
+        all_data_y: np.ndarray,
+        shift: float = 0,
+    ) -> np.ndarray:
+        """Distances of the lines through the points of many scans at once
+
+        all_data_x and all_data_y are (scan_num, point_num) arrays, padded with
+        NaN. Returns a new (scan_num, point_num * 2, th_num) array, like
+        compute_dist for each scan.
+        """
+        scan_num, point_num = all_data_x.shape
+        all_xy = np.empty((scan_num, point_num, 2), dtype=self.dtype)
+        all_xy[:, :, 0] = all_data_x
+        all_xy[:, :, 1] = all_data_y
+
+        all_dist = np.empty((scan_num, point_num * 2, th_values.shape[0]), self.dtype)
+        dist_main = all_dist[:, :point_num]
+        np.matmul(all_xy, self.get_trig(th_values), out=dist_main)
+        np.subtract(dist_main, shift, out=all_dist[:, point_num:])
+
+        return all_dist
@@ -2,6 +2,7 @@ import logging
 import math
 import numpy as np  # type: ignore
 
+from hough_kernel import HoughKernel
 from utils import dist_2D
 
 
@@ -15,8 +16,11 @@ class HoughParallel:
         r_min_dist,
         r_max_dist,
         th_bin_num,
+        dtype=np.float64,
     ):
         """Setup the analyzer
+
+        The distances are computed in dtype, np.float32 is faster
         """
         logg = logging.getLogger(f"c.{__name__}.__init__")
         logg.debug(f"Start __init__")
@@ -41,6 +45,10 @@ class HoughParallel:
         self.shift_val_x = np.cos(self.th_values) * self.corridor_width
         self.shift_val_y = np.sin(self.th_values) * self.corridor_width
 
+        # the cos/sin of the th values are always the same
+        self.kernel = HoughKernel(dtype)
+        self.kernel.add_fixed_th(self.th_values)
+
     def find_parallel_lines_mat(self):
         """Runs the algorithm on the current values
         """
@@ -61,28 +69,17 @@ class HoughParallel:
         # logg = logging.getLogger(f"c.{__name__}.compute_all_dist_all_th_mat")
         # logg.debug(f"Start compute_all_dist_all_th_mat")
 
-        # distance from all points to the origin
-        all_PL_dist = np.sqrt(np.square(self.data_x) + np.square(self.data_y))
-
-        # direction from all points to origin
-        all_PL_rad = np.arctan2(self.data_y, self.data_x)
-
-        # use broadcasting to stretch the arrays into common shapes
-        # https://numpy.org/devdocs/user/theory.broadcasting.html#figure-4
-        all_rel_PL_rad = self.th_values[:, np.newaxis] - all_PL_rad
-
-        cos_all_rel_PL_rad = np.cos(all_rel_PL_rad)
-
-        # distances when considering the point on the left line
-        self.all_dist_all_th_l = np.multiply(all_PL_dist, cos_all_rel_PL_rad)
-        self.all_dist_all_th_l = self.all_dist_all_th_l.transpose()
-
-        # the distances when considering the point on the right are reduced by corridor width
-        self.all_dist_all_th_r = self.all_dist_all_th_l - self.corridor_width
-        # logg.debug(f"self.all_dist_all_th_l.shape: {self.all_dist_all_th_l.shape}")
-        self.all_dist_all_th = np.vstack(
-            (self.all_dist_all_th_l, self.all_dist_all_th_r)
+        # distances when considering the point on the left line are
+        # |PL| * cos(th - PL_rad) = x * cos(th) + y * sin(th), a matrix product,
+        # the distances when considering the point on the right are reduced by
+        # corridor width, and the two sets are stacked
+        self.kernel.set_points(self.data_x, self.data_y)
+        self.all_dist_all_th = self.kernel.compute_dist(
+            self.th_values, self.corridor_width
         )
+        point_num = self.kernel.point_num
+        self.all_dist_all_th_l = self.all_dist_all_th[:point_num]
+        self.all_dist_all_th_r = self.all_dist_all_th[point_num:]
         # logg.debug(f"self.all_dist_all_th.shape: {self.all_dist_all_th.shape}")
 
     def fill_bins(self):
@@ -97,23 +94,22 @@ class HoughParallel:
 
         self.r_min = np.min(self.int_all_dist_all_th)
         self.r_max = np.max(self.int_all_dist_all_th)
-        self.r_bin_num = self.r_max - self.r_min + 1
+        self.r_bin_num = int(self.r_max - self.r_min + 1)
         # logg.debug(f"r_min: {self.r_min} r_max {self.r_max} r_bin_num {self.r_bin_num}")
-        self.bins = np.zeros((self.th_bin_num, self.r_bin_num), dtype=np.uint16)
         # bin 0 is associated with value r_min, 1 with r_min + r_stride and so on
 
         # transpose the data to easily access by theta
         self.int_all_th_all_dist = self.int_all_dist_all_th.T
-        for i_th, all_dist_th in enumerate(self.int_all_th_all_dist):
-            # get unique values and their counts
-            uniques, counts = np.unique(all_dist_th, return_counts=True)
-            for i_u, u in enumerate(uniques):
-                i_r = u - self.r_min
-                self.bins[i_th][i_r] += counts[i_u]
-
-            # recap = f"all_dist_th.shape: {all_dist_th.shape}"
-            # recap += f" u.shape {u.shape}"
-            # logg.debug(recap)
+
+        # each distance goes in the bin th_index * r_bin_num + r_index of the
+        # flattened bins, count them all at once
+        all_r_index = self.int_all_th_all_dist.astype(np.int64) - self.r_min
+        all_th_index = np.arange(self.th_bin_num)[:, np.newaxis]
+        flat_index = all_th_index * self.r_bin_num + all_r_index
+        self.bins = np.bincount(
+            flat_index.ravel(), minlength=self.th_bin_num * self.r_bin_num
+        )
+        self.bins = self.bins.astype(np.uint16).reshape(self.th_bin_num, self.r_bin_num)
 
     def find_best_params(self):
         """Finds the most frequent line
@@ -0,0 +1,281 @@
+import argparse
+import logging
+import mmap
+import numpy as np  # type: ignore
+
+from pathlib import Path
+from timeit import default_timer as timer
+
+from typing import Callable, Dict, Iterator, Tuple
+
+LASER_LOG_SUFFIX = ".hlog"
+LASER_LOG_MAGIC = b"HOUGHLOG"
+LASER_LOG_VERSION = 1
+
+# the values shared by all the scans, saved once in the header
+LASER_LOG_PARAMS = [
+    "angle_increment",
+    "angle_max",
+    "angle_min",
+    "range_max",
+    "range_min",
+]
+
+
+def parse_arguments():
+    """Setup CLI interface
+    """
+    parser = argparse.ArgumentParser(
+        description="Convert the recorded scans to a binary log, and read it back"
+    )
+
+    parser.add_argument(
+        "-i",
+        "--data_pattern",
+        type=str,
+        default="ld_*.txt",
+        help="Convert the files in laser_data matching this",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--log_name",
+        type=str,
+        default="ld.hlog",
+        help="Name of the log to create in laser_data",
+    )
+
+    # last line to parse the args
+    args = parser.parse_args()
+    return args
+
+
+def setup_logger(logLevel="DEBUG"):
+    """Setup logger that outputs to console for the module
+    """
+    logroot = logging.getLogger("c")
+    logroot.propagate = False
+    logroot.setLevel(logLevel)
+
+    module_console_handler = logging.StreamHandler()
+
+    #  log_format_module = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    #  log_format_module = "%(name)s - %(levelname)s: %(message)s"
+    #  log_format_module = '%(levelname)s: %(message)s'
+    #  log_format_module = '%(name)s: %(message)s'
+    log_format_module = "%(message)s"
+
+    formatter = logging.Formatter(log_format_module)
+    module_console_handler.setFormatter(formatter)
+
+    logroot.addHandler(module_console_handler)
+
+    logging.addLevelName(5, "TRACE")
+    # use it like this
+    # logroot.log(5, 'Exceedingly verbose debug')
+
+
+def setup_env():
+    setup_logger("INFO")
+
+    args = parse_arguments()
+
+    # build command string to repeat this run
+    # FIXME if an option is a flag this does not work, sorry
+    recap = f"python3 laser_log.py"
+    for a, v in args._get_kwargs():
+        recap += f" --{a} {v}"
+
+    logmain = logging.getLogger(f"c.{__name__}.setup_env")
+    logmain.info(recap)
+
+    return args
+
+
+def save_laser_log(
+    log_file: Path, iterate_scans: Callable[[], Iterator[Tuple[str, Dict]]]
+) -> None:
+    """Save the scans in a columnar binary log
+
+    The log starts with LASER_LOG_MAGIC, then the little endian int64 header
+    [version, scan_num, ray_num, names_len] and the float64 LASER_LOG_PARAMS and
+    scan_angles, shared by all the scans. Then the float64 odom_robot_pose
+    (scan_num, 2) and odom_robot_yaw (scan_num) columns, the float32 ranges
+    (scan_num, ray_num) and the names of the scans, one per line.
+
+    iterate_scans is called twice, the scans are never all in memory: the first
+    pass counts and checks them, then the file is sized and the second pass fills
+    the columns through a memory map, one scan at a time.
+    """
+    scan_names = []
+    for scan_name, data in iterate_scans():
+        if len(scan_names) == 0:
+            scan_angles = np.array(data["scan_angles"], dtype="<f8")
+            params = [data[param] for param in LASER_LOG_PARAMS]
+        elif not np.array_equal(data["scan_angles"], scan_angles) or any(
+            data[param] != value for param, value in zip(LASER_LOG_PARAMS, params)
+        ):
+            raise ValueError(f"The scan {scan_name} has different rays")
+        scan_names.append(scan_name)
+
+    scan_num = len(scan_names)
+    if scan_num == 0:
+        raise ValueError(f"No scans to save in {log_file}")
+    ray_num = scan_angles.shape[0]
+    names = "\n".join(scan_names).encode()
+    header = [LASER_LOG_VERSION, scan_num, ray_num, len(names)]
+
+    # the position of the columns in the file
+    columns = [
+        ("odom_robot_pose", "<f8", (scan_num, 2)),
+        ("odom_robot_yaw", "<f8", (scan_num,)),
+        ("ranges", "<f4", (scan_num, ray_num)),
+    ]
+    offset = len(LASER_LOG_MAGIC) + 8 * len(header) + 8 * len(params)
+    offset += scan_angles.nbytes
+    column_offsets = []
+    for _, dtype, shape in columns:
+        column_offsets.append(offset)
+        offset += np.dtype(dtype).itemsize * int(np.prod(shape))
+
+    with log_file.open("wb") as fl:
+        fl.write(LASER_LOG_MAGIC)
+        fl.write(np.array(header, dtype="<i8").tobytes())
+        fl.write(np.array(params, dtype="<f8").tobytes())
+        fl.write(scan_angles.tobytes())
+        # the columns are filled later, the names go after them
+        fl.seek(offset)
+        fl.write(names)
+
+    maps = {}
+    for (column, dtype, shape), column_offset in zip(columns, column_offsets):
+        maps[column] = np.memmap(
+            log_file, dtype=dtype, mode="r+", offset=column_offset, shape=shape
+        )
+
+    i_scan = -1
+    for i_scan, (scan_name, data) in enumerate(iterate_scans()):
+        if i_scan >= scan_num or scan_name != scan_names[i_scan]:
+            raise ValueError(f"The scans changed while saving {log_file}")
+        for column, _, _ in columns:
+            maps[column][i_scan] = data[column]
+    if i_scan + 1 != scan_num:
+        raise ValueError(f"The scans changed while saving {log_file}")
+
+    for column_map in maps.values():
+        column_map.flush()
+
+
+class LaserLog:
+    def __init__(self, log_file: Path):
+        """Read the scans of a binary log, see save_laser_log
+
+        The file is memory mapped, the columns are views on it: a scan is read
+        from the disk only when it is requested, so the memory used does not
+        depend on the length of the log.
+        """
+        self.log_file = log_file
+
+        with log_file.open("rb") as fl:
+            self.mm = mmap.mmap(fl.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic_len = len(LASER_LOG_MAGIC)
+        if self.mm[:magic_len] != LASER_LOG_MAGIC:
+            raise ValueError(f"{log_file} is not a laser log")
+
+        offset = magic_len
+        header = np.frombuffer(self.mm, dtype="<i8", count=4, offset=offset)
+        version, self.scan_num, self.ray_num, names_len = header.tolist()
+        if version != LASER_LOG_VERSION:
+            raise ValueError(f"{log_file} has unsupported version {version}")
+        offset += header.nbytes
+
+        params = np.frombuffer(
+            self.mm, dtype="<f8", count=len(LASER_LOG_PARAMS), offset=offset
+        )
+        self.params = dict(zip(LASER_LOG_PARAMS, params.tolist()))
+        offset += params.nbytes
+
+        self.scan_angles = self.read_column(offset, "<f8", (self.ray_num,))
+        offset += self.scan_angles.nbytes
+        self.odom_robot_pose = self.read_column(offset, "<f8", (self.scan_num, 2))
+        offset += self.odom_robot_pose.nbytes
+        self.odom_robot_yaw = self.read_column(offset, "<f8", (self.scan_num,))
+        offset += self.odom_robot_yaw.nbytes
+        self.ranges = self.read_column(offset, "<f4", (self.scan_num, self.ray_num))
+        offset += self.ranges.nbytes
+
+        self.scan_names = self.mm[offset : offset + names_len].decode().split("\n")
+
+    def read_column(self, offset: int, dtype: str, shape: Tuple) -> np.ndarray:
+        """A read only view on the mapped file
+        """
+        count = int(np.prod(shape))
+        column = np.frombuffer(self.mm, dtype=dtype, count=count, offset=offset)
+        return column.reshape(shape)
+
+    def __len__(self) -> int:
+        return self.scan_num
+
+    def get_scan(self, i_scan: int) -> Dict:
+        """The scan i_scan, with the same keys of the recorded .json files
+
+        ranges and scan_angles are arrays, ranges is a view on the mapped file
+        """
+        data = {
+            "odom_robot_pose": self.odom_robot_pose[i_scan].tolist(),
+            "odom_robot_yaw": float(self.odom_robot_yaw[i_scan]),
+            "ranges": self.ranges[i_scan],
+            "scan_angles": self.scan_angles,
+            "tot_ray_number": self.ray_num,
+        }
+        data.update(self.params)
+        return data
+
+    def __iter__(self) -> Iterator[Tuple[str, Dict]]:
+        """Yield the scans one at a time, with their names
+        """
+        for i_scan in range(self.scan_num):
+            yield self.scan_names[i_scan], self.get_scan(i_scan)
+
+
+def run_laser_log(args):
+    """Convert the recorded scans to a log, then check that it reads back the same
+    """
+    logg = logging.getLogger(f"c.{__name__}.run_laser_log")
+    logg.debug(f"Starting run_laser_log")
+
+    # imported here to avoid a cycle, utils reads the logs
+    from utils import iterate_laser_data
+
+    main_dir = Path(__file__).resolve().parent
+    log_file = main_dir / "laser_data" / args.log_name
+
+    def iterate_scans():
+        return iterate_laser_data(args.data_pattern)
+
+    t_save_start = timer()
+    save_laser_log(log_file, iterate_scans)
+    t_save_end = timer()
+    logg.info(f"Converted the .json scans in {t_save_end-t_save_start} s")
+    logg.info(f"Saved {log_file}, {log_file.stat().st_size} bytes")
+
+    laser_log = LaserLog(log_file)
+    t_log_start = timer()
+    for _ in laser_log:
+        pass
+    t_log_end = timer()
+    logg.info(f"Read {len(laser_log)} log scans in {t_log_end-t_log_start} s")
+
+    # compare the two one scan at a time
+    for (json_name, json_data), (log_name, log_data) in zip(iterate_scans(), laser_log):
+        for key in json_data:
+            if not np.array_equal(json_data[key], log_data[key]):
+                logg.warning(f"Scan {json_name} is different in {key}")
+        if json_name != log_name:
+            logg.warning(f"Scan {json_name} is named {log_name}")
+
+
+if __name__ == "__main__":
+    args = setup_env()
+    run_laser_log(args)
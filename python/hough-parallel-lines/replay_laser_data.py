@@ -0,0 +1,205 @@
+import argparse
+import json
+import logging
+import math
+import numpy as np  # type: ignore
+import socket
+
+from random import seed as rseed
+from timeit import default_timer as timer
+
+from create_laser_data import create_laser_data
+from utils import iterate_at_rate
+from utils import iterate_laser_data
+
+
+def parse_arguments():
+    """Setup CLI interface
+    """
+    parser = argparse.ArgumentParser(
+        description="Send laser scans over UDP, standing in for the robot"
+    )
+
+    parser.add_argument(
+        "-i",
+        "--data_pattern",
+        type=str,
+        default="",
+        help="Replay the files in laser_data matching this (ld_03_*.txt), if empty generate the scans",
+    )
+
+    parser.add_argument(
+        "-H", "--host", type=str, default="localhost", help="Where to send the scans"
+    )
+
+    parser.add_argument(
+        "-p", "--port", type=int, default=5005, help="UDP port to send the scans to"
+    )
+
+    parser.add_argument(
+        "-pe",
+        "--period",
+        type=float,
+        default=0.025,
+        help="Seconds between two scans",
+    )
+
+    parser.add_argument(
+        "-n",
+        "--scan_num",
+        type=int,
+        default=1000,
+        help="How many scans to generate",
+    )
+
+    parser.add_argument(
+        "-s", "--rand_seed", type=int, default=-1, help="random seed to use"
+    )
+
+    # last line to parse the args
+    args = parser.parse_args()
+    return args
+
+
+def setup_logger(logLevel="DEBUG"):
+    """Setup logger that outputs to console for the module
+    """
+    logroot = logging.getLogger("c")
+    logroot.propagate = False
+    logroot.setLevel(logLevel)
+
+    module_console_handler = logging.StreamHandler()
+
+    #  log_format_module = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    #  log_format_module = "%(name)s - %(levelname)s: %(message)s"
+    #  log_format_module = '%(levelname)s: %(message)s'
+    #  log_format_module = '%(name)s: %(message)s'
+    log_format_module = "%(message)s"
+
+    formatter = logging.Formatter(log_format_module)
+    module_console_handler.setFormatter(formatter)
+
+    logroot.addHandler(module_console_handler)
+
+    logging.addLevelName(5, "TRACE")
+    # use it like this
+    # logroot.log(5, 'Exceedingly verbose debug')
+
+
+def setup_env():
+    setup_logger("INFO")
+
+    args = parse_arguments()
+
+    # setup seed value
+    if args.rand_seed == -1:
+        myseed = 1
+        myseed = int(timer() * 1e9 % 2 ** 32)
+    else:
+        myseed = args.rand_seed
+    rseed(myseed)
+    np.random.seed(myseed)
+
+    # build command string to repeat this run
+    # FIXME if an option is a flag this does not work, sorry
+    recap = f"python3 replay_laser_data.py"
+    for a, v in args._get_kwargs():
+        if a == "rand_seed":
+            recap += f" --rand_seed {myseed}"
+        else:
+            recap += f" --{a} {v}"
+
+    logmain = logging.getLogger(f"c.{__name__}.setup_env")
+    logmain.info(recap)
+
+    return args
+
+
+def create_laser_scan(
+    th_rot_deg,
+    laser_std_dev=0.01,
+    corridor_width=0.56,
+    tot_ray_number=400,
+    sector_ray_num=60,
+):
+    """Create a scan of a corridor rotated by th_rot_deg, in the recorded format
+
+    The rays around left (+90 deg) and right (-90 deg) hit the walls, the others
+    overflow. The ray angles are the same as in the recorded scans.
+    """
+    range_min = 0.15
+    range_max = 12.0
+    scan_angles = np.linspace(-math.pi, math.pi, tot_ray_number)
+    angle_increment = scan_angles[1] - scan_angles[0]
+
+    # the overflow rays, they are filtered out
+    ranges = np.full(tot_ray_number, range_max + 1)
+
+    # the rays used in extract_filt_lr are centered on 300 and 100
+    for ray_center in [300, 100]:
+        # create_laser_data rotates the points by -th_rot_deg, so the points are
+        # generated exactly on the rays
+        wall_x, wall_y = create_laser_data(
+            math.degrees(scan_angles[ray_center]) + th_rot_deg,
+            math.degrees(angle_increment * sector_ray_num),
+            sector_ray_num * 2 + 1,
+            laser_std_dev,
+            th_rot_deg,
+            corridor_width,
+        )
+        ray_slice = slice(ray_center - sector_ray_num, ray_center + sector_ray_num + 1)
+        ranges[ray_slice] = np.sqrt(np.square(wall_x) + np.square(wall_y))
+
+    data = {
+        "angle_increment": angle_increment,
+        "angle_max": scan_angles[-1],
+        "angle_min": scan_angles[0],
+        "odom_robot_pose": [0, 0],
+        # the same convention of the recorded data
+        "odom_robot_yaw": math.pi / 2 + math.radians(th_rot_deg),
+        "range_max": range_max,
+        "range_min": range_min,
+        "ranges": ranges.tolist(),
+        "scan_angles": scan_angles.tolist(),
+        "tot_ray_number": tot_ray_number,
+    }
+    return data
+
+
+def iterate_generated_scans(scan_num):
+    """Generate the scans of a robot that slowly turns in a corridor
+    """
+    for i_scan, th_rot_deg in enumerate(np.linspace(-30, 30, scan_num)):
+        yield f"gen_{i_scan:05d}", create_laser_scan(th_rot_deg)
+
+
+def run_replay_laser_data(args):
+    """Send the scans at wall-clock rate, like the robot would
+    """
+    logg = logging.getLogger(f"c.{__name__}.run_replay_laser_data")
+    logg.debug(f"Starting run_replay_laser_data")
+
+    if args.data_pattern == "":
+        all_scans = iterate_generated_scans(args.scan_num)
+    else:
+        all_scans = iterate_laser_data(args.data_pattern)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    address = (args.host, args.port)
+    logg.info(f"Sending scans to {address} every {args.period} seconds")
+
+    num_sent = 0
+    for (scan_name, data), _ in iterate_at_rate(all_scans, args.period):
+        # the scans read from a binary log have arrays of ranges and angles
+        datagram = json.dumps(data, default=lambda value: value.tolist())
+        sock.sendto(datagram.encode(), address)
+        logg.debug(f"Sent {scan_name}")
+        num_sent += 1
+
+    sock.close()
+    logg.info(f"Sent {num_sent} scans")
+
+
+if __name__ == "__main__":
+    args = setup_env()
+    run_replay_laser_data(args)
@@ -0,0 +1,252 @@
+import argparse
+import json
+import logging
+import math
+import numpy as np  # type: ignore
+import socket
+
+from timeit import default_timer as timer
+
+from analyze_laser_data import filter_laser_data
+from analyze_parallel_lines import rth2ab
+from double_hough import DoubleHough
+from utils import iterate_at_rate
+from utils import iterate_laser_data
+from utils import slope2rad
+
+
+def parse_arguments():
+    """Setup CLI interface
+    """
+    parser = argparse.ArgumentParser(
+        description="Find the corridor in each scan of a live laser feed"
+    )
+
+    parser.add_argument(
+        "-i",
+        "--data_pattern",
+        type=str,
+        default="",
+        help="Replay the files in laser_data matching this (ld_03_*.txt), if empty listen on UDP",
+    )
+
+    parser.add_argument(
+        "-p", "--port", type=int, default=5005, help="UDP port to receive the scans on"
+    )
+
+    parser.add_argument(
+        "-pe",
+        "--period",
+        type=float,
+        default=0.025,
+        help="Seconds between two scans when replaying the files",
+    )
+
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        default=2,
+        help="Stop listening after this many seconds without scans",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--th_half_wid_deg",
+        type=float,
+        default=15,
+        help="Search the corridor this close to the previous one, 0 to always search everywhere",
+    )
+
+    parser.add_argument(
+        "-r",
+        "--report_every",
+        type=int,
+        default=200,
+        help="Report the latency every this many scans",
+    )
+
+    # last line to parse the args
+    args = parser.parse_args()
+    return args
+
+
+def setup_logger(logLevel="DEBUG"):
+    """Setup logger that outputs to console for the module
+    """
+    logroot = logging.getLogger("c")
+    logroot.propagate = False
+    logroot.setLevel(logLevel)
+
+    module_console_handler = logging.StreamHandler()
+
+    #  log_format_module = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    #  log_format_module = "%(name)s - %(levelname)s: %(message)s"
+    #  log_format_module = '%(levelname)s: %(message)s'
+    #  log_format_module = '%(name)s: %(message)s'
+    log_format_module = "%(message)s"
+
+    formatter = logging.Formatter(log_format_module)
+    module_console_handler.setFormatter(formatter)
+
+    logroot.addHandler(module_console_handler)
+
+    logging.addLevelName(5, "TRACE")
+    # use it like this
+    # logroot.log(5, 'Exceedingly verbose debug')
+
+
+def setup_env():
+    setup_logger("INFO")
+
+    args = parse_arguments()
+
+    # build command string to repeat this run
+    # FIXME if an option is a flag this does not work, sorry
+    recap = f"python3 stream_corridor.py"
+    for a, v in args._get_kwargs():
+        recap += f" --{a} {v}"
+
+    logmain = logging.getLogger(f"c.{__name__}.setup_env")
+    logmain.info(recap)
+
+    return args
+
+
+def iterate_udp_scans(port, timeout):
+    """Yield the scans received on the UDP port, with the time they arrived
+
+    Waits for the first scan as long as needed, then stops after timeout seconds
+    without scans
+    """
+    logg = logging.getLogger(f"c.{__name__}.iterate_udp_scans")
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("", port))
+    logg.info(f"Listening for scans on port {port}")
+
+    try:
+        while True:
+            try:
+                datagram, _ = sock.recvfrom(2 ** 16)
+            except socket.timeout:
+                logg.info(f"No scans for {timeout} seconds")
+                break
+            arrival_time = timer()
+            sock.settimeout(timeout)
+            yield json.loads(datagram), arrival_time
+    finally:
+        sock.close()
+
+
+def iterate_replay_scans(data_pattern, period):
+    """Yield the recorded scans at wall-clock rate, with the time they were due
+    """
+    all_scans = iterate_laser_data(data_pattern)
+    for (_, data), due_time in iterate_at_rate(all_scans, period):
+        yield data, due_time
+
+
+class CorridorTracker:
+    def __init__(self, th_half_wid, sector_wid):
+        """Find the corridor in a sequence of scans
+
+        Each search starts near the corridor found in the previous scan, th_half_wid
+        radians on each side, if th_half_wid is 0 the full range is searched.
+        """
+        self.th_half_wid = th_half_wid
+        self.sector_wid = sector_wid
+
+        # the same params of run_double_hough
+        self.dh = DoubleHough(
+            0,
+            0,
+            th_bin_num_fp=20,
+            r_stride_fp=0.025,
+            th_bin_num_sp=81,
+            r_stride_sp=0.005,
+            r_num_sp=20,
+            corridor_width=0.56,
+        )
+
+        self.best_th = None
+        self.warm_num = 0
+
+    def process_scan(self, data):
+        """Find the corridor in the scan
+        """
+        left_filt_x, left_filt_y, right_filt_x, right_filt_y = filter_laser_data(
+            data, self.sector_wid
+        )
+        self.dh.data_x = np.hstack((left_filt_x, right_filt_x))
+        self.dh.data_y = np.hstack((left_filt_y, right_filt_y))
+
+        if self.best_th is None or self.th_half_wid == 0:
+            best_th, best_r = self.dh.find_parallel_lines()
+        else:
+            best_th, best_r = self.dh.find_parallel_lines(
+                self.best_th, self.th_half_wid
+            )
+            self.warm_num += self.dh.warm_started
+
+        self.best_th = best_th
+        return best_th, best_r
+
+
+def recap_latency(all_latency, period):
+    """Percentiles of the latency, in milliseconds
+    """
+    all_latency = np.array(all_latency)
+    p50, p90, p99 = np.percentile(all_latency, [50, 90, 99]) * 1000
+    recap = f"latency p50 {p50:.2f} ms p90 {p90:.2f} ms p99 {p99:.2f} ms"
+    recap += f" max {np.max(all_latency) * 1000:.2f} ms"
+    recap += f" late {np.sum(all_latency > period)}/{len(all_latency)}"
+    return recap
+
+
+def run_stream_corridor(args):
+    """Process the scans as they arrive, report the latency of each one
+
+    The latency goes from when the scan arrived to when the corridor is found,
+    including the time spent waiting for the previous scans
+    """
+    logg = logging.getLogger(f"c.{__name__}.run_stream_corridor")
+    logg.debug(f"Starting run_stream_corridor")
+
+    # the same sector of run_double_hough
+    sector_wid_deg = 30
+    sector_wid = math.floor(sector_wid_deg / 180 * 200)
+
+    tracker = CorridorTracker(math.radians(args.th_half_wid_deg), sector_wid)
+
+    if args.data_pattern == "":
+        all_scans = iterate_udp_scans(args.port, args.timeout)
+    else:
+        all_scans = iterate_replay_scans(args.data_pattern, args.period)
+
+    all_latency = []
+    all_errors = []
+    for data, arrival_time in all_scans:
+        best_th, best_r = tracker.process_scan(data)
+        all_latency.append(timer() - arrival_time)
+
+        # compare with the odometry, like in run_compare
+        left_line_rad = slope2rad(rth2ab(best_r, best_th)[0])
+        all_errors.append(data["odom_robot_yaw"] + left_line_rad - math.pi / 2)
+        logg.debug(f"best_th: {best_th:.6f} best_r {best_r:.6f}")
+
+        if len(all_latency) % args.report_every == 0:
+            logg.info(recap_latency(all_latency[-args.report_every :], args.period))
+
+    if len(all_latency) == 0:
+        logg.info("No scans received")
+        return
+
+    logg.info(f"Processed {len(all_latency)} scans, {tracker.warm_num} warm started")
+    logg.info(recap_latency(all_latency, args.period))
+    logg.info(f"mean_parallel_errors: {np.mean(np.abs(all_errors)):9.6f}")
+
+
+if __name__ == "__main__":
+    args = setup_env()
+    run_stream_corridor(args)
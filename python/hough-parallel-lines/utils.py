@@ -2,10 +2,14 @@ import json
 import logging
 import math
 import numpy as np  # type: ignore
+import time
 
 from pathlib import Path
 from timeit import default_timer as timer
 
+from laser_log import LASER_LOG_SUFFIX
+from laser_log import LaserLog
+
 
 def dist_2D(x0, y0, x1, y1):
     """Computes the 2D distance between two points
@@ -40,6 +44,34 @@ def load_data(data_file_name):
     return data
 
 
+def iterate_laser_data(data_pattern):
+    """Load, one at a time, the scans in laser_data that match the pattern
+
+    The scans are in .json files, or in binary logs, read lazily
+    """
+    main_dir = Path(__file__).resolve().parent
+    for data_file in sorted((main_dir / "laser_data").glob(data_pattern)):
+        if data_file.suffix == LASER_LOG_SUFFIX:
+            yield from LaserLog(data_file)
+        else:
+            yield data_file.name, load_data(data_file.name)
+
+
+def iterate_at_rate(iterable, period):
+    """Yield the elements one every period seconds, with the time they were due
+
+    If the consumer is slower than period, the elements pile up and are yielded
+    late, like the scans of a robot waiting in a socket buffer
+    """
+    due_time = timer()
+    for element in iterable:
+        wait = due_time - timer()
+        if wait > 0:
+            time.sleep(wait)
+        yield element, due_time
+        due_time += period
+
+
 def slope2deg(slope, direction=1):
     """Convert the slope of a line to an angle in degrees
     """